@@ -30,6 +30,28 @@ class CustomPagination(LimitOffsetPagination):
             self.display_page_controls = True
         return result
 
+    def page_state(self) -> dict:
+        '''What the response of the page just paginated needs besides its results, for `restore_page` to build it again.'''
+        if self.count_query:
+            return {'count': self.count}
+        return {'has_next': self.has_next}  # type: ignore
+
+    def restore_page(self, request: Request, state: dict) -> None:
+        '''Restores the state of a page paginated before for the same parameters, so that its response is built without querying.'''
+        self.request = request
+        self.count_query = self.get_count_query(request)
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        if self.count_query:
+            self.count = state['count']
+            if self.count > self.limit and self.template is not None:  # type: ignore
+                self.display_page_controls = True
+            return
+        self.has_next = state['has_next']
+        self.has_prev = self.offset > 0
+        if (self.has_next or self.has_prev) and self.no_count_template is not None:  # type: ignore
+            self.display_page_controls = True
+
     def get_count_query(self, request: Request):
         try:
             return request.query_params.get(self.count_query_param, 'false').lower() == 'true'
@@ -7,3 +7,4 @@ from .variant_admin import VariantAdmin
 from .variant_suggestion_admin import VariantSuggestionAdmin
 from .variant_alias_admin import VariantAliasAdmin
 from .variant_update_suggestion_admin import VariantUpdateSuggestionAdmin
+from .variant_generation_profile_admin import VariantGenerationProfileAdmin
@@ -17,7 +17,7 @@ from django.urls import reverse, path
 from django.shortcuts import redirect
 from django.utils import timezone
 from django.tasks import TaskResult
-from spellbook.models import Card, FeatureNeededInCombo, Template, Feature, Combo, CardInCombo, TemplateInCombo, Variant, VariantSuggestion, CardUsedInVariantSuggestion, TemplateRequiredInVariantSuggestion, ZoneLocation
+from spellbook.models import Card, FeatureNeededInCombo, Template, Feature, Combo, CardInCombo, TemplateInCombo, Variant, VariantSuggestion, CardUsedInVariantSuggestion, TemplateRequiredInVariantSuggestion, ZoneLocation, DataVersion
 from spellbook.tasks import generate_variants_task
 from .utils import SpellbookModelAdmin, SpellbookAdminForm, CustomFilter, IngredientCountListFilter
 from .ingredient_admin import ComboIngredientAdmin, IngredientForm
@@ -606,6 +606,8 @@ class ComboAdmin(SpellbookModelAdmin):
                 status=Variant.Status.NEW
             ).update(status=Variant.Status.RESTORE, updated=timezone.now())
             if updated:
+                # updated in bulk, sending no signal to bump the catalog version
+                DataVersion.bump(DataVersion.CATALOG)
                 messages.info(request, f'Set {updated} "New" variants to "Restore" status.')
 
     def generate_variants(self, request: HttpRequest, object_id: str):
@@ -0,0 +1,126 @@
+import json
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from spellbook.models import Combo, VariantGenerationProfile
+from .utils import LocalDatetimeAdminMixin
+
+# How many of the costliest combos of the latest profile the costly combos page lists
+COSTLY_COMBOS_DISPLAY_LIMIT = 50
+
+
+def _graph_seconds(report: dict) -> float | None:
+    for phase in report.get('phases', []):
+        if phase['name'] == 'graph':
+            return phase['seconds']
+    return None
+
+
+@admin.register(VariantGenerationProfile)
+class VariantGenerationProfileAdmin(LocalDatetimeAdminMixin, admin.ModelAdmin):
+    fields = ['job', 'created', 'phases', 'costliest_combos', 'download']
+    readonly_fields = fields
+    list_display = ['__str__', 'created', 'graph_seconds', 'total_seconds']
+    search_fields = ['job']
+
+    @admin.display(description='Graph phase seconds')
+    def graph_seconds(self, obj: VariantGenerationProfile) -> str:
+        seconds = _graph_seconds(obj.report)
+        return '-' if seconds is None else f'{seconds:.1f}'
+
+    @admin.display(description='Total seconds')
+    def total_seconds(self, obj: VariantGenerationProfile) -> str:
+        return f'{sum(phase['seconds'] for phase in obj.report.get('phases', [])):.1f}'
+
+    @admin.display(description='Phases')
+    def phases(self, obj: VariantGenerationProfile):
+        # format_html_join escapes its arguments into strings, so the numbers are formatted beforehand
+        return format_html(
+            '<table><thead><tr><th>Phase</th><th>Seconds</th><th>Peak RSS (MiB)</th><th>Peak worker RSS (MiB)</th><th>Traced peak (MiB)</th></tr></thead><tbody>{}</tbody></table>',
+            format_html_join(
+                '',
+                '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+                (
+                    (
+                        phase['name'],
+                        f'{phase['seconds']:.1f}',
+                        f'{phase['max_rss'] / 2 ** 20:.0f}',
+                        f'{phase['max_worker_rss'] / 2 ** 20:.0f}',
+                        '-' if phase['traced_peak'] is None else f'{phase['traced_peak'] / 2 ** 20:.0f}',
+                    )
+                    for phase in obj.report.get('phases', [])
+                ),
+            ),
+        )
+
+    @admin.display(description='Costliest combos')
+    def costliest_combos(self, obj: VariantGenerationProfile):
+        return format_html(
+            '<p>{} combos measured.</p><table><thead><tr><th>Combo</th><th>Seconds</th><th>Variants</th><th>Largest set</th><th>Join pairs</th></tr></thead><tbody>{}</tbody></table>',
+            obj.report.get('combo_count', 0),
+            format_html_join(
+                '',
+                '<tr><td><a href="{}">{}</a></td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+                (
+                    (reverse('admin:spellbook_combo_change', args=[combo['id']]), combo['id'], f'{combo['seconds']:.3f}', combo['variant_count'], combo['largest_set'], combo['join_pairs'])
+                    for combo in obj.report.get('combos', [])[:COSTLY_COMBOS_DISPLAY_LIMIT]
+                ),
+            ),
+        )
+
+    @admin.display(description='Report')
+    def download(self, obj: VariantGenerationProfile):
+        return format_html('<a href="{}">Download the JSON report</a>', reverse('admin:spellbook_variantgenerationprofile_report', args=[obj.pk]))
+
+    def report(self, request: HttpRequest, object_id: str) -> HttpResponse:
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        profile = get_object_or_404(VariantGenerationProfile, pk=object_id)
+        response = HttpResponse(json.dumps({'job': profile.job, 'created': profile.created.isoformat(), **profile.report}, indent=2), content_type='application/json')
+        response['Content-Disposition'] = f'attachment; filename="generation-profile-{profile.pk}.json"'
+        return response
+
+    def costly_combos(self, request: HttpRequest) -> TemplateResponse:
+        '''Lists the costliest combos of the latest profile, with what they took in each of the kept profiles.'''
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        profiles = list(VariantGenerationProfile.objects.order_by('-created', '-id'))
+        combo_ids = [combo['id'] for combo in profiles[0].report.get('combos', [])[:COSTLY_COMBOS_DISPLAY_LIMIT]] if profiles else []
+        seconds_by_profile = [{combo['id']: combo['seconds'] for combo in profile.report.get('combos', [])} for profile in profiles]
+        names = dict(Combo.objects.filter(pk__in=combo_ids).values_list('pk', 'name'))
+        return TemplateResponse(request, 'admin/spellbook/variantgenerationprofile/costly_combos.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Costliest generator combos',
+            'subtitle': None,
+            'opts': self.model._meta,
+            'profiles': profiles,
+            'rows': [
+                (combo_id, names.get(combo_id, ''), [seconds.get(combo_id) for seconds in seconds_by_profile])
+                for combo_id in combo_ids
+            ],
+        })
+
+    def get_urls(self):
+        return [
+            path(
+                'costly-combos/',
+                self.admin_site.admin_view(view=self.costly_combos),  # pyright: ignore[reportArgumentType]
+                name='spellbook_variantgenerationprofile_costly_combos',
+            ),
+            path(
+                '<path:object_id>/report/',
+                self.admin_site.admin_view(view=self.report),  # pyright: ignore[reportArgumentType]
+                name='spellbook_variantgenerationprofile_report',
+            ),
+            *super().get_urls(),
+        ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,124 @@
+'''
+Runs the benchmarks of the variants package and writes their results as JSON, for example:
+
+    python -m spellbook.benchmarks --build both --output results.json
+    python -m spellbook.benchmarks --build both --baseline results.json
+
+The macro benchmarks run on a synthetic catalog in an in-memory SQLite database, never on the configured one.
+'''
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Any
+from .builds import COMPILED, INTERPRETED, current_build, force_interpreted_build
+from .runner import RESULTS_VERSION, compare_results
+
+CURRENT = 'current'
+BOTH = 'both'
+
+
+def _arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m spellbook.benchmarks', description='Benchmarks the variants package.')
+    parser.add_argument('--suite', choices=('micro', 'macro', 'all'), default='all')
+    parser.add_argument('--build', choices=(CURRENT, INTERPRETED, BOTH), default=CURRENT, help='the build of the variants package to measure: the one installed, the pure Python one, or both in turn')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplies the size of the inputs and of the catalog')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--filter', default='', help='only runs the benchmarks whose name contains this')
+    parser.add_argument('--output', help='the file to write the results to, instead of the standard output')
+    parser.add_argument('--baseline', help='results to compare against, failing on the benchmarks that got slower')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='the slowdown allowed before failing, 0.1 meaning 10%%')
+    return parser.parse_args()
+
+
+def _log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def _setup_django() -> None:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    from django.conf import settings
+    settings.DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+    import django
+    django.setup()
+
+
+def _measure(arguments: argparse.Namespace) -> dict[str, Any]:
+    '''Runs the chosen suites in this process, on whichever build of the variants package it imports.'''
+    _setup_django()
+    from .catalog import CatalogParameters, create_catalog
+    from .macro import macro_benchmarks
+    from .micro import micro_benchmarks
+    from .runner import run_benchmarks
+    parameters = CatalogParameters().scaled(arguments.scale)
+    benchmarks = []
+    if arguments.suite in ('micro', 'all'):
+        benchmarks.extend(micro_benchmarks(scale=arguments.scale))
+    if arguments.suite in ('macro', 'all'):
+        from django.db import connection
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        benchmarks.extend(macro_benchmarks(create_catalog(parameters)))
+    benchmarks = [benchmark for benchmark in benchmarks if arguments.filter in benchmark.name]
+    results = run_benchmarks(benchmarks, repeat=arguments.repeat, log=_log)
+    return {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'suite': arguments.suite,
+        'scale': arguments.scale,
+        'catalog': parameters.as_dict(),
+        'builds': {current_build(): {'results': {result.name: result.as_dict() for result in results}}},
+    }
+
+
+def _measure_in_subprocess(arguments: argparse.Namespace, build: str) -> dict[str, Any]:
+    '''Runs the benchmarks in a fresh interpreter, as a process can only import one build of the variants package.'''
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, 'results.json')
+        subprocess.run(
+            [
+                sys.executable, '-m', 'spellbook.benchmarks',
+                '--suite', arguments.suite,
+                '--build', build,
+                '--scale', str(arguments.scale),
+                '--repeat', str(arguments.repeat),
+                '--filter', arguments.filter,
+                '--output', output,
+            ],
+            check=True,
+        )
+        with open(output) as file:
+            return json.load(file)
+
+
+def main() -> int:
+    arguments = _arguments()
+    if arguments.build == BOTH:
+        results = _measure_in_subprocess(arguments, CURRENT)
+        if COMPILED in results['builds']:
+            results['builds'] |= _measure_in_subprocess(arguments, INTERPRETED)['builds']
+        else:
+            _log('The variants package is not compiled here, so only its interpreted build was measured')
+    else:
+        if arguments.build == INTERPRETED:
+            force_interpreted_build()
+        results = _measure(arguments)
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            regressions = compare_results(results, json.load(file), tolerance=arguments.tolerance)
+        for regression in regressions:
+            _log(f'Regression: {regression}')
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import os
+import sys
+from types import ModuleType
+
+# The package Cython compiles in place, the one whose builds are compared
+VARIANTS_PACKAGE = 'spellbook.variants'
+
+COMPILED = 'compiled'
+INTERPRETED = 'interpreted'
+
+
+class _SourceOnlyFinder(importlib.abc.MetaPathFinder):
+    '''Imports the modules of the variants package from their sources, even when a compiled extension sits next to them.'''
+
+    def find_spec(self, fullname: str, path, target: ModuleType | None = None):
+        if not fullname.startswith(VARIANTS_PACKAGE + '.') or path is None:
+            return None
+        name = fullname.rpartition('.')[2]
+        for directory in path:
+            source = os.path.join(directory, name + '.py')
+            if os.path.isfile(source):
+                return importlib.util.spec_from_file_location(fullname, source)
+        return None
+
+
+def force_interpreted_build() -> None:
+    '''Makes the variants package run interpreted in this process. It has to come before anything imports it.'''
+    assert not any(module.startswith(VARIANTS_PACKAGE + '.') for module in sys.modules), 'the variants package is already imported'
+    sys.meta_path.insert(0, _SourceOnlyFinder())
+
+
+def current_build() -> str:
+    '''Tells whether the modules of the variants package this process imported are compiled or interpreted.'''
+    for name, module in list(sys.modules.items()):
+        if name.startswith(VARIANTS_PACKAGE + '.') and (getattr(module, '__file__', None) or '').endswith(tuple(importlib.machinery.EXTENSION_SUFFIXES)):
+            return COMPILED
+    return INTERPRETED
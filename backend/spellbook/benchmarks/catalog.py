@@ -0,0 +1,148 @@
+import random
+from dataclasses import dataclass, fields, replace
+from django.db import transaction
+from spellbook.models import Card, Combo, Feature, FeatureAttribute, FeatureOfCard, CardInCombo, FeatureNeededInCombo, FeatureProducedInCombo, ZoneLocation
+
+
+@dataclass(frozen=True)
+class CatalogParameters:
+    '''
+    Shapes a synthetic catalog: the features of cards feed layers of utility combos, whose features feed the generator
+    combos along with the ones of cards. Some utility combos produce each other's features, making cycles, some features
+    of cards need many copies of their card, and some generator combos allow them.
+    '''
+    cards: int = 300
+    # a few cards for each of their features, as the joins of a combo multiply them up to the variant limit
+    card_features: int = 150
+    combo_features: int = 40
+    results: int = 30
+    attributes: int = 8
+    utility_combos: int = 80
+    generator_combos: int = 200
+    cycles: int = 6
+    features_per_card: int = 2
+    needs_per_combo: int = 3
+    # share of the features of cards with attributes, and of the needed features matching some of them
+    attribute_share: float = 0.25
+    # share of the features of cards needing two copies of their card, and of the generator combos allowing them
+    multiple_copies_share: float = 0.1
+    seed: int = 0
+
+    def scaled(self, factor: float) -> 'CatalogParameters':
+        '''The same catalog shape with every count multiplied by the factor.'''
+        counts = ('cards', 'card_features', 'combo_features', 'results', 'utility_combos', 'generator_combos', 'cycles')
+        return replace(self, **{name: max(1, round(getattr(self, name) * factor)) for name in counts})
+
+    def as_dict(self) -> dict[str, object]:
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+@dataclass(frozen=True)
+class Catalog:
+    card_ids: list[int]
+    generator_combo_ids: list[int]
+    utility_combo_ids: list[int]
+
+
+def _combo(status: Combo.Status, allow_multiple_copies: bool = False) -> Combo:
+    return Combo(
+        mana_needed='',
+        is_mana_needed_an_accurate_minimum=True,
+        easy_prerequisites='Benchmark easy prerequisites',
+        notable_prerequisites='Benchmark notable prerequisites',
+        description='Benchmark description',
+        status=status,
+        allow_multiple_copies=allow_multiple_copies,
+    )
+
+
+@transaction.atomic
+def create_catalog(parameters: CatalogParameters) -> Catalog:
+    '''Creates the synthetic catalog described by the parameters in the database, the same one for the same parameters.'''
+    rng = random.Random(parameters.seed)
+    attributes = FeatureAttribute.objects.bulk_create([
+        FeatureAttribute(name=f'Benchmark attribute {index}') for index in range(parameters.attributes)
+    ])
+    card_features = Feature.objects.bulk_create([
+        Feature(name=f'benchmark card feature {index}', description='Benchmark feature', status=Feature.Status.HIDDEN_UTILITY)
+        for index in range(parameters.card_features)
+    ])
+    combo_features = Feature.objects.bulk_create([
+        Feature(name=f'benchmark combo feature {index}', description='Benchmark feature', status=Feature.Status.HIDDEN_UTILITY)
+        for index in range(parameters.combo_features)
+    ])
+    results = Feature.objects.bulk_create([
+        Feature(name=f'Benchmark result {index}', description='Benchmark feature', status=Feature.Status.STANDALONE)
+        for index in range(parameters.results)
+    ])
+    cards = Card.objects.bulk_create([
+        Card(name=f'Benchmark Card {index}', identity='W', legal_commander=True, spoiler=False, type_line='Benchmark Card')
+        for index in range(parameters.cards)
+    ])
+    features_of_cards = FeatureOfCard.objects.bulk_create([
+        FeatureOfCard(
+            card=card,
+            feature=feature,
+            zone_locations=ZoneLocation.BATTLEFIELD,
+            quantity=2 if rng.random() < parameters.multiple_copies_share else 1,
+        )
+        for card in cards
+        for feature in rng.sample(card_features, min(parameters.features_per_card, len(card_features)))
+    ])
+    FeatureOfCard.attributes.through.objects.bulk_create([
+        FeatureOfCard.attributes.through(featureofcard=feature_of_card, featureattribute=rng.choice(attributes))
+        for feature_of_card in features_of_cards
+        if attributes and rng.random() < parameters.attribute_share
+    ])
+    # Each utility combo produces a feature out of the features of cards and of the combo features before it,
+    # so that they make layers, and each cycle is a pair of combos producing each other's needed feature
+    utility_combos = Combo.objects.bulk_create([
+        _combo(Combo.Status.UTILITY) for _ in range(parameters.utility_combos + 2 * parameters.cycles)
+    ])
+    generator_combos = Combo.objects.bulk_create([
+        _combo(Combo.Status.GENERATOR, allow_multiple_copies=rng.random() < parameters.multiple_copies_share)
+        for _ in range(parameters.generator_combos)
+    ])
+    needed = list[FeatureNeededInCombo]()
+    produced = list[FeatureProducedInCombo]()
+    uses = list[CardInCombo]()
+    for index, combo in enumerate(utility_combos[:parameters.utility_combos]):
+        feature_index = index % len(combo_features)
+        # at most one of the combo features before it, for the same reason as the generator combos below
+        features = rng.sample(card_features, min(parameters.needs_per_combo - 1, len(card_features)))
+        if feature_index > 0 and rng.random() < 0.5:
+            features[-1] = rng.choice(combo_features[:feature_index])
+        for feature in features:
+            needed.append(FeatureNeededInCombo(combo=combo, feature=feature, quantity=1))
+        produced.append(FeatureProducedInCombo(combo=combo, feature=combo_features[feature_index]))
+    cycle_combos = utility_combos[parameters.utility_combos:]
+    for index in range(parameters.cycles):
+        first, second = rng.sample(combo_features, 2) if len(combo_features) > 1 else (combo_features[0], combo_features[0])
+        for combo, needs, produces in ((cycle_combos[2 * index], first, second), (cycle_combos[2 * index + 1], second, first)):
+            needed.append(FeatureNeededInCombo(combo=combo, feature=needs, quantity=1))
+            needed.append(FeatureNeededInCombo(combo=combo, feature=rng.choice(card_features), quantity=1))
+            produced.append(FeatureProducedInCombo(combo=combo, feature=produces))
+    for combo in generator_combos:
+        # at most one feature of the utility combos, whose many ways to be produced would otherwise multiply
+        # the variants of the combo beyond the limits of the generation
+        features = rng.sample(card_features, min(parameters.needs_per_combo, len(card_features)))
+        if combo_features and rng.random() < 0.5:
+            features[-1] = rng.choice(combo_features)
+        for feature in features:
+            needed.append(FeatureNeededInCombo(combo=combo, feature=feature, quantity=1))
+        if rng.random() < 0.5:
+            uses.append(CardInCombo(combo=combo, card=rng.choice(cards), order=1, zone_locations=ZoneLocation.BATTLEFIELD, quantity=1))
+        produced.append(FeatureProducedInCombo(combo=combo, feature=rng.choice(results)))
+    needed = FeatureNeededInCombo.objects.bulk_create(needed)
+    FeatureNeededInCombo.any_of_attributes.through.objects.bulk_create([
+        FeatureNeededInCombo.any_of_attributes.through(featureneededincombo=need, featureattribute=rng.choice(attributes))
+        for need in needed
+        if attributes and rng.random() < parameters.attribute_share / 2
+    ])
+    FeatureProducedInCombo.objects.bulk_create(produced)
+    CardInCombo.objects.bulk_create(uses)
+    return Catalog(
+        card_ids=[card.id for card in cards],
+        generator_combo_ids=[combo.id for combo in generator_combos],
+        utility_combo_ids=[combo.id for combo in utility_combos],
+    )
@@ -0,0 +1,48 @@
+from spellbook.models import Variant
+from spellbook.models.constants import DEFAULT_CARD_LIMIT, DEFAULT_VARIANT_LIMIT
+from spellbook.variants.combo_graph import Graph, GraphError
+from spellbook.variants.variant_data import Data
+from spellbook.variants.variant_set import VariantSet
+from spellbook.variants.variants_generator import generate_variants
+from .catalog import Catalog
+from .runner import Benchmark
+
+
+def _graph(data: Data) -> Graph:
+    return Graph(data, card_limit=DEFAULT_CARD_LIMIT, variant_limit=DEFAULT_VARIANT_LIMIT)
+
+
+def _combo_variants(graph: Graph, combo_ids: list[int]) -> list[VariantSet]:
+    variant_sets = list[VariantSet]()
+    for combo_id in combo_ids:
+        try:
+            variant_sets.append(graph.variants(combo_id))
+        except GraphError:
+            # a synthetic combo can exceed the limits as a real one can, and is then left out as generation would fail on it
+            pass
+    return variant_sets
+
+
+def _results(graph_and_variant_sets: tuple[Graph, list[VariantSet]]) -> None:
+    graph, variant_sets = graph_and_variant_sets
+    for variant_set in variant_sets:
+        graph.results(variant_set)
+
+
+def _graph_with_variants(data: Data, combo_ids: list[int]) -> tuple[Graph, list[VariantSet]]:
+    graph = _graph(data)
+    return graph, _combo_variants(graph, combo_ids)
+
+
+def macro_benchmarks(catalog: Catalog) -> list[Benchmark]:
+    '''The benchmarks of the graph and of a whole generation, on the catalog in the database.'''
+    data = Data()
+    combo_ids = [combo_id for combo_id in catalog.generator_combo_ids if combo_id in data.id_to_combo]
+    return [
+        Benchmark('macro.data.load', lambda _: Data()),
+        Benchmark('macro.graph.build', lambda _: _graph(data)),
+        Benchmark('macro.graph.variants', lambda graph: _combo_variants(graph, combo_ids), setup=lambda: _graph(data)),
+        Benchmark('macro.graph.results', _results, setup=lambda: _graph_with_variants(data, combo_ids)),
+        # each run starts without variants, so that every run creates all of them
+        Benchmark('macro.generate_variants', lambda _: generate_variants(), setup=lambda: Variant.objects.all().delete()),
+    ]
@@ -0,0 +1,63 @@
+import random
+from spellbook.variants.multiset import FrozenMultiset
+from spellbook.variants.packed_entry import PackedEntry
+from spellbook.variants.minimal_set_of_multisets import MinimalSetOfMultisets
+from spellbook.variants.columnar_minimal_set_of_multisets import ColumnarMinimalSetOfMultisets
+from spellbook.variants.variant_set import VariantSet, VariantSetParameters
+from .runner import Benchmark
+
+
+def _random_items(rng: random.Random, elements: int, size: int) -> list[tuple[int, int]]:
+    # mostly single copies, as most ingredients are, over cards (positive) and templates (negative)
+    chosen = rng.sample(range(1, elements + 1), size)
+    return [(element if rng.random() < 0.9 else -element, 1 if rng.random() < 0.9 else 2) for element in chosen]
+
+
+def _random_entries(rng: random.Random, count: int, elements: int, max_size: int) -> list[PackedEntry]:
+    return [PackedEntry.from_items(_random_items(rng, elements, rng.randint(1, max_size))) for _ in range(count)]
+
+
+def _pairwise(entries: list[PackedEntry], operation) -> None:
+    for left, right in zip(entries, reversed(entries)):
+        operation(left, right)
+
+
+def micro_benchmarks(scale: float = 1.0, seed: int = 0) -> list[Benchmark]:
+    '''The benchmarks of the building blocks of the variant sets, on random entries scaled by the factor.'''
+    rng = random.Random(seed)
+    entry_count = max(2, round(2000 * scale))
+    entries = _random_entries(rng, entry_count, elements=200, max_size=5)
+    small_entries = _random_entries(rng, entry_count, elements=60, max_size=3)
+    multisets = [FrozenMultiset(dict(entry.items())) for entry in entries]
+    items = [_random_items(rng, 200, rng.randint(1, 5)) for _ in range(entry_count)]
+    parameters = VariantSetParameters(max_depth=5, allow_multiple_copies=False)
+    set_size = max(2, round(150 * scale))
+    left = VariantSet(parameters=parameters, entries=small_entries[:set_size])
+    right = VariantSet(parameters=parameters, entries=small_entries[set_size:2 * set_size])
+    return [
+        Benchmark('micro.packed_entry.from_items', lambda _: [PackedEntry.from_items(entry_items) for entry_items in items]),
+        Benchmark('micro.packed_entry.union', lambda _: _pairwise(entries, PackedEntry.union)),
+        Benchmark('micro.packed_entry.combine', lambda _: _pairwise(entries, PackedEntry.combine)),
+        Benchmark('micro.packed_entry.issubset', lambda _: _pairwise(small_entries, PackedEntry.issubset)),
+        Benchmark('micro.packed_entry.hash', lambda _: {PackedEntry(entry._packed) for entry in entries}),
+        Benchmark('micro.minimal_set_of_multisets.extend', lambda _: MinimalSetOfMultisets(sets=small_entries)),
+        Benchmark(
+            'micro.minimal_set_of_multisets.union',
+            lambda sets: sets[0] | sets[1],
+            setup=lambda: (MinimalSetOfMultisets(sets=small_entries[:entry_count // 2]), MinimalSetOfMultisets(sets=small_entries[entry_count // 2:])),
+        ),
+        Benchmark('micro.columnar_minimal_set_of_multisets.extend', lambda _: ColumnarMinimalSetOfMultisets(sets=small_entries)),
+        Benchmark(
+            'micro.columnar_minimal_set_of_multisets.union',
+            lambda sets: sets[0] | sets[1],
+            setup=lambda: (ColumnarMinimalSetOfMultisets(sets=small_entries[:entry_count // 2]), ColumnarMinimalSetOfMultisets(sets=small_entries[entry_count // 2:])),
+        ),
+        Benchmark('micro.variant_set.or', lambda _: left | right),
+        Benchmark('micro.variant_set.and', lambda _: left & right),
+        Benchmark('micro.variant_set.add', lambda _: left + right),
+        Benchmark('micro.variant_set.product_sets', lambda _: VariantSet.product_sets([left, right], parameters=parameters)),
+        Benchmark('micro.multiset.union', lambda _: _pairwise(multisets, FrozenMultiset.union)),
+        Benchmark('micro.multiset.combine', lambda _: _pairwise(multisets, FrozenMultiset.combine)),
+        Benchmark('micro.multiset.issubset', lambda _: _pairwise(multisets, FrozenMultiset.issubset)),
+        Benchmark('micro.multiset.hash', lambda _: {FrozenMultiset(multiset) for multiset in multisets}),
+    ]
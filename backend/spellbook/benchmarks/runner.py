@@ -0,0 +1,90 @@
+import gc
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+# Bump this version whenever the layout of the results changes, so that old baselines are not compared against
+RESULTS_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    '''
+    A measured piece of work: `run` is timed on whatever `setup` returns, which is called again before each run and
+    is not timed, so that a run can consume or modify it.
+    '''
+    name: str
+    run: Callable[[Any], object]
+    setup: Callable[[], Any] = lambda: None
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    name: str
+    seconds: list[float]
+
+    @property
+    def best(self) -> float:
+        return min(self.seconds)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.seconds)
+
+    def as_dict(self) -> dict[str, object]:
+        return {'best': self.best, 'median': self.median, 'runs': self.seconds}
+
+
+@dataclass(frozen=True)
+class Regression:
+    build: str
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def slowdown(self) -> float:
+        return self.current / self.baseline - 1
+
+    def __str__(self) -> str:
+        return f'{self.name} ({self.build}) went from {self.baseline:.6f}s to {self.current:.6f}s, {self.slowdown:+.1%}'
+
+
+def run_benchmarks(benchmarks: Iterable[Benchmark], repeat: int, log: Callable[[str], None] = lambda _: None) -> list[BenchmarkResult]:
+    '''Runs each benchmark `repeat` times, with the garbage collector held back while timing, as `timeit` does.'''
+    results = list[BenchmarkResult]()
+    for benchmark in benchmarks:
+        seconds = list[float]()
+        for _ in range(repeat):
+            argument = benchmark.setup()
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                benchmark.run(argument)
+                seconds.append(time.perf_counter() - start)
+            finally:
+                gc.enable()
+            del argument
+        result = BenchmarkResult(name=benchmark.name, seconds=seconds)
+        log(f'{benchmark.name}: best {result.best:.6f}s, median {result.median:.6f}s')
+        results.append(result)
+    return results
+
+
+def compare_results(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[Regression]:
+    '''
+    Lists the benchmarks whose best time grew by more than the tolerance since the baseline, among the ones both
+    documents measured for the same build. Best times are compared as they are the least affected by noise.
+    '''
+    if baseline.get('version') != RESULTS_VERSION:
+        raise ValueError(f'The baseline has version {baseline.get('version')!r} instead of {RESULTS_VERSION}')
+    regressions = list[Regression]()
+    for build, document in current['builds'].items():
+        baseline_results = baseline['builds'].get(build, {}).get('results', {})
+        for name, result in document['results'].items():
+            reference = baseline_results.get(name)
+            if reference is not None and result['best'] > reference['best'] * (1 + tolerance):
+                regressions.append(Regression(build=build, name=name, baseline=reference['best'], current=result['best']))
+    return regressions
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.7 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spellbook', '0071_combo_variant_count_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VariantGenerationProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.CharField(help_text='Identifier of the generation job', max_length=255)),
+                ('report', models.JSONField(help_text='Phases and costliest combos of the generation')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'variant generation profile',
+                'verbose_name_plural': 'variant generation profiles',
+                'ordering': ['-created', '-id'],
+                'default_manager_name': 'objects',
+            },
+        ),
+    ]
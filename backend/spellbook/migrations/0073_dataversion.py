@@ -0,0 +1,28 @@
+# Generated by Django 6.0.7 on 2026-10-17 14:36
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spellbook', '0072_variantgenerationprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(help_text='Kind of data this version stamps', max_length=32, unique=True)),
+                ('version', models.UUIDField(default=uuid.uuid4, help_text='Random stamp replaced on every change of the data')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'data version',
+                'verbose_name_plural': 'data versions',
+                'default_manager_name': 'objects',
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.7 on 2026-10-17 16:02
+
+import django.contrib.postgres.indexes
+import spellbook.models.fields
+from django.db import migrations, connection
+from ._utils import populate_variant_ingredient_ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spellbook', '0073_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='variant',
+            name='card_ids',
+            field=spellbook.models.fields.IdArrayField(default=list, editable=False, help_text='Sorted ids of the cards used by this variant'),
+        ),
+        migrations.AddField(
+            model_name='variant',
+            name='commander_card_ids',
+            field=spellbook.models.fields.IdArrayField(default=list, editable=False, help_text='Sorted ids of the cards this variant needs as commanders'),
+        ),
+        migrations.AddField(
+            model_name='variant',
+            name='template_ids',
+            field=spellbook.models.fields.IdArrayField(default=list, editable=False, help_text='Sorted ids of the templates required by this variant'),
+        ),
+        migrations.RunPython(populate_variant_ingredient_ids, migrations.RunPython.noop),
+    ] + ([
+        migrations.AddIndex(
+            model_name='variant',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['card_ids'], name='variant_card_ids_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='variant',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['template_ids'], name='variant_template_ids_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='variant',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['commander_card_ids'], name='variant_commander_ids_idx'),
+        ),
+    ] if connection.vendor == 'postgresql' else [])
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.7 on 2026-10-17 18:20
+
+from django.db import migrations, models
+from ._utils import move_combo_costs_to_their_model
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spellbook', '0074_variant_ingredient_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VariantGenerationComboCost',
+            fields=[
+                ('combo_id', models.IntegerField(help_text='Id of the generator combo', primary_key=True, serialize=False)),
+                ('seconds', models.FloatField(help_text='Seconds the graph phase spent on the combo')),
+                ('variant_count', models.PositiveIntegerField(help_text='Number of variants the combo generated')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'variant generation combo cost',
+                'verbose_name_plural': 'variant generation combo costs',
+                'default_manager_name': 'objects',
+            },
+        ),
+        migrations.RunPython(move_combo_costs_to_their_model, migrations.RunPython.noop),
+    ]
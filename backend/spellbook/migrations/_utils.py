@@ -195,3 +195,43 @@ def used_face_from_card_states(apps, schema_editor) -> None:
         print(f'{len(problems)} rows were left untouched, for an editor to fix by hand:')
         for problem in problems:
             print(f'  {problem}')
+
+
+def populate_variant_ingredient_ids(apps, schema_editor) -> None:
+    '''Fills the id arrays of the existing variants from their ingredient rows, which is what updating
+    each variant would write, without loading the cards and templates a full update needs.'''
+    Variant = apps.get_model('spellbook', 'Variant')
+    CardInVariant = apps.get_model('spellbook', 'CardInVariant')
+    TemplateInVariant = apps.get_model('spellbook', 'TemplateInVariant')
+    card_ids = defaultdict[str, list[int]](list)
+    commander_card_ids = defaultdict[str, list[int]](list)
+    for variant_id, card_id, must_be_commander in CardInVariant.objects.values_list('variant_id', 'card_id', 'must_be_commander').order_by('card_id').iterator(chunk_size=DEFAULT_BATCH_SIZE):
+        card_ids[variant_id].append(card_id)
+        if must_be_commander:
+            commander_card_ids[variant_id].append(card_id)
+    template_ids = defaultdict[str, list[int]](list)
+    for variant_id, template_id in TemplateInVariant.objects.values_list('variant_id', 'template_id').order_by('template_id').iterator(chunk_size=DEFAULT_BATCH_SIZE):
+        template_ids[variant_id].append(template_id)
+    variants = list(Variant.objects.only('id'))
+    for variant in variants:
+        variant.card_ids = card_ids[variant.id]
+        variant.template_ids = template_ids[variant.id]
+        variant.commander_card_ids = commander_card_ids[variant.id]
+    Variant.objects.bulk_update(variants, ['card_ids', 'template_ids', 'commander_card_ids'], batch_size=DEFAULT_BATCH_SIZE)
+
+
+def move_combo_costs_to_their_model(apps, schema_editor) -> None:
+    '''Moves the combo costs stored as a row of the fingerprints table into their own table.'''
+    VariantGenerationFingerprints = apps.get_model('spellbook', 'VariantGenerationFingerprints')
+    VariantGenerationComboCost = apps.get_model('spellbook', 'VariantGenerationComboCost')
+    row = VariantGenerationFingerprints.objects.filter(kind='cost').first()
+    if row is None:
+        return
+    VariantGenerationComboCost.objects.bulk_create(
+        [
+            VariantGenerationComboCost(combo_id=int(combo_id), seconds=seconds, variant_count=variant_count)
+            for combo_id, (seconds, variant_count) in row.fingerprints.items()
+        ],
+        batch_size=DEFAULT_BATCH_SIZE,
+    )
+    row.delete()
@@ -11,7 +11,8 @@ from .suggestion import Suggestion
 from .variant_suggestion import VariantSuggestion, CardUsedInVariantSuggestion, TemplateRequiredInVariantSuggestion, FeatureProducedInVariantSuggestion
 from .variant_update_suggestion import VariantUpdateSuggestion, VariantInVariantUpdateSuggestion
 from .variant_alias import VariantAlias
-from .generation_state import VariantGenerationFingerprints
+from .generation_state import VariantGenerationFingerprints, VariantGenerationComboCost, VariantGenerationProfile
+from .data_version import DataVersion
 from .utils import id_from_cards_and_templates_ids, merge_color_identities, recipe, CardType, merge_mana_costs, join_with_conjunction, DEFAULT_BATCH_SIZE
 from .mixins import PreSerializedSerializer
 from .references import replace_feature_references, replace_attribute_references
@@ -1,7 +1,7 @@
 from functools import cached_property
 from django.db import models
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from .constants import MAX_CARD_NAME_LENGTH, MAX_MANA_NEEDED_LENGTH
@@ -14,6 +14,7 @@ from .feature import Feature
 from .fields import KeywordsField
 from .ingredient import Ingredient
 from .feature_attribute import WithFeatureAttributes
+from .data_version import DataVersion
 
 
 class LayoutRotation(models.TextChoices):
@@ -189,6 +190,11 @@ def update_variant_fields(sender, instance: Card, created, raw, **kwargs):
     update_variants(uses=instance)
 
 
+@receiver([post_save, post_delete], sender=Card, dispatch_uid='card_data_version')
+def bump_card_data_version(sender, instance: Card, **kwargs):
+    DataVersion.bump(DataVersion.CARDS, DataVersion.CATALOG)
+
+
 @receiver(post_save, sender=Card, dispatch_uid='update_combo_fields')
 def update_combo_fields(sender, instance: Card, created, raw, **kwargs):
     # the name of a combo is the only thing a card contributes to it
@@ -248,3 +254,14 @@ class FeatureOfCard(Ingredient, WithFeatureAttributes, WithUsedFace):
 
     def __str__(self):
         return f'{self.feature} for card {self.card_id}'
+
+
+@receiver([post_save, post_delete], sender=FeatureOfCard, dispatch_uid='feature_of_card_reference_data_version')
+def bump_reference_data_version(sender, instance: FeatureOfCard, **kwargs):
+    DataVersion.bump(DataVersion.REFERENCE)
+
+
+@receiver(m2m_changed, sender=FeatureOfCard.attributes.through, dispatch_uid='feature_of_card_attributes_reference_data_version')
+def bump_reference_data_version_of_attributes(sender, instance: FeatureOfCard, action: str, **kwargs):
+    if action.startswith('post_'):
+        DataVersion.bump(DataVersion.REFERENCE)
@@ -12,6 +12,7 @@ from .utils import case_insensitive_trigram_indexes
 from .validators import MANA_VALIDATOR, TEXT_VALIDATORS
 from .constants import HIGHER_CARD_LIMIT, DEFAULT_CARD_LIMIT, LOWER_VARIANT_LIMIT, DEFAULT_VARIANT_LIMIT, MAX_MANA_NEEDED_LENGTH
 from .feature_attribute import WithFeatureAttributes, WithFeatureAttributesMatcher
+from .data_version import DataVersion
 
 
 class RecipePrefetchedManager(models.Manager):
@@ -248,3 +249,22 @@ def recipe_changed_2(sender, instance: CardInCombo | TemplateInCombo | FeatureNe
         return
     if instance.combo.update_recipe_from_data():
         instance.combo.save(update_fields=Recipe.recipe_fields())
+
+
+@receiver([post_save, post_delete], sender=Combo, dispatch_uid='combo_reference_data_version')
+@receiver([post_save, post_delete], sender=Combo.uses.through, dispatch_uid='combo_uses_reference_data_version')
+@receiver([post_save, post_delete], sender=Combo.requires.through, dispatch_uid='combo_templates_reference_data_version')
+@receiver([post_save, post_delete], sender=Combo.needs.through, dispatch_uid='combo_needs_reference_data_version')
+@receiver([post_save, post_delete], sender=Combo.produces.through, dispatch_uid='combo_produces_reference_data_version')
+@receiver([post_save, post_delete], sender=Combo.removes.through, dispatch_uid='combo_removes_reference_data_version')
+def bump_reference_data_version(sender, instance: Combo | CardInCombo | TemplateInCombo | FeatureNeededInCombo | FeatureProducedInCombo | FeatureRemovedInCombo, **kwargs):
+    DataVersion.bump(DataVersion.REFERENCE)
+
+
+@receiver(m2m_changed, sender=FeatureNeededInCombo.any_of_attributes.through, dispatch_uid='combo_needs_any_of_reference_data_version')
+@receiver(m2m_changed, sender=FeatureNeededInCombo.all_of_attributes.through, dispatch_uid='combo_needs_all_of_reference_data_version')
+@receiver(m2m_changed, sender=FeatureNeededInCombo.none_of_attributes.through, dispatch_uid='combo_needs_none_of_reference_data_version')
+@receiver(m2m_changed, sender=FeatureProducedInCombo.attributes.through, dispatch_uid='combo_produces_attributes_reference_data_version')
+def bump_reference_data_version_of_attributes(sender, instance: FeatureNeededInCombo | FeatureProducedInCombo, action: str, **kwargs):
+    if action.startswith('post_'):
+        DataVersion.bump(DataVersion.REFERENCE)
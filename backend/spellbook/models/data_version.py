@@ -0,0 +1,51 @@
+import uuid
+from datetime import datetime
+from django.db import models
+
+
+class DataVersion(models.Model):
+    '''
+    Stamps the current version of some kind of data, which changes whenever that data does.
+    Processes keeping something derived from the data in memory compare its stamp with the one they built it from,
+    which costs one lookup by key instead of loading the data again.
+    The stamp is random rather than a counter, so that a rolled back change never brings back a stamp already used.
+    '''
+    CARDS = 'cards'
+    VARIANTS = 'variants'
+    # anything the read API shows: variants and their serialized form, cards, templates, features and aliases
+    CATALOG = 'catalog'
+    # what variants are generated from, cards aside: features and their attributes, templates, combos and their ingredients
+    REFERENCE = 'reference'
+
+    id: int
+    kind = models.CharField(max_length=32, unique=True, blank=False, help_text='Kind of data this version stamps')
+    version = models.UUIDField(default=uuid.uuid4, help_text='Random stamp replaced on every change of the data')
+    updated = models.DateTimeField(auto_now=True, editable=False)
+
+    class Meta:
+        verbose_name = 'data version'
+        verbose_name_plural = 'data versions'
+        default_manager_name = 'objects'
+
+    def __str__(self):
+        return f'Version of {self.kind}'
+
+    @classmethod
+    def bump(cls, *kinds: str) -> None:
+        '''Replaces the stamps of the given kinds of data in a single upsert, whatever their number.'''
+        cls.objects.bulk_create(
+            [cls(kind=kind, version=uuid.uuid4()) for kind in kinds],
+            update_conflicts=True,
+            unique_fields=['kind'],
+            update_fields=['version', 'updated'],
+        )
+
+    @classmethod
+    def current(cls, kind: str) -> uuid.UUID | None:
+        '''The stamp of the data, None until it first changes.'''
+        return cls.objects.filter(kind=kind).values_list('version', flat=True).first()
+
+    @classmethod
+    def stamp(cls, kind: str) -> tuple[uuid.UUID, datetime] | None:
+        '''The stamp of the data with the time it was replaced, None until the data first changes.'''
+        return cls.objects.filter(kind=kind).values_list('version', 'updated').first()
@@ -1,11 +1,12 @@
 from django.db import models
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.db.models.functions import Lower
 from .constants import MAX_FEATURE_NAME_LENGTH
 from .mixins import NamedModel
 from .utils import case_insensitive_trigram_indexes
 from .validators import NAME_VALIDATORS
+from .data_version import DataVersion
 
 
 class Feature(NamedModel):
@@ -54,3 +55,8 @@ def update_feature_references(sender, instance: Feature, created, raw, **kwargs)
         return
     from .references import replace_feature_references
     replace_feature_references(instance, instance.renamed_from)
+
+
+@receiver([post_save, post_delete], sender=Feature, dispatch_uid='feature_catalog_data_version')
+def bump_catalog_data_version(sender, instance: Feature, **kwargs):
+    DataVersion.bump(DataVersion.CATALOG, DataVersion.REFERENCE)
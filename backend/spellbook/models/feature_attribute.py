@@ -1,7 +1,8 @@
 from django.db import models
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from .feature import Feature
+from .data_version import DataVersion
 from .constants import MAX_FEATURE_NAME_LENGTH
 from .mixins import NamedModel
 from .validators import NO_RESERVED_CHARACTERS_VALIDATOR
@@ -28,6 +29,11 @@ def update_feature_attribute_references(sender, instance: FeatureAttribute, crea
     replace_attribute_references(instance, instance.renamed_from)
 
 
+@receiver([post_save, post_delete], sender=FeatureAttribute, dispatch_uid='feature_attribute_reference_data_version')
+def bump_reference_data_version(sender, instance: FeatureAttribute, **kwargs):
+    DataVersion.bump(DataVersion.REFERENCE)
+
+
 class WithFeatureAttributes(models.Model):
     feature = models.ForeignKey(to=Feature, on_delete=models.CASCADE)
     feature_id: int
@@ -1,6 +1,8 @@
+import json
 from django.core.validators import EMPTY_VALUES
 from django.core.exceptions import ValidationError
-from django.db.models import JSONField
+from django.db.models import Field, JSONField, Subquery
+from django.db.models.lookups import PostgresOperatorLookup
 from django.forms import JSONField as JSONFormField, Widget
 
 
@@ -48,3 +50,72 @@ class KeywordsField(JSONField):
                 **kwargs,
             }
         )
+
+
+class IdArrayField(Field):
+    '''
+    A list of ids of related rows, copied on the row so that conditions on them need no join.
+    PostgreSQL stores it as a bigint array, searched by a GIN index through the array operators below.
+    Other databases store it as a JSON list, which only Python reads.
+    Written without the array field of `django.contrib.postgres`, whose import needs psycopg.
+    '''
+    description = 'List of ids'
+    empty_strings_allowed = False
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', list)
+        super().__init__(*args, **kwargs)
+
+    def db_type(self, connection):
+        return 'bigint[]' if connection.vendor == 'postgresql' else 'text'
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value is None or connection.vendor == 'postgresql':
+            return value
+        return json.dumps(value)
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    def to_python(self, value):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj))
+
+
+class IdArrayLookup(PostgresOperatorLookup):
+    def process_rhs(self, compiler, connection):
+        rhs, params = super().process_rhs(compiler, connection)
+        return f'{rhs}::bigint[]', params
+
+
+@IdArrayField.register_lookup
+class IdArrayContains(IdArrayLookup):
+    lookup_name = 'contains'
+    postgres_operator = '@>'
+
+
+@IdArrayField.register_lookup
+class IdArrayContainedBy(IdArrayLookup):
+    lookup_name = 'contained_by'
+    postgres_operator = '<@'
+
+
+@IdArrayField.register_lookup
+class IdArrayOverlap(IdArrayLookup):
+    lookup_name = 'overlap'
+    postgres_operator = '&&'
+
+
+class IdArraySubquery(Subquery):
+    '''The ids selected by a subquery of one column, as an array to compare an `IdArrayField` against.'''
+    template = 'ARRAY(%(subquery)s)'
+
+    def __init__(self, queryset, **kwargs):
+        super().__init__(queryset, output_field=IdArrayField(), **kwargs)
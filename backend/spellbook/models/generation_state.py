@@ -20,3 +20,45 @@ class VariantGenerationFingerprints(models.Model):
 
     def __str__(self):
         return f'Fingerprints for {self.kind}'
+
+
+class VariantGenerationComboCost(models.Model):
+    '''
+    Stores what computing the variants of a generator combo took in the graph phase
+    of the last full or incremental generation that measured it.
+    Used to schedule the costliest combos first in the next generations.
+    There is one row per generator combo, dropped when the combo is not a generator anymore.
+    '''
+    combo_id = models.IntegerField(primary_key=True, help_text='Id of the generator combo')
+    seconds = models.FloatField(help_text='Seconds the graph phase spent on the combo')
+    variant_count = models.PositiveIntegerField(help_text='Number of variants the combo generated')
+    updated = models.DateTimeField(auto_now=True, editable=False)
+
+    class Meta:
+        verbose_name = 'variant generation combo cost'
+        verbose_name_plural = 'variant generation combo costs'
+        default_manager_name = 'objects'
+
+    def __str__(self):
+        return f'Cost of combo {self.combo_id}'
+
+
+class VariantGenerationProfile(models.Model):
+    '''
+    Stores the profile of a variant generation run: the wall time and memory peaks of each of its phases,
+    and what its costliest generator combos took in the graph phase.
+    Only the latest runs are kept, to compare them with each other.
+    '''
+    id: int
+    job = models.CharField(max_length=255, blank=False, help_text='Identifier of the generation job')
+    report = models.JSONField(help_text='Phases and costliest combos of the generation')
+    created = models.DateTimeField(auto_now_add=True, editable=False)
+
+    class Meta:
+        verbose_name = 'variant generation profile'
+        verbose_name_plural = 'variant generation profiles'
+        default_manager_name = 'objects'
+        ordering = ['-created', '-id']
+
+    def __str__(self):
+        return f'Profile of {self.job}'
@@ -2,6 +2,7 @@ from functools import cache
 from django.db import models
 from .constants import MAX_CARD_NAME_LENGTH, MAX_FEATURE_NAME_LENGTH
 from .utils import recipe, DEFAULT_BATCH_SIZE
+from .data_version import DataVersion
 
 
 class Recipe(models.Model):
@@ -132,6 +133,7 @@ def update_combo_names(**ingredient_filter) -> None:
     '''Recomputes the names of the combos using the ingredient matched by the filter, the only thing they derive from it.'''
     from .combo import Combo
     combo_ids = list(Combo.objects.filter(**ingredient_filter).order_by().values_list('pk', flat=True))
+    renamed = False
     for i in range(0, len(combo_ids), DEFAULT_BATCH_SIZE):
         combos_to_save = []
         # only the name is read and written, the rest of the recipe comes from the prefetched rows
@@ -142,3 +144,7 @@ def update_combo_names(**ingredient_filter) -> None:
                 combo.name = new_combo_name
                 combos_to_save.append(combo)
         Combo.objects.bulk_update(combos_to_save, fields=['name'], batch_size=DEFAULT_BATCH_SIZE)
+        renamed = renamed or bool(combos_to_save)
+    if renamed:
+        # bulk updates send no signals, and the snapshot of the reference data holds the combo names
+        DataVersion.bump(DataVersion.REFERENCE)
@@ -1,12 +1,13 @@
 from urllib.parse import urlencode
 from django.db import models
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.utils.html import format_html
 from spellbook.models import Card
 from .mixins import NamedModel
 from .utils import case_insensitive_trigram_indexes
 from .recipe import update_variants, update_combo_names
+from .data_version import DataVersion
 from .validators import SCRYFALL_QUERY_HELP, SCRYFALL_QUERY_VALIDATOR, NAME_VALIDATORS
 from .scryfall import scryfall_query_legal_in_commander, SCRYFALL_API_CARD_SEARCH, SCRYFALL_WEBSITE_CARD_SEARCH, SCRYFALL_MAX_QUERY_LENGTH
 
@@ -75,6 +76,11 @@ def update_combo_fields(sender, instance: Template, created, raw, **kwargs):
     update_combo_names(requires=instance)
 
 
+@receiver([post_save, post_delete], sender=Template, dispatch_uid='template_catalog_data_version')
+def bump_catalog_data_version(sender, instance: Template, **kwargs):
+    DataVersion.bump(DataVersion.CATALOG, DataVersion.REFERENCE)
+
+
 class TemplateReplacement(models.Model):
     id: int
     card = models.ForeignKey(to=Card, on_delete=models.CASCADE)
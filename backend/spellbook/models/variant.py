@@ -4,6 +4,7 @@ from functools import cache
 from itertools import chain
 from typing import Iterable, Sequence
 from django.db import models, connection
+from django.contrib.postgres.indexes import GinIndex
 from django.dispatch import receiver
 from django.db.models.signals import post_save, pre_delete
 from django.utils.html import format_html
@@ -17,6 +18,8 @@ from .template import Template
 from .feature import Feature
 from .ingredient import OrderedIngredient, ZoneLocation
 from .combo import Combo
+from .data_version import DataVersion
+from .fields import IdArrayField
 from .validators import TEXT_VALIDATORS, MANA_VALIDATOR
 from .utils import CardType, mana_value, merge_color_identities, case_insensitive_trigram_indexes
 from .constants import MAX_MANA_NEEDED_LENGTH
@@ -172,6 +175,9 @@ class Variant(Recipe, Playable, PreSaveSerializedModelMixin, ScryfallLinkMixin):
     variant_count = models.PositiveIntegerField(editable=False, default=0, help_text='Number of variants generated by the same generator combos')
     hulkline = models.BooleanField(editable=False, default=False, help_text='Whether the variant is a Protean Hulk line')
     bracket_tag = models.CharField(choices=BracketTag.choices, default=BracketTag.RUTHLESS, max_length=2, blank=False, editable=False, help_text='Bracket tag for this variant')
+    card_ids = IdArrayField(editable=False, help_text='Sorted ids of the cards used by this variant')
+    template_ids = IdArrayField(editable=False, help_text='Sorted ids of the templates required by this variant')
+    commander_card_ids = IdArrayField(editable=False, help_text='Sorted ids of the cards this variant needs as commanders')
     bracket = models.GeneratedField(
         db_persist=True,
         expression=models.Case(
@@ -198,6 +204,9 @@ class Variant(Recipe, Playable, PreSaveSerializedModelMixin, ScryfallLinkMixin):
             'mana_value_needed',
             'description_line_count',
             'prerequisites_line_count',
+            'card_ids',
+            'template_ids',
+            'commander_card_ids',
         ]
 
     class Meta:
@@ -237,6 +246,10 @@ class Variant(Recipe, Playable, PreSaveSerializedModelMixin, ScryfallLinkMixin):
             models.Index(*('variant_count',) + DEFAULT_VIEW_ORDERING, name='variant_vc_view_ordering_idx'),
             models.Index(*('card_count',) + DEFAULT_VIEW_ORDERING, name='variant_cc_view_ordering_idx'),
             models.Index(*('result_count',) + DEFAULT_VIEW_ORDERING, name='variant_rc_view_ordering_idx'),
+            # The ingredient ids are searched with the array operators, which only a GIN index serves
+            GinIndex(fields=['card_ids'], name='variant_card_ids_idx'),
+            GinIndex(fields=['template_ids'], name='variant_template_ids_idx'),
+            GinIndex(fields=['commander_card_ids'], name='variant_commander_ids_idx'),
         ] if connection.vendor == 'postgresql' else []) + case_insensitive_trigram_indexes(
             'variant',
             'description',
@@ -300,6 +313,9 @@ class Variant(Recipe, Playable, PreSaveSerializedModelMixin, ScryfallLinkMixin):
         requires_commander = any(civ.must_be_commander for civ, _ in recipe.cards) or any(tiv.must_be_commander for tiv, _ in recipe.templates)
         self.update_playable_fields((card for _, card in recipe.cards), requires_commander=requires_commander)
         self.mana_value_needed = mana_value(self.mana_needed)
+        self.card_ids = sorted(civ.card_id for civ, _ in recipe.cards)
+        self.template_ids = sorted(tiv.template_id for tiv, _ in recipe.templates)
+        self.commander_card_ids = sorted(civ.card_id for civ, _ in recipe.cards if civ.must_be_commander)
         battlefield_mana_value = sum(card.mana_value for civ, card in recipe.cards if ZoneLocation.BATTLEFIELD in civ.zone_locations)
         self.hulkline = \
             battlefield_mana_value <= 6 \
@@ -465,9 +481,23 @@ def update_variant_on_ingredient(sender, instance: CardInVariant | TemplateInVar
         variant.save(update_fields=Variant.computed_fields())
 
 
+@receiver(post_save, sender=Variant.uses.through, dispatch_uid='variant_cards_data_version')
+@receiver(post_save, sender=Variant.requires.through, dispatch_uid='variant_templates_data_version')
+def bump_variant_data_version(sender, instance: CardInVariant | TemplateInVariant, **kwargs):
+    # no receiver on deletes, which would keep the ingredients of deleted variants from being deleted in bulk:
+    # the generation deleting them bumps the version itself
+    DataVersion.bump(DataVersion.VARIANTS, DataVersion.CATALOG)
+
+
+@receiver(post_save, sender=Variant, dispatch_uid='variant_catalog_data_version')
+def bump_catalog_data_version(sender, instance: Variant, **kwargs):
+    # variants cannot be deleted one by one, and the generation deleting them bumps the version itself
+    DataVersion.bump(DataVersion.CATALOG)
+
+
 @receiver(pre_delete, sender=Combo, dispatch_uid='combo_deleted')
 def combo_delete(sender, instance: Combo, **kwargs):
-    Variant.objects.alias(
+    updated = Variant.objects.alias(
         of_count=models.Count('of', distinct=True),
     ).filter(
         of_count=1,
@@ -475,6 +505,9 @@ def combo_delete(sender, instance: Combo, **kwargs):
     ).update(
         status=Variant.Status.RESTORE,
     )
+    if updated:
+        # updated in bulk, sending no signal to bump the catalog version
+        DataVersion.bump(DataVersion.CATALOG)
 
 
 @dataclass(frozen=True)
@@ -1,6 +1,9 @@
 from django.db import models
+from django.dispatch import receiver
+from django.db.models.signals import post_save
 from django.core.exceptions import ValidationError
 from .variant import Variant
+from .data_version import DataVersion
 from .utils import recipe
 
 
@@ -26,3 +29,9 @@ class VariantAlias(models.Model):
         if self.variant_id:
             return f'Variant alias: {recipe([self.id], [self.variant_id])}'
         return f'Variant alias (dangling): {self.id}'
+
+
+@receiver(post_save, sender=VariantAlias, dispatch_uid='variant_alias_catalog_data_version')
+def bump_catalog_data_version(sender, instance: VariantAlias, **kwargs):
+    # no receiver on deletes, which would keep the generation from deleting aliases in bulk: it bumps the version itself
+    DataVersion.bump(DataVersion.CATALOG)
@@ -3,4 +3,4 @@ from .export_variants import export_variants_task, DEFAULT_VARIANTS_FILE_NAME
 from .update_cards import update_cards_task
 from .update_variants import update_variants_task
 from .notify import notify_task, EventNotification
-from .generate_variants import generate_variants_task
+from .generate_variants import generate_variants_task, generate_variants_shard_task
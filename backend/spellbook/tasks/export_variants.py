@@ -14,7 +14,7 @@ from django.db.models import Model, QuerySet
 from django_tasks import TaskContext
 from djangorestframework_camel_case.util import camelize
 from multiprocessing_utils import fork_pool, parallelism_is_available, resolve_workers, split_into_chunks
-from spellbook.models import Variant, VariantAlias, DEFAULT_BATCH_SIZE
+from spellbook.models import DataVersion, Variant, VariantAlias, DEFAULT_BATCH_SIZE
 from spellbook.serializers import VariantSerializer, VariantAliasSerializer
 from spellbook.views.variants import VariantViewSet
 from spellbook.views.variant_aliases import VariantAliasViewSet
@@ -240,6 +240,8 @@ def export_variants(
     variants = map_chunks(export_variants_chunk, public_ids, workers, report)
     logger.info(f'Fetching {len(aliases_ids)} variant aliases from db...')
     aliases = map_chunks(export_variant_aliases_chunk, aliases_ids, workers, report)
+    # the lists of variants are served from the serialized representations just refreshed
+    DataVersion.bump(DataVersion.CATALOG)
     progress(SERIALIZATION_PROGRESS_SHARE)
     logger.info('Exporting variants...')
     parts = build_document(variants, aliases)
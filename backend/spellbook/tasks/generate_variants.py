@@ -1,5 +1,6 @@
 import logging
-from django.tasks import task
+import time
+from django.tasks import task, TaskResultStatus
 from django_tasks import TaskContext
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.admin.models import LogEntry, ADDITION
@@ -8,11 +9,19 @@ from django.db.models.functions import Coalesce
 from spellbook.models import Variant
 from spellbook.models.combo import Combo
 from .utils import task_result_identifier
-from spellbook.variants.variants_generator import generate_variants
+from spellbook.variants.generation_tracking import ComboCost
+from spellbook.variants.variants_generator import compute_variants_shard, generate_variants
 
 
 logger = logging.getLogger(__name__)
 
+# How long a generation job waits before checking again on the shards of its graph phase
+SHARD_POLL_SECONDS = 2.0
+
+# How long a generation job waits in total for the shards of its graph phase, before computing the combos
+# of the ones still unfinished itself, as it does for the ones that failed
+SHARD_TIMEOUT_SECONDS = 60 * 60.0
+
 
 def update_combo_variant_counts() -> int:
     '''Refreshes Combo.variant_count with how many variants each combo generates.
@@ -37,6 +46,40 @@ def update_combo_variant_counts() -> int:
     )
 
 
+@task()
+def generate_variants_shard_task(key: str, digest: str, combo_ids: list[int]) -> dict[str, list[float | int]]:
+    costs = compute_variants_shard(key, digest, combo_ids, log=logger.info, log_error=logger.error)
+    # the result of a task is stored as JSON
+    return {str(id): [cost.seconds, cost.variant_count, cost.largest_set, cost.join_pairs] for id, cost in costs.items()}
+
+
+def run_variants_shards(key: str, digest: str, shards: list[list[int]]) -> list[dict[int, ComboCost] | None]:
+    '''Enqueues a task for each shard of the graph phase of a generation job, waiting for all of them to finish.
+
+    The shards are picked up by whichever workers are free, so a job waiting for them needs other workers
+    than the one running it. A shard not finished within `SHARD_TIMEOUT_SECONDS`, because no worker picked
+    it up or the one running it was lost, is reported as failed.
+    '''
+    results = [generate_variants_shard_task.enqueue(key=key, digest=digest, combo_ids=combo_ids) for combo_ids in shards]
+    deadline = time.monotonic() + SHARD_TIMEOUT_SECONDS
+    while not all(result.is_finished for result in results) and time.monotonic() < deadline:
+        time.sleep(SHARD_POLL_SECONDS)
+        for result in results:
+            if not result.is_finished:
+                result.refresh()
+    costs = list[dict[int, ComboCost] | None]()
+    for result in results:
+        if result.status == TaskResultStatus.SUCCESSFUL:
+            costs.append({int(id): ComboCost(*cost) for id, cost in result.return_value.items()})
+        elif not result.is_finished:
+            logger.error(f'Shard task {result.id} of generation {key} did not finish within {SHARD_TIMEOUT_SECONDS:.0f} seconds')
+            costs.append(None)
+        else:
+            logger.error(f'Shard task {result.id} of generation {key} ended as {result.status}')
+            costs.append(None)
+    return costs
+
+
 @task(takes_context=True)  # type: ignore[arg-type]
 def generate_variants_task(context: TaskContext, combo: int | None = None, started_by_user_id: int | None = None, incremental: bool = False) -> str:
     job_id = task_result_identifier(context.task_result)  # type: ignore
@@ -83,6 +126,7 @@ def generate_variants_task(context: TaskContext, combo: int | None = None, start
         progress=progress,
         metadata=metadata,
         incremental=incremental,
+        run_shards=run_variants_shards,
     )
     log('Updating combo variant counts...')
     update_combo_variant_counts()
@@ -2,7 +2,7 @@ import logging
 from django.db.models import Q, Count
 from django.tasks import task
 from django_tasks import TaskContext
-from spellbook.models import Card, DEFAULT_BATCH_SIZE
+from spellbook.models import Card, DataVersion, DEFAULT_BATCH_SIZE
 from spellbook.models.variant import Variant
 from .scryfall import scryfall, update_cards
 
@@ -85,6 +85,9 @@ def update_cards_task(context: TaskContext):
         ] + Card.scryfall_fields() + Card.playable_fields(),
         batch_size=DEFAULT_BATCH_SIZE,
     )
+    if updated_card_count > 0:
+        # bulk updates send no signals, and the card index and the response cache of the web processes need to know about them
+        DataVersion.bump(DataVersion.CARDS, DataVersion.CATALOG)
     log('Updating cards...done')
     progress(1)
     if updated_card_count > 0:
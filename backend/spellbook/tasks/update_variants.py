@@ -3,7 +3,7 @@ from django.tasks import task
 from django_tasks import TaskContext
 from django.db.models import Count, Q
 from django.db import transaction
-from spellbook.models import Variant, DEFAULT_BATCH_SIZE
+from spellbook.models import DataVersion, Variant, DEFAULT_BATCH_SIZE
 from .edhrec import update_variants, edhrec
 
 
@@ -71,4 +71,6 @@ def update_variants_task(context: TaskContext):
         progress(0.1 + variant_processed / variant_count * 0.9)
         del variants, variants_counts, variants_to_save
     del variant_ids
+    if updated_variant_count > 0:
+        DataVersion.bump(DataVersion.CATALOG)
     log(f'Updating variants...done, updated {updated_variant_count} variants')
@@ -182,8 +182,9 @@ class FeatureAdminTests(SpellbookTestCaseWithSeeding):
         self.generate_variants()
         feature = Feature.objects.get(id=self.f1_id)
         feature.description = 'Another description'
-        # only the update itself: the loaded name rules out a rename without any lookup
-        with self.assertNumQueries(1):
+        # the update itself and one upsert of the stamps, since the description is part of what the API shows:
+        # the loaded name rules out a rename without any lookup
+        with self.assertNumQueries(2):
             feature.save()
 
     def test_renaming_a_feature_twice_updates_names_both_times(self):
@@ -0,0 +1,45 @@
+import json
+from django.urls import reverse
+from spellbook.models import VariantGenerationProfile
+from ..testing import SpellbookTestCaseWithSeeding
+
+
+class VariantGenerationProfileAdminTests(SpellbookTestCaseWithSeeding):
+    def setUp(self):
+        super().setUp()
+        self.generate_variants()
+        self.generate_variants()
+        self.profile: VariantGenerationProfile = VariantGenerationProfile.objects.first()  # type: ignore
+        self.client.force_login(self.admin)
+
+    def test_changelist_and_change_views(self):
+        response = self.client.get(reverse('admin:spellbook_variantgenerationprofile_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(reverse('admin:spellbook_variantgenerationprofile_costly_combos'), response.content.decode())
+        response = self.client.get(reverse('admin:spellbook_variantgenerationprofile_change', args=[self.profile.pk]))
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn(reverse('admin:spellbook_variantgenerationprofile_report', args=[self.profile.pk]), content)
+        for phase in self.profile.report['phases']:
+            self.assertIn(f'<td>{phase['name']}</td><td>{phase['seconds']:.1f}</td>', content)
+        for combo in self.profile.report['combos']:
+            self.assertIn(reverse('admin:spellbook_combo_change', args=[combo['id']]), content)
+            self.assertIn(f'<td>{combo['seconds']:.3f}</td>', content)
+
+    def test_report_download(self):
+        response = self.client.get(reverse('admin:spellbook_variantgenerationprofile_report', args=[self.profile.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        report = json.loads(response.content)
+        self.assertEqual(report['job'], self.profile.job)
+        self.assertEqual(report['combos'], self.profile.report['combos'])
+
+    def test_costly_combos_span_the_kept_profiles(self):
+        response = self.client.get(reverse('admin:spellbook_variantgenerationprofile_costly_combos'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['profiles']), 2)
+        rows = response.context['rows']
+        self.assertEqual([combo_id for combo_id, _, _ in rows], [combo['id'] for combo in self.profile.report['combos']])
+        for _, _, seconds in rows:
+            self.assertEqual(len(seconds), 2)
+            self.assertNotIn(None, seconds)
@@ -0,0 +1,67 @@
+from spellbook.benchmarks.builds import COMPILED, INTERPRETED, current_build
+from spellbook.benchmarks.catalog import CatalogParameters, create_catalog
+from spellbook.benchmarks.macro import macro_benchmarks
+from spellbook.benchmarks.micro import micro_benchmarks
+from spellbook.benchmarks.runner import RESULTS_VERSION, Benchmark, compare_results, run_benchmarks
+from spellbook.models import Card, Combo, Feature, FeatureAttribute, Variant
+from spellbook.tests.testing import SpellbookTestCase
+
+
+def _results(build: str, **bests: float) -> dict:
+    return {
+        'version': RESULTS_VERSION,
+        'builds': {build: {'results': {name: {'best': best, 'median': best, 'runs': [best]} for name, best in bests.items()}}},
+    }
+
+
+class BenchmarksTests(SpellbookTestCase):
+    def test_catalog(self):
+        parameters = CatalogParameters(seed=1).scaled(0.1)
+        catalog = create_catalog(parameters)
+        self.assertEqual(len(catalog.card_ids), parameters.cards)
+        self.assertEqual(Card.objects.count(), parameters.cards)
+        self.assertEqual(len(catalog.generator_combo_ids), parameters.generator_combos)
+        self.assertEqual(Combo.objects.filter(status=Combo.Status.GENERATOR).count(), parameters.generator_combos)
+        self.assertEqual(len(catalog.utility_combo_ids), parameters.utility_combos + 2 * parameters.cycles)
+        self.generate_variants()
+        self.assertGreater(Variant.objects.count(), 0)
+
+    def test_catalog_is_deterministic(self):
+        parameters = CatalogParameters(seed=2).scaled(0.05)
+        create_catalog(parameters)
+        first = sorted(Combo.objects.values_list('needs__name', flat=True).exclude(needs=None))
+        for model in (Combo, Card, Feature, FeatureAttribute):
+            model.objects.all().delete()
+        create_catalog(parameters)
+        second = sorted(Combo.objects.values_list('needs__name', flat=True).exclude(needs=None))
+        self.assertEqual(first, second)
+
+    def test_run_benchmarks(self):
+        calls = list[object]()
+        benchmark = Benchmark('test', run=calls.append, setup=lambda: len(calls))
+        results = run_benchmarks([benchmark], repeat=3)
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].name, 'test')
+        self.assertEqual(len(results[0].seconds), 3)
+        self.assertLessEqual(results[0].best, results[0].median)
+
+    def test_benchmarks_run(self):
+        catalog = create_catalog(CatalogParameters().scaled(0.05))
+        benchmarks = micro_benchmarks(scale=0.01) + macro_benchmarks(catalog)
+        self.assertEqual(len({benchmark.name for benchmark in benchmarks}), len(benchmarks))
+        results = run_benchmarks(benchmarks, repeat=1)
+        self.assertEqual([result.name for result in results], [benchmark.name for benchmark in benchmarks])
+
+    def test_compare_results(self):
+        baseline = _results(COMPILED, fast=1.0, slow=1.0, gone=1.0)
+        current = _results(COMPILED, fast=1.05, slow=1.5, new=1.0)
+        regressions = compare_results(current, baseline, tolerance=0.1)
+        self.assertEqual([(regression.name, regression.build) for regression in regressions], [('slow', COMPILED)])
+        self.assertAlmostEqual(regressions[0].slowdown, 0.5)
+        self.assertEqual(compare_results(_results(INTERPRETED, slow=2.0), baseline, tolerance=0.1), [])
+        self.assertEqual(compare_results(current, baseline, tolerance=1.0), [])
+        self.assertRaises(ValueError, compare_results, current, baseline | {'version': RESULTS_VERSION + 1}, 0.1)
+
+    def test_current_build(self):
+        self.assertIn(current_build(), (COMPILED, INTERPRETED))
@@ -72,6 +72,7 @@ class TemplateTests(SpellbookTestCaseWithSeeding):
         self.generate_variants()
         template = Template.objects.get(id=self.t1_id)
         template.description = 'Another description'
-        # only the update itself: the loaded name rules out a rename without any lookup
-        with self.assertNumQueries(1):
+        # the update itself and one upsert of the stamps, since the description is part of what the API shows:
+        # the loaded name rules out a rename without any lookup
+        with self.assertNumQueries(2):
             template.save()
@@ -155,6 +155,24 @@ class VariantTests(SpellbookTestCaseWithSeeding):
         self.assertFalse(v.legal_commander)
         self.assertFalse(v.update_variant())
 
+    def test_ingredient_ids(self):
+        v: Variant = Variant.objects.get(id=self.v1_id)
+        self.assertEqual(v.card_ids, sorted([self.c8_id, self.c1_id]))
+        self.assertEqual(v.template_ids, [self.t1_id])
+        for v in Variant.objects.prefetch_related('cardinvariant_set', 'templateinvariant_set'):
+            with self.subTest(variant=v.id):
+                self.assertEqual(v.card_ids, sorted(civ.card_id for civ in v.cardinvariant_set.all()))
+                self.assertEqual(v.template_ids, sorted(tiv.template_id for tiv in v.templateinvariant_set.all()))
+                self.assertEqual(v.commander_card_ids, sorted(civ.card_id for civ in v.cardinvariant_set.all() if civ.must_be_commander))
+        self.assertTrue(Variant.objects.exclude(commander_card_ids=[]).exists())
+        # updated in bulk, so that no receiver updates the variant before update_variant does
+        CardInVariant.objects.filter(variant_id=self.v1_id, card_id=self.c1_id).update(must_be_commander=True)
+        v = Variant.objects.get(id=self.v1_id)
+        self.assertEqual(v.commander_card_ids, [])
+        self.assertTrue(v.update_variant())
+        self.assertEqual(v.commander_card_ids, [self.c1_id])
+        self.assertFalse(v.update_variant())
+
     def test_serialization(self):
         v = Variant.objects.get(id=self.v1_id)
         v.update_serialized(serializer=VariantSerializer)
@@ -1,7 +1,9 @@
+import os
 import json
 import gzip
 import datetime
-from unittest.mock import patch
+from tempfile import TemporaryDirectory
+from unittest.mock import Mock, patch
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.auth.models import User
@@ -10,7 +12,9 @@ from multiprocessing_utils import split_into_chunks
 from spellbook.models import Combo, Variant, VariantAlias
 from spellbook.tasks import combo_of_the_day_task, generate_variants_task, export_variants_task, DEFAULT_VARIANTS_FILE_NAME
 from spellbook.tasks.export_variants import build_document, export_variants_chunk, export_variant_aliases_chunk
-from spellbook.tasks.generate_variants import update_combo_variant_counts
+from spellbook.tasks.generate_variants import update_combo_variant_counts, compute_variants_shard
+from spellbook.variants.generation_checkpoint import CHECKPOINT_DIR_ENV_VAR
+from spellbook.variants.variants_generator import SHARDS_ENV_VAR
 from website.models import COMBO_OF_THE_DAY_PROPERTY, WebsiteProperty
 from .testing import SpellbookTestCaseWithSeeding
 from spellbook.models import id_from_cards_and_templates_ids
@@ -52,6 +56,46 @@ class TasksTest(SpellbookTestCaseWithSeeding):
         # Combos that lost their variants to the deletion above are brought back down to zero
         self.assertComboVariantCountsAreExact()
 
+    def test_generate_variants_across_shards(self):
+        super().generate_variants()
+        expected_variants = set(Variant.objects.values_list('id', 'name'))
+        for failing in (False, True):
+            with self.subTest(failing=failing), TemporaryDirectory() as directory, \
+                    patch.dict(os.environ, {CHECKPOINT_DIR_ENV_VAR: directory, SHARDS_ENV_VAR: '2'}), \
+                    patch('spellbook.tasks.generate_variants.compute_variants_shard', wraps=compute_variants_shard) as shard:
+                if failing:
+                    # the combos of a failed shard are computed by the job itself
+                    shard.side_effect = RuntimeError('lost worker')
+                Variant.objects.all().delete()
+                result: TaskResult = generate_variants_task.enqueue()
+                self.assertTrue(result.is_finished)
+                self.assertEqual(result.status, TaskResultStatus.SUCCESSFUL)
+                self.assertEqual(shard.call_count, 2)
+                sharded_combo_ids = [id for call in shard.call_args_list for id in call.args[2]]
+                self.assertCountEqual(sharded_combo_ids, Combo.objects.filter(status=Combo.Status.GENERATOR).values_list('id', flat=True))
+                self.assertSetEqual(set(Variant.objects.values_list('id', 'name')), expected_variants)
+                self.assertEqual(os.listdir(directory), [])
+
+    def test_generate_variants_without_waiting_forever_for_a_shard(self):
+        super().generate_variants()
+        expected_variants = set(Variant.objects.values_list('id', 'name'))
+        # a shard no worker ever finishes
+        unfinished = Mock(id='unfinished', is_finished=False, status=TaskResultStatus.RUNNING)
+        with TemporaryDirectory() as directory, \
+                patch.dict(os.environ, {CHECKPOINT_DIR_ENV_VAR: directory, SHARDS_ENV_VAR: '2'}), \
+                patch('spellbook.tasks.generate_variants.generate_variants_shard_task') as shard_task, \
+                patch('spellbook.tasks.generate_variants.SHARD_POLL_SECONDS', 0.01), \
+                patch('spellbook.tasks.generate_variants.SHARD_TIMEOUT_SECONDS', 0.05):
+            shard_task.enqueue.return_value = unfinished
+            Variant.objects.all().delete()
+            result: TaskResult = generate_variants_task.enqueue()
+            self.assertTrue(result.is_finished)
+            self.assertEqual(result.status, TaskResultStatus.SUCCESSFUL)
+            self.assertEqual(shard_task.enqueue.call_count, 2)
+            self.assertGreater(unfinished.refresh.call_count, 0)
+            # the combos of the unfinished shards are computed by the job itself
+            self.assertSetEqual(set(Variant.objects.values_list('id', 'name')), expected_variants)
+
     def test_update_combo_variant_counts(self):
         super().generate_variants()
         self.assertGreater(Combo.objects.filter(variants__isnull=False).distinct().count(), 0)
@@ -0,0 +1,51 @@
+from django.db import connection
+from spellbook.models import Variant, CardInVariant
+from spellbook.variants.variant_data import Data
+from spellbook.variants.variants_generator import get_variants_from_graph, restore_variants
+from spellbook.variants.bulk_writer import BulkWriter, CopyBulkWriter, bulk_writer
+from spellbook.tests.testing import SpellbookTestCaseWithSeeding
+
+
+class BulkWriterTests(SpellbookTestCaseWithSeeding):
+    def writers(self) -> list[BulkWriter]:
+        # COPY only exists on PostgreSQL
+        return [BulkWriter(), CopyBulkWriter()] if connection.vendor == 'postgresql' else [BulkWriter()]
+
+    def test_the_writer_follows_the_database(self):
+        self.assertIs(type(bulk_writer()), CopyBulkWriter if connection.vendor == 'postgresql' else BulkWriter)
+
+    def test_writers_create_and_update_the_same_rows(self):
+        data = Data()
+        variants = get_variants_from_graph(data)
+        for writer in self.writers():
+            with self.subTest(writer=type(writer).__name__):
+                Variant.objects.all().delete()
+                _, to_create = restore_variants(data=data, variants=variants, variant_instances={}, to_restore=set(), job='a-job')
+                writer.create(Variant.objects, [item.variant for item in to_create], skip_pre_save=True)
+                uses = [use for item in to_create for use in item.uses_to_create]
+                writer.create(CardInVariant.objects, uses)
+                writer.create(CardInVariant.objects, [])
+                self.assertEqual(Variant.objects.count(), self.expected_variant_count)
+                for item in to_create:
+                    variant = Variant.objects.get(pk=item.variant.id)
+                    self.assertEqual(variant.name, item.variant.name)
+                    self.assertEqual(variant.description, item.variant.description)
+                    self.assertEqual(variant.generated_by, 'a-job')
+                    self.assertEqual(variant.status, item.variant.status)
+                    self.assertIsNotNone(variant.created)
+                    self.assertIsNone(variant.popularity)
+                    self.assertCountEqual(
+                        variant.cardinvariant_set.values_list('card_id', 'order', 'zone_locations', 'battlefield_card_state'),
+                        [(use.card_id, use.order, use.zone_locations, use.battlefield_card_state) for use in item.uses_to_create],
+                    )
+                variants_to_update = list(Variant.objects.all())
+                for variant in variants_to_update:
+                    variant.notes = f'Notes of {variant.id}\twith a tab'
+                uses_to_update = list(CardInVariant.objects.all())
+                for use in uses_to_update:
+                    use.battlefield_card_state = 'tapped'
+                writer.update(Variant.objects, variants_to_update, fields=['notes'], skip_pre_save=True)
+                writer.update(CardInVariant.objects, uses_to_update, fields=['battlefield_card_state'])
+                for variant in Variant.objects.all():
+                    self.assertEqual(variant.notes, f'Notes of {variant.id}\twith a tab')
+                self.assertFalse(CardInVariant.objects.exclude(battlefield_card_state='tapped').exists())
@@ -0,0 +1,96 @@
+import random
+from unittest import TestCase, mock
+from spellbook.variants import variant_set
+from spellbook.variants.columnar_minimal_set_of_multisets import ColumnarMinimalSetOfMultisets
+from spellbook.variants.minimal_set_of_multisets import AbstractMinimalSetOfMultisets, MinimalSetOfMultisets
+from spellbook.variants.multiset import FrozenMultiset
+from spellbook.variants.packed_entry import PackedEntry
+from spellbook.variants.variant_set import VariantSet, VariantSetParameters, resolve_storage, STORAGE_ENV_VAR
+from . import test_minimal_set_of_sets
+from .test_minimal_set_of_sets import packed
+
+
+class ColumnarMinimalSetOfMultisetsTests(test_minimal_set_of_sets.MinimalSetOfMultisetsTests):
+    '''Runs the whole minimal set of multisets suite against the columnar storage.'''
+
+    def setUp(self):
+        super().setUp()
+        self.subject = ColumnarMinimalSetOfMultisets(self.subject)
+
+    def test_is_columnar(self):
+        self.assertIsInstance(self.subject, ColumnarMinimalSetOfMultisets)
+        self.assertIsInstance(self.subject.copy(), ColumnarMinimalSetOfMultisets)
+        self.assertIsInstance(self.subject.subtree(packed(1)), ColumnarMinimalSetOfMultisets)
+        self.assertIsInstance(self.subject | self.subject, ColumnarMinimalSetOfMultisets)
+
+    def test_candidates_sharing_elements(self):
+        probe = packed(1, 1, 2, 3, 5)
+        candidates = {self.subject._slot_entry(slot) for slot in self.subject._candidate_slots(probe)}
+        self.assertEqual(candidates, {packed(1, 1, 2, 3), packed(3, 4, 5, 5, 5)})
+
+    def test_keeps_no_set_of_entries(self):
+        self.assertNotIsInstance(self.subject, MinimalSetOfMultisets)
+        self.assertIsInstance(self.subject, AbstractMinimalSetOfMultisets)
+        self.assertFalse(hasattr(self.subject, '_MinimalSetOfMultisets__sets'))
+
+    def test_compaction_keeps_the_entries(self):
+        subject = ColumnarMinimalSetOfMultisets()
+        for i in range(1, 200):
+            subject.add(packed(1000, i))
+        self.assertEqual(len(subject), 199)
+        subject.add(packed(1000))
+        self.assertEqual(set(subject), {packed(1000)})
+        subject.add(packed(5, 6))
+        self.assertEqual(subject.subtree(packed(5, 6, 1000)), MinimalSetOfMultisets({packed(5, 6), packed(1000)}))
+        self.assertIn(packed(5, 6), subject)
+        self.assertNotIn(packed(1000, 1), subject)
+
+    def test_matches_the_set_storage(self):
+        generator = random.Random(42)
+
+        def random_entry() -> PackedEntry:
+            elements = generator.sample([e for e in range(-10, 30) if e != 0], generator.randint(0, 5))
+            return PackedEntry.from_items((e, generator.randint(1, 3)) for e in elements)
+
+        for _ in range(50):
+            entries = [random_entry() for _ in range(generator.randint(0, 150))]
+            expected = MinimalSetOfMultisets(entries)
+            columnar = ColumnarMinimalSetOfMultisets(entries)
+            self.assertEqual(set(columnar), set(expected))
+            self.assertEqual(columnar, expected)
+            self.assertEqual(expected, columnar)
+            for probe in entries[:10]:
+                self.assertEqual(probe in columnar, probe in expected)
+                self.assertEqual(set(columnar.subtree(probe)), set(expected.subtree(probe)))
+
+    def test_nbytes(self):
+        self.assertGreater(self.subject.nbytes(), ColumnarMinimalSetOfMultisets().nbytes())
+
+
+class VariantSetStorageTests(TestCase):
+    def test_resolve_storage(self):
+        with mock.patch.dict('os.environ', {STORAGE_ENV_VAR: ''}):
+            self.assertIs(resolve_storage(), MinimalSetOfMultisets)
+        with mock.patch.dict('os.environ', {STORAGE_ENV_VAR: 'set'}):
+            self.assertIs(resolve_storage(), MinimalSetOfMultisets)
+        with mock.patch.dict('os.environ', {STORAGE_ENV_VAR: 'Columnar'}):
+            self.assertIs(resolve_storage(), ColumnarMinimalSetOfMultisets)
+        with mock.patch.dict('os.environ', {STORAGE_ENV_VAR: 'trie'}):
+            self.assertRaises(ValueError, resolve_storage)
+
+    def test_variant_sets_use_the_selected_storage(self):
+        parameters = VariantSetParameters(max_depth=3)
+        left = [
+            VariantSet.ingredients_to_entry(FrozenMultiset({1: 1, 2: 1}), FrozenMultiset()),
+            VariantSet.ingredients_to_entry(FrozenMultiset({3: 1}), FrozenMultiset({1: 1})),
+        ]
+        right = [
+            VariantSet.ingredients_to_entry(FrozenMultiset({2: 1, 4: 1}), FrozenMultiset()),
+            VariantSet.ingredients_to_entry(FrozenMultiset({5: 1}), FrozenMultiset()),
+        ]
+        expected = VariantSet(parameters=parameters, entries=left) & VariantSet(parameters=parameters, entries=right)
+        with mock.patch.object(variant_set, '_STORAGE', ColumnarMinimalSetOfMultisets):
+            columnar = VariantSet(parameters=parameters, entries=left) & VariantSet(parameters=parameters, entries=right)
+        self.assertIsInstance(columnar.sets, ColumnarMinimalSetOfMultisets)
+        self.assertEqual(columnar, expected)
+        self.assertEqual(set(columnar.variants()), set(expected.variants()))
@@ -1,9 +1,13 @@
+from unittest import mock
 from spellbook.models import Card, CardInCombo, Combo, FeatureAttribute
 from spellbook.models.feature import Feature
 from spellbook.variants.multiset import FrozenMultiset
 from spellbook.variants.variant_data import Data
-from spellbook.variants.combo_graph import FeatureWithAttributes, Graph, GraphError, VariantIngredients, VariantRecipe
+from spellbook.variants.combo_graph import FeatureWithAttributes, Graph, GraphError, GraphEvaluation, VariantIngredients, VariantRecipe
+from spellbook.variants.combo_graph import EVALUATION_ENV_VAR, resolve_evaluation
+from spellbook.variants.combo_graph import FeatureWithAttributesMatcherNode, NodeState, NodeWithState
 from spellbook.variants.variant_set import VariantSet
+from spellbook.variants import combo_graph as combo_graph_module
 from spellbook.tests.testing import SpellbookTestCaseWithSeeding, SpellbookTestCase
 
 
@@ -44,6 +48,50 @@ class ComboGraphTest(SpellbookTestCaseWithSeeding):
             for result in results:
                 self.assertIsInstance(result, VariantRecipe)
 
+    def test_results_are_remembered(self):
+        data = Data()
+        combo_graph = Graph(data)
+        variants = combo_graph.variants(self.b2_id)
+        results = combo_graph.results(variants)
+        for cards, templates in variants.variants():
+            self.assertIn(combo_graph.result(cards, templates), results)
+        again = combo_graph.results(variants)
+        for result, result_again in zip(results, again):
+            self.assertIs(result_again, result)
+        self.assertEqual(results, Graph(data).results(Graph(data).variants(self.b2_id)))
+        # other parameters could change the recipes
+        combo_graph.parameterize(card_limit=4)
+        combo_graph.parameterize(card_limit=5)
+        recomputed = combo_graph.results(combo_graph.variants(self.b2_id))
+        self.assertEqual(recomputed, results)
+        self.assertIsNot(recomputed[0], results[0])
+        with mock.patch.object(combo_graph_module, 'RESULTS_CACHE_SIZE', 1):
+            combo_graph.forget_variant_sets()
+            variants = combo_graph.variants(self.b2_id)
+            results = combo_graph.results(variants)
+            self.assertIsNot(combo_graph.results(variants)[0], results[0])
+            self.assertEqual(combo_graph.results(variants), results)
+
+    def test_walks_leave_every_node_not_visited(self):
+        combo_graph = Graph(Data())
+        for combo_id in combo_graph.combo_nodes:
+            combo_graph.results(combo_graph.variants(combo_id))
+        nodes = list[NodeWithState]()
+        for combo_node in combo_graph.combo_nodes.values():
+            nodes.append(combo_node)
+            nodes.extend(combo_node.features_produced)
+            for matchers in combo_node.features_needed.values():
+                nodes.extend(matchers)
+        self.assertTrue(any(isinstance(node, FeatureWithAttributesMatcherNode) for node in nodes))
+        for node in nodes:
+            self.assertIs(node.state, NodeState.NOT_VISITED, node)
+        combo_graph.subgraph = True
+        try:
+            for node in nodes:
+                self.assertIs(node.state, NodeState.NOT_VISITED, node)
+        finally:
+            combo_graph.subgraph = False
+
     def test_graph(self):
         combo_graph = Graph(Data())
         with self.assertNumQueries(0):
@@ -51,6 +99,30 @@ class ComboGraphTest(SpellbookTestCaseWithSeeding):
             self.assertEqual(variants, list(combo_graph.results(combo_graph.variants(self.b2_id))))
             self.assertEqual(len(variants), 3)
 
+    def test_condensed_evaluation(self):
+        data = Data()
+        depth_first_graph = Graph(data)
+        with self.assertNumQueries(0):
+            condensed_graph = Graph(data, evaluation=GraphEvaluation.CONDENSED)
+            for combo_id in condensed_graph.combo_nodes:
+                variants = condensed_graph.variants(combo_id)
+                self.assertEqual(variants, depth_first_graph.variants(combo_id))
+                self.assertCountEqual(condensed_graph.results(variants), depth_first_graph.results(depth_first_graph.variants(combo_id)))
+
+    def test_condensed_evaluation_ahead_of_time(self):
+        combo_graph = Graph(Data(), evaluation=GraphEvaluation.CONDENSED)
+        combo_graph.evaluate([self.b2_id])
+        self.assertIsNotNone(combo_graph.combo_nodes[self.b2_id].variant_set)
+        self.assertEqual(len(combo_graph.variants(self.b2_id)), 3)
+
+    def test_resolve_evaluation(self):
+        with mock.patch.dict('os.environ', {EVALUATION_ENV_VAR: ''}):
+            self.assertIs(resolve_evaluation(), GraphEvaluation.DEPTH_FIRST)
+        with mock.patch.dict('os.environ', {EVALUATION_ENV_VAR: 'Condensed'}):
+            self.assertIs(resolve_evaluation(), GraphEvaluation.CONDENSED)
+        with mock.patch.dict('os.environ', {EVALUATION_ENV_VAR: 'breadth_first'}):
+            self.assertRaises(ValueError, resolve_evaluation)
+
     def test_combo_nodes(self):
         combo_graph = Graph(Data())
         self.assertTrue(all(c.item.status in (Combo.Status.GENERATOR, Combo.Status.UTILITY) for c in combo_graph.combo_nodes.values()))
@@ -101,6 +173,35 @@ class ComboGraphTest(SpellbookTestCaseWithSeeding):
         with self.assertNumQueries(0):
             self.assertEqual(len(list(combo_graph.results(combo_graph.variants(self.b2_id)))), 3)
 
+    def test_parameterize(self):
+        c = Combo.objects.get(id=self.b4_id)
+        card_needed = c.cardincombo_set.first()
+        assert card_needed is not None
+        card_needed.quantity = 2
+        card_needed.save()
+        data = Data()
+        combo_graph = Graph(data)
+        with self.assertNumQueries(0):
+            for card_limit, allow_multiple_copies, expected in ((5, False, 2), (4, False, 1), (3, True, 1), (5, True, 3), (2, True, 0), (5, False, 2)):
+                combo_graph.parameterize(card_limit=card_limit, allow_multiple_copies=allow_multiple_copies)
+                variants = combo_graph.variants(self.b2_id)
+                self.assertEqual(variants, Graph(data, card_limit=card_limit, allow_multiple_copies=allow_multiple_copies).variants(self.b2_id))
+                self.assertEqual(len(combo_graph.results(variants)), expected)
+
+    def test_parameterize_keeps_variant_sets_per_parameters(self):
+        combo_graph = Graph(Data())
+        variants = combo_graph.variants(self.b2_id)
+        combo_graph.parameterize(card_limit=3)
+        self.assertIsNone(combo_graph.combo_nodes[self.b2_id].variant_set)
+        self.assertEqual(len(combo_graph.variants(self.b2_id)), 1)
+        combo_graph.parameterize(card_limit=5)
+        self.assertIs(combo_graph.combo_nodes[self.b2_id].variant_set, variants)
+        combo_graph.forget_variant_sets()
+        self.assertIsNone(combo_graph.combo_nodes[self.b2_id].variant_set)
+        combo_graph.parameterize(card_limit=3)
+        self.assertIsNone(combo_graph.combo_nodes[self.b2_id].variant_set)
+        self.assertEqual(len(combo_graph.results(combo_graph.variants(self.b2_id))), 1)
+
     def test_replacements(self):
         data = Data()
         combo_graph = Graph(data=data)
@@ -790,6 +891,23 @@ class ComboGraphTestGeneration(SpellbookTestCase):
         self.assertSetEqual(variants[0].needed_combos, {1, 2, 3, 4})
         self.assertSetEqual(variants[0].needed_feature_of_cards, set())
 
+    def test_condensed_loops(self):
+        self.setup_combo_graph({
+            ('x',): ('y',),
+            ('y',): ('z',),
+            ('z',): ('x',),
+            ('w',): ('v',),
+            ('v',): ('w',),
+            ('A',): ('x',),
+        })
+        combo_graph = Graph(Data(), evaluation=GraphEvaluation.CONDENSED)
+        self.assertEqual(len(combo_graph.results(combo_graph.variants(4))), 0)
+        variants = list(combo_graph.results(combo_graph.variants(3)))
+        self.assertEqual(len(variants), 1)
+        self.assertMultisetEqual(variants[0].cards, {1: 1})
+        self.assertMultisetEqual(variants[0].features, {1: 2, 2: 1, 3: 1})
+        self.assertSetEqual(variants[0].combos, {1, 2, 3, 6})
+
     def test_additional_results(self):
         self.setup_combo_graph({
             ('A', 'f'): ('z',),
@@ -1085,6 +1203,23 @@ class ComboGraphTestGeneration(SpellbookTestCase):
             2: [VariantIngredients(FrozenMultiset({1: 1, 2: 1}), FrozenMultiset())],
         })
 
+    def test_needed_combos_follow_utility_features_through_the_closure(self):
+        self.setup_combo_graph({
+            'A': ('u1',),
+            'B': ('x',),
+            'C': (),
+            ('u1',): ('u2',),                # combo 1: only needed through u2
+            ('u2', 'x', 'C'): ('y',),        # combo 2
+            ('C',): ('u3',),                 # combo 3: fires, but nothing needs u3
+        })
+        combo_graph = Graph(Data())
+        variants = list(combo_graph.results(combo_graph.variants(2)))
+        self.assertEqual(len(variants), 1)
+        self.assertMultisetEqual(variants[0].cards, {1: 1, 2: 1, 3: 1})
+        self.assertSetEqual(variants[0].combos, {1, 2, 3})
+        self.assertSetEqual(variants[0].needed_combos, {1, 2})
+        self.assertSetEqual(variants[0].needed_feature_of_cards, {1, 2})
+
     def test_replacement_with_incompatible_attributes_using_cards(self):
         self.setup_combo_graph({
             'A': ('x', 'y'),
@@ -0,0 +1,99 @@
+import os
+import pickle
+from tempfile import TemporaryDirectory
+from unittest import mock
+from spellbook.models import Card, Combo, DataVersion, FeatureAttribute, FeatureOfCard
+from spellbook.variants.data_snapshot import SNAPSHOT_DIR_ENV_VAR, resolve_snapshot_directory, snapshot_path
+from spellbook.variants.data_snapshot import reference_digest, load_reference_rows, store_reference_rows, load_data
+from spellbook.variants.variant_data import fetch_reference_rows
+from spellbook.tests.testing import SpellbookTestCaseWithSeeding
+
+
+class DataSnapshotTests(SpellbookTestCaseWithSeeding):
+    def setUp(self):
+        super().setUp()
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_resolve_snapshot_directory(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(resolve_snapshot_directory())
+        with mock.patch.dict(os.environ, {SNAPSHOT_DIR_ENV_VAR: ' '}):
+            self.assertIsNone(resolve_snapshot_directory())
+        with mock.patch.dict(os.environ, {SNAPSHOT_DIR_ENV_VAR: self.directory}):
+            self.assertEqual(resolve_snapshot_directory(), self.directory)
+
+    def test_reference_digest_follows_the_data(self):
+        digest = reference_digest()
+        self.assertEqual(reference_digest(), digest)
+        card = Card.objects.first()
+        assert card is not None
+        card.name += ' edited'
+        card.save()
+        edited = reference_digest()
+        self.assertNotEqual(edited, digest)
+        Combo.objects.filter(status=Combo.Status.GENERATOR).first().delete()  # type: ignore
+        deleted = reference_digest()
+        self.assertNotEqual(deleted, edited)
+        feature_of_card = FeatureOfCard.objects.first()
+        assert feature_of_card is not None
+        feature_of_card.attributes.add(FeatureAttribute.objects.create(name='Snapshot attribute'))
+        self.assertNotEqual(reference_digest(), deleted)
+
+    def test_reference_digest_reads_no_table(self):
+        reference_digest()
+        with self.assertNumQueries(2):
+            reference_digest()
+        DataVersion.objects.all().delete()
+        digest = reference_digest()
+        self.assertEqual(DataVersion.objects.filter(kind__in=(DataVersion.CARDS, DataVersion.REFERENCE)).count(), 2)
+        self.assertEqual(reference_digest(), digest)
+
+    def test_round_trip(self):
+        digest = reference_digest()
+        self.assertIsNone(load_reference_rows(self.directory, digest))
+        reference = fetch_reference_rows()
+        store_reference_rows(self.directory, digest, reference)
+        self.assertEqual(load_reference_rows(self.directory, digest), reference)
+        self.assertIsNone(load_reference_rows(self.directory, bytes(len(digest))))
+        self.assertFalse([name for name in os.listdir(self.directory) if name.endswith('.tmp')])
+
+    def test_damaged_snapshot_is_ignored(self):
+        digest = reference_digest()
+        store_reference_rows(self.directory, digest, fetch_reference_rows())
+        with open(snapshot_path(self.directory), 'r+b') as file:
+            file.truncate(os.path.getsize(snapshot_path(self.directory)) // 2)
+        self.assertIsNone(load_reference_rows(self.directory, digest))
+        with open(snapshot_path(self.directory), 'wb'):
+            pass
+        self.assertIsNone(load_reference_rows(self.directory, digest))
+
+    def test_snapshot_is_not_unpickled(self):
+        digest = reference_digest()
+        store_reference_rows(self.directory, digest, fetch_reference_rows())
+        with open(snapshot_path(self.directory), 'r+b') as file:
+            header = file.read(len(digest) + 12)
+            file.seek(0)
+            file.truncate()
+            file.write(header + pickle.dumps({'cards': []}))
+        self.assertIsNone(load_reference_rows(self.directory, digest))
+
+    def test_load_data(self):
+        logs = list[str]()
+        cold = load_data(self.directory, log=logs.append)
+        self.assertIn('Stored a new snapshot of the reference data.', logs)
+        warm = load_data(self.directory, log=logs.append)
+        self.assertIn('Loaded the reference data from the snapshot.', logs)
+        self.assertEqual(warm.id_to_card.keys(), cold.id_to_card.keys())
+        self.assertEqual(warm.combo_to_cards, cold.combo_to_cards)
+        self.assertEqual(warm.feature_needed_in_combo_to_attributes_matcher, cold.feature_needed_in_combo_to_attributes_matcher)
+        self.assertEqual(warm.id_to_variant, cold.id_to_variant)
+        card = Card.objects.first()
+        assert card is not None
+        card.name += ' edited'
+        card.save()
+        logs.clear()
+        edited = load_data(self.directory, log=logs.append)
+        self.assertIn('Stored a new snapshot of the reference data.', logs)
+        self.assertEqual(edited.id_to_card[card.id].name, card.name)
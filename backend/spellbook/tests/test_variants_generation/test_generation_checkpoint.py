@@ -0,0 +1,102 @@
+import os
+import time
+from tempfile import TemporaryDirectory
+from unittest import mock
+from spellbook.variants.combo_graph import EVALUATION_ENV_VAR
+from spellbook.variants.generation_checkpoint import CHECKPOINT_DIR_ENV_VAR, GenerationCheckpoint, open_checkpoint, plan_digest, resolve_checkpoint_directory
+from spellbook.variants.generation_tracking import compute_fingerprints
+from spellbook.variants.variant_data import Data
+from spellbook.tests.testing import SpellbookTestCaseWithSeeding
+
+
+class GenerationCheckpointTests(SpellbookTestCaseWithSeeding):
+    def setUp(self):
+        super().setUp()
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_resolve_checkpoint_directory(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(resolve_checkpoint_directory())
+        with mock.patch.dict(os.environ, {CHECKPOINT_DIR_ENV_VAR: ' '}):
+            self.assertIsNone(resolve_checkpoint_directory())
+        with mock.patch.dict(os.environ, {CHECKPOINT_DIR_ENV_VAR: self.directory}):
+            self.assertEqual(resolve_checkpoint_directory(), self.directory)
+
+    def test_plan_digest_follows_the_plan(self):
+        data = Data()
+        fingerprints = compute_fingerprints(data)
+        combo_ids = [combo.id for combo in data.generator_combos]
+        digest = plan_digest(fingerprints, combo_ids)
+        self.assertEqual(plan_digest(fingerprints, iter(combo_ids)), digest)
+        self.assertNotEqual(plan_digest(fingerprints, combo_ids[1:]), digest)
+        card_id = next(iter(fingerprints['card']))
+        edited = {kind: dict(values) for kind, values in fingerprints.items()}
+        edited['card'][card_id] += ' edited'
+        self.assertNotEqual(plan_digest(edited, combo_ids), digest)
+        # the settings changing what the graph phase computes are part of the plan
+        with mock.patch.dict(os.environ, {EVALUATION_ENV_VAR: 'condensed'}):
+            self.assertNotEqual(plan_digest(fingerprints, combo_ids), digest)
+
+    def test_round_trip(self):
+        checkpoint = open_checkpoint(self.directory, 'a/job', 'plan')
+        self.assertEqual(list(checkpoint.chunks()), [])
+        checkpoint.store([1, 2], {'1-2': 'first'})
+        checkpoint.store([3], {'3': 'second'})
+        resumed = open_checkpoint(self.directory, 'a/job', 'plan')
+        self.assertEqual(list(resumed.chunks()), [([1, 2], {'1-2': 'first'}), ([3], {'3': 'second'})])
+        # a chunk completed after resuming comes after the ones read back
+        resumed.store([4], {'4': 'third'})
+        self.assertEqual([combo_ids for combo_ids, _ in GenerationCheckpoint(self.directory, 'a/job', 'plan').chunks()], [[1, 2], [3], [4]])
+        self.assertFalse([name for name in os.listdir(resumed.path) if name.endswith('.tmp')])
+        # the key cannot escape the directory
+        self.assertEqual(os.path.dirname(resumed.key_path), self.directory)
+        resumed.clear()
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_other_plans_of_the_key_are_dropped(self):
+        open_checkpoint(self.directory, 'key', 'old-plan').store([1], {'1': 'old'})
+        open_checkpoint(self.directory, 'other-key', 'old-plan').store([1], {'1': 'other'})
+        self.assertEqual(list(open_checkpoint(self.directory, 'key', 'new-plan').chunks()), [])
+        self.assertEqual(list(open_checkpoint(self.directory, 'key', 'old-plan').chunks()), [])
+        self.assertEqual(list(open_checkpoint(self.directory, 'other-key', 'old-plan').chunks()), [([1], {'1': 'other'})])
+
+    def test_stale_keys_are_dropped(self):
+        stale = open_checkpoint(self.directory, 'stale-key', 'plan')
+        stale.store([1], {'1': 'stale'})
+        recent = open_checkpoint(self.directory, 'recent-key', 'plan')
+        recent.store([2], {'2': 'recent'})
+        long_ago = time.time() - 8 * 24 * 60 * 60
+        os.utime(stale.key_path, (long_ago, long_ago))
+        open_checkpoint(self.directory, 'key', 'plan')
+        self.assertCountEqual(os.listdir(self.directory), ['recent-key', 'key'])
+        # opening a checkpoint again makes it recent
+        os.utime(recent.key_path, (long_ago, long_ago))
+        self.assertEqual(list(open_checkpoint(self.directory, 'recent-key', 'plan').chunks()), [([2], {'2': 'recent'})])
+        open_checkpoint(self.directory, 'key', 'plan')
+        self.assertCountEqual(os.listdir(self.directory), ['recent-key', 'key'])
+
+    def test_damaged_chunk_is_skipped(self):
+        checkpoint = open_checkpoint(self.directory, 'job', 'plan')
+        checkpoint.store([1], {'1': 'first'})
+        checkpoint.store([2], {'2': 'second'})
+        first_chunk = os.path.join(checkpoint.path, sorted(os.listdir(checkpoint.path))[0])
+        with open(first_chunk, 'r+b') as file:
+            file.truncate(os.path.getsize(first_chunk) // 2)
+        self.assertEqual(list(open_checkpoint(self.directory, 'job', 'plan').chunks()), [([2], {'2': 'second'})])
+
+    def test_shards_are_read_after_the_own_chunks(self):
+        checkpoint = open_checkpoint(self.directory, 'job', 'plan')
+        checkpoint.store([1], {'1': 'own'})
+        GenerationCheckpoint(self.directory, 'job', 'plan', shard='second').store([3], {'3': 'second shard'})
+        GenerationCheckpoint(self.directory, 'job', 'plan', shard='first').store([2], {'2': 'first shard'})
+        GenerationCheckpoint(self.directory, 'job', 'plan', shard='unlisted').store([4], {'4': 'unlisted shard'})
+        self.assertEqual(list(checkpoint.chunks()), [([1], {'1': 'own'})])
+        checkpoint.shards = ['first', 'second', 'missing']
+        self.assertEqual([combo_ids for combo_ids, _ in checkpoint.chunks()], [[1], [2], [3]])
+        # the shards do not take up the sequence of the job
+        checkpoint.store([5], {'5': 'own'})
+        self.assertEqual(sorted(name for name in os.listdir(checkpoint.path) if name.endswith('.chunk')), ['00000000.chunk', '00000001.chunk'])
+        checkpoint.clear()
+        self.assertEqual(os.listdir(self.directory), [])
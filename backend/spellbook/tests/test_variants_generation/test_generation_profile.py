@@ -0,0 +1,68 @@
+import os
+from unittest import mock
+from spellbook.models import VariantGenerationProfile
+from spellbook.variants.generation_profile import TRACE_MEMORY_ENV_VAR, PROFILE_HISTORY, GenerationProfile, resolve_memory_tracing, store_generation_profile
+from spellbook.variants.generation_tracking import ComboCost
+from spellbook.tests.testing import SpellbookTestCaseWithSeeding
+
+
+class GenerationProfileTests(SpellbookTestCaseWithSeeding):
+    def test_resolve_memory_tracing(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertFalse(resolve_memory_tracing())
+        for value, expected in (('1', True), ('True', True), (' off ', False), ('0', False)):
+            with self.subTest(value=value), mock.patch.dict(os.environ, {TRACE_MEMORY_ENV_VAR: value}):
+                self.assertEqual(resolve_memory_tracing(), expected)
+        with mock.patch.dict(os.environ, {TRACE_MEMORY_ENV_VAR: 'maybe'}):
+            self.assertRaises(ValueError, resolve_memory_tracing)
+
+    def test_phases_add_up(self):
+        for trace_memory in (False, True):
+            with self.subTest(trace_memory=trace_memory):
+                profile = GenerationProfile(trace_memory=trace_memory)
+                with profile.phase('restore'):
+                    allocated = [bytearray(2 ** 20)]
+                with profile.phase('save'):
+                    pass
+                first = profile.phases['restore'].seconds
+                with profile.phase('restore'):
+                    del allocated
+                phases = profile.phases_report()
+                self.assertEqual([phase['name'] for phase in phases], ['restore', 'save'])
+                self.assertGreaterEqual(phases[0]['seconds'], first)
+                self.assertGreater(phases[0]['max_rss'], 0)
+                if trace_memory:
+                    self.assertGreaterEqual(phases[0]['traced_peak'], 2 ** 20)
+                else:
+                    self.assertIsNone(phases[0]['traced_peak'])
+
+    def test_report_lists_the_costliest_combos(self):
+        profile = GenerationProfile()
+        costs = {
+            1: ComboCost(seconds=1.0, variant_count=10, largest_set=12, join_pairs=100),
+            2: ComboCost(seconds=3.0, variant_count=30),
+            3: ComboCost(seconds=2.0, variant_count=20),
+        }
+        report = profile.report(costs, [1, 2, 4])
+        self.assertEqual(report['combo_count'], 2)
+        self.assertEqual(report['combos'], [
+            {'id': 2, 'seconds': 3.0, 'variant_count': 30, 'largest_set': 0, 'join_pairs': 0},
+            {'id': 1, 'seconds': 1.0, 'variant_count': 10, 'largest_set': 12, 'join_pairs': 100},
+        ])
+
+    def test_generation_stores_its_profile(self):
+        VariantGenerationProfile.objects.all().delete()
+        self.generate_variants()
+        profile: VariantGenerationProfile = VariantGenerationProfile.objects.get()
+        self.assertEqual([phase['name'] for phase in profile.report['phases']], ['load', 'graph', 'restore', 'save', 'cleanup'])
+        self.assertEqual(profile.report['combo_count'], len(profile.report['combos']))
+        self.assertGreater(profile.report['combo_count'], 0)
+        self.assertTrue(all(combo['largest_set'] >= combo['variant_count'] for combo in profile.report['combos']))
+
+    def test_only_the_latest_profiles_are_kept(self):
+        VariantGenerationProfile.objects.all().delete()
+        for index in range(PROFILE_HISTORY + 2):
+            latest = store_generation_profile(f'job-{index}', {'phases': [], 'combo_count': 0, 'combos': []})
+        self.assertEqual(VariantGenerationProfile.objects.count(), PROFILE_HISTORY)
+        self.assertEqual(VariantGenerationProfile.objects.first(), latest)
+        self.assertFalse(VariantGenerationProfile.objects.filter(job__in=['job-0', 'job-1']).exists())
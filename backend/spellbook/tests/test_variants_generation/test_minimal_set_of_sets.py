@@ -114,3 +114,10 @@ class MinimalSetOfMultisetsTests(TestCase):
         self.assertNotIn(packed(7), self.subject)
         self.assertEqual(c.subtree(packed(7)), MinimalSetOfMultisets({packed(7)}))
         self.assertEqual(self.subject.subtree(packed(7)), MinimalSetOfMultisets())
+
+    def test_candidates_sharing_elements(self):
+        probe = packed(1, 1, 2, 3, 5)
+        self.assertEqual(self.subject._candidates_sharing_elements(probe), {packed(1, 1, 2, 3), packed(3, 4, 5, 5, 5)})
+        subsets = self.subject._candidates_sharing_elements(probe, subsets_only=True)
+        self.assertIn(packed(1, 1, 2, 3), subsets)
+        self.assertTrue(all(entry.issubset(probe) for entry in subsets if entry != packed(3, 4, 5, 5, 5)))
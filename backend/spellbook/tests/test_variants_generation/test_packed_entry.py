@@ -1,5 +1,5 @@
-from unittest import TestCase
-from spellbook.variants.packed_entry import PackedEntry, COUNT_LIMIT
+from unittest import TestCase, mock
+from spellbook.variants.packed_entry import PackedEntry, COUNT_LIMIT, element_signature
 
 
 class PackedEntryTests(TestCase):
@@ -39,6 +39,43 @@ class PackedEntryTests(TestCase):
         self.assertTrue(PackedEntry.from_items([(-1, 1)]).issubset(PackedEntry.from_items([(-1, 2), (1, 1)])))
         self.assertFalse(PackedEntry.from_items([(-1, 3)]).issubset(PackedEntry.from_items([(-1, 2), (1, 1)])))
 
+    def test_signature(self):
+        self.assertEqual(PackedEntry().signature(), 0)
+        for element in (-3, 1, 2, 1000):
+            signature = element_signature(element)
+            self.assertEqual(signature.bit_count(), 1)
+            self.assertLess(signature, 1 << 64)
+            self.assertEqual(PackedEntry.from_items([(element, 3)]).signature(), signature)
+        entry = PackedEntry.from_items([(-3, 1), (1, 2), (1000, 1)])
+        self.assertEqual(entry.signature(), element_signature(-3) | element_signature(1) | element_signature(1000))
+        self.assertEqual((entry | PackedEntry.from_items([(2, 1)])).signature(), entry.signature() | element_signature(2))
+        self.assertEqual((entry + entry).signature(), entry.signature())
+        # consecutive ids, like those of the cards of a combo, spread over most of the bits
+        self.assertGreater(len({element_signature(element) for element in range(1, 65)}), 48)
+
+    def test_signature_is_computed_on_first_use(self):
+        with mock.patch('spellbook.variants.packed_entry.element_signature', wraps=element_signature) as signature_of:
+            first = PackedEntry.from_items([(1, 1), (2, 3)])
+            second = PackedEntry.from_items([(2, 2), (3, 4)])
+            joined = first + second
+            union = first | second
+            signature_of.assert_not_called()
+            self.assertEqual(joined._signature, 0)
+            self.assertEqual(union._signature, 0)
+            self.assertEqual(joined.signature(), union.signature())
+            self.assertEqual(signature_of.call_count, 2 * joined.distinct_count())
+            joined.signature()
+            self.assertEqual(signature_of.call_count, 2 * joined.distinct_count())
+            self.assertNotEqual(joined._signature, 0)
+
+    def test_signature_never_rejects_a_subset(self):
+        large = PackedEntry.from_items((element, 2) for element in range(-50, 200) if element)
+        for element in range(-50, 200):
+            if element:
+                small = PackedEntry.from_items([(element, 1)])
+                self.assertEqual(small.signature() & ~large.signature(), 0)
+                self.assertTrue(small.issubset(large))
+
     def test_union(self):
         first = PackedEntry.from_items([(1, 1), (2, 3)])
         second = PackedEntry.from_items([(2, 2), (3, 4)])
@@ -1,6 +1,7 @@
 from itertools import product
 from unittest import TestCase
 from spellbook.models.references import FEATURE_REPLACEMENT_PATTERN, format_feature_replacement
+from spellbook.variants.replacements import Placeholder, compile_text
 
 KEYS = [
     'Feature',
@@ -49,3 +50,25 @@ class FeatureReplacementPatternTests(TestCase):
                     result, count = FEATURE_REPLACEMENT_PATTERN.subn(lambda m: format_feature_replacement(*m.groups()), text)
                     self.assertGreater(count, 0)
                     self.assertEqual(result, text)
+
+
+class CompileTextTests(TestCase):
+    def test_compiled_text_keeps_every_part(self):
+        for key, face, alias, selector, postfix_alias in all_parts():
+            with self.subTest(key=key, face=face, alias=alias, selector=selector, postfix_alias=postfix_alias):
+                replacement = format_feature_replacement(key, face, alias, selector, postfix_alias)
+                for text in (replacement, f'before {replacement} after', f'{replacement}{replacement}', f'[[{replacement}]]'):
+                    compiled = compile_text(text)
+                    self.assertEqual(''.join(part if isinstance(part, str) else part.source for part in compiled.parts), text)
+                    placeholders = [part for part in compiled.parts if isinstance(part, Placeholder)]
+                    self.assertGreater(len(placeholders), 0)
+                    self.assertEqual(compiled.keys, frozenset(placeholder.key for placeholder in placeholders))
+                    self.assertEqual(compiled.registers_aliases, alias is not None or postfix_alias is not None and selector is not None)
+                    self.assertIs(compile_text(text), compiled)
+
+    def test_text_without_placeholders(self):
+        for text in ('', 'no placeholders', '[single brackets]', '[[unclosed'):
+            with self.subTest(text=text):
+                compiled = compile_text(text)
+                self.assertEqual(compiled.keys, frozenset())
+                self.assertEqual(''.join(compiled.parts), text)
@@ -2,8 +2,9 @@ from dataclasses import fields
 
 from spellbook.tests.testing import SpellbookTestCaseWithSeeding
 from spellbook.variants.variant_data import (
-    Data, VariantRow, CardInVariantRow, TemplateInVariantRow,
+    Data, fetch_reference_rows, VariantRow, CardInVariantRow, TemplateInVariantRow,
     FeatureProducedByVariantRow, VariantOfComboRow, VariantIncludesComboRow,
+    FeatureOfCardRow, CardInComboRow, TemplateInComboRow, FeatureNeededInComboRow, FeatureProducedInComboRow, FeatureRemovedInComboRow,
 )
 from spellbook.models import CardInVariant, FeatureAttribute, FeatureOfCard, TemplateInVariant, Variant, Combo, Feature, Card, Template
 
@@ -26,6 +27,21 @@ class VariantDataTests(SpellbookTestCaseWithSeeding):
         super().setUpTestData()
         super().generate_variants()
 
+    def test_reference_rows_load_the_same_instances(self):
+        data = Data(reference=fetch_reference_rows())
+        for instances, queryset in (
+            (data.id_to_card, Card.objects.all()),
+            (data.id_to_combo, Combo.objects.all()),
+            (data.id_to_feature, Feature.objects.all()),
+        ):
+            expected = {instance.id: instance for instance in queryset}
+            self.assertEqual(instances.keys(), expected.keys())
+            for id, instance in instances.items():
+                self.assertFalse(instance._state.adding)
+                for field in instance._meta.concrete_fields:
+                    if field.attname in instance.__dict__:
+                        self.assertEqual(getattr(instance, field.attname), getattr(expected[id], field.attname))
+
     def test_combos(self):
         data = Data()
         base = Combo.objects.all()
@@ -34,18 +50,18 @@ class VariantDataTests(SpellbookTestCaseWithSeeding):
         self.assertDictEqual(data.id_to_combo, {c.id: c for c in base})
         base = FeatureOfCard.objects.all()
         self.assertEqual(len(data.id_to_feature_of_card), base.count())
-        self.assertDictEqual(data.id_to_feature_of_card, {f.id: f for f in base})
+        self.assertDictEqual(data.id_to_feature_of_card, {f.id: row_from_instance(FeatureOfCardRow, f) for f in base})
         self.assertEqual(set(c.id for c in data.generator_combos), set(Combo.objects.filter(status=Combo.Status.GENERATOR).values_list('id', flat=True)))
-        self.assertDictEqual({k: data.combo_to_cards[k] for k in query.values_list('id', flat=True)}, {combo.id: list(combo.cardincombo_set.all()) for combo in query.all()})
-        self.assertDictEqual({k: data.combo_to_templates[k] for k in query.values_list('id', flat=True)}, {combo.id: list(combo.templateincombo_set.all()) for combo in query.all()})
-        self.assertDictEqual({k: data.combo_to_produced_features[k] for k in query.values_list('id', flat=True)}, {combo.id: list(combo.featureproducedincombo_set.all()) for combo in query.all()})
-        self.assertDictEqual({k: data.combo_to_needed_features[k] for k in query.values_list('id', flat=True)}, {combo.id: list(combo.featureneededincombo_set.all()) for combo in query.all()})
-        self.assertDictEqual({k: data.combo_to_removed_features[k] for k in query.values_list('id', flat=True)}, {combo.id: list(combo.featureremovedincombo_set.all()) for combo in query.all()})
+        self.assertDictEqual({k: data.combo_to_cards[k] for k in query.values_list('id', flat=True)}, {combo.id: [row_from_instance(CardInComboRow, i) for i in combo.cardincombo_set.all()] for combo in query.all()})
+        self.assertDictEqual({k: data.combo_to_templates[k] for k in query.values_list('id', flat=True)}, {combo.id: [row_from_instance(TemplateInComboRow, i) for i in combo.templateincombo_set.all()] for combo in query.all()})
+        self.assertDictEqual({k: data.combo_to_produced_features[k] for k in query.values_list('id', flat=True)}, {combo.id: [row_from_instance(FeatureProducedInComboRow, i) for i in combo.featureproducedincombo_set.all()] for combo in query.all()})
+        self.assertDictEqual({k: data.combo_to_needed_features[k] for k in query.values_list('id', flat=True)}, {combo.id: [row_from_instance(FeatureNeededInComboRow, i) for i in combo.featureneededincombo_set.all()] for combo in query.all()})
+        self.assertDictEqual({k: data.combo_to_removed_features[k] for k in query.values_list('id', flat=True)}, {combo.id: [row_from_instance(FeatureRemovedInComboRow, i) for i in combo.featureremovedincombo_set.all()] for combo in query.all()})
 
     def test_cards(self):
         data = Data()
         self.assertEqual(set(c.id for c in data.id_to_card.values()), set(Card.objects.values_list('id', flat=True)))
-        self.assertDictEqual({k: data.card_to_features[k] for k in Card.objects.values_list('id', flat=True)}, {card.id: list(card.featureofcard_set.all()) for card in Card.objects.all()})
+        self.assertDictEqual({k: data.card_to_features[k] for k in Card.objects.values_list('id', flat=True)}, {card.id: [row_from_instance(FeatureOfCardRow, i) for i in card.featureofcard_set.all()] for card in Card.objects.all()})
         self.assertDictEqual(data.id_to_card, {c.id: c for c in Card.objects.all()})
 
     def test_templates(self):
@@ -72,6 +88,17 @@ class VariantDataTests(SpellbookTestCaseWithSeeding):
         data = Data()
         self.assertSetEqual(data.utility_features_ids, set(Feature.objects.filter(status__in=(Feature.Status.HIDDEN_UTILITY, Feature.Status.PUBLIC_UTILITY)).values_list('id', flat=True)))
 
+    def test_memory_report(self):
+        data = Data()
+        report = {name: (count, size) for name, count, size in data.memory_report()}
+        self.assertEqual(report['cards'][0], Card.objects.count())
+        self.assertEqual(report['featureofcards'][0], FeatureOfCard.objects.count())
+        self.assertEqual(report['variants'][0], Variant.objects.count())
+        self.assertEqual(report['cardinvariants'][0], CardInVariant.objects.count())
+        for name, (count, size) in report.items():
+            self.assertGreaterEqual(size, count, name)
+        self.assertGreater(report['cards'][1], 0)
+
     def test_variants(self):
         v: Variant = Variant.objects.first()  # type: ignore
         v.status = Variant.Status.NOT_WORKING
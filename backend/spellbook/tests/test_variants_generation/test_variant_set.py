@@ -1,6 +1,6 @@
 from typing import Iterable
 from unittest import TestCase
-from spellbook.variants.variant_set import VariantSet, VariantSetParameters
+from spellbook.variants.variant_set import VariantSet, VariantSetParameters, JOIN_STATISTICS, SKETCH_SAMPLE_SIZE
 from spellbook.variants.multiset import FrozenMultiset, BaseMultiset
 from spellbook.variants.packed_entry import PackedEntry
 
@@ -365,3 +365,100 @@ class VariantSetTests(TestCase):
             (FrozenMultiset({1: 1, 2: 2, 3: 129, 4: 4}), FrozenMultiset()),
             (FrozenMultiset({1: 1}), FrozenMultiset({1: 2})),
         ]))
+
+    def test_joins_prune_pairs_beyond_max_depth(self):
+        parameters = VariantSetParameters(max_depth=3)
+        small = VariantSet(parameters=parameters, entries=[
+            VariantSet.ingredients_to_entry(FrozenMultiset({1: 1}), FrozenMultiset()),
+            VariantSet.ingredients_to_entry(FrozenMultiset({2: 1}), FrozenMultiset()),
+        ])
+        large = VariantSet(parameters=parameters, entries=[
+            VariantSet.ingredients_to_entry(FrozenMultiset({3: 1, 4: 1, 5: 1}), FrozenMultiset()),
+            VariantSet.ingredients_to_entry(FrozenMultiset({1: 1, 6: 1}), FrozenMultiset()),
+        ])
+        JOIN_STATISTICS.reset()
+        self.assertEqual(use_hashable_dict((small & large).variants()), use_hashable_dict([
+            (FrozenMultiset({1: 1, 6: 1}), FrozenMultiset()),
+        ]))
+        # {3, 4, 5} joined with anything else exceeds the depth, and is never built
+        self.assertEqual(JOIN_STATISTICS.pruned, 2)
+        self.assertEqual(JOIN_STATISTICS.evaluated, 2)
+        JOIN_STATISTICS.reset()
+        self.assertEqual(use_hashable_dict((small + large).variants()), use_hashable_dict([
+            (FrozenMultiset({1: 2, 6: 1}), FrozenMultiset()),
+            (FrozenMultiset({1: 1, 2: 1, 6: 1}), FrozenMultiset()),
+        ]))
+        self.assertEqual(JOIN_STATISTICS.pruned, 2)
+
+    def test_joins_prune_shared_cards_without_multiple_copies(self):
+        parameters = VariantSetParameters(allow_multiple_copies=False)
+        left = VariantSet(parameters=parameters, entries=[
+            VariantSet.ingredients_to_entry(FrozenMultiset({1: 1, 2: 1}), FrozenMultiset()),
+            VariantSet.ingredients_to_entry(FrozenMultiset({3: 1}), FrozenMultiset({1: 1})),
+        ])
+        right = VariantSet(parameters=parameters, entries=[
+            VariantSet.ingredients_to_entry(FrozenMultiset({2: 1}), FrozenMultiset()),
+            VariantSet.ingredients_to_entry(FrozenMultiset({4: 1}), FrozenMultiset({1: 1})),
+        ])
+        JOIN_STATISTICS.reset()
+        self.assertEqual(use_hashable_dict((left + right).variants()), use_hashable_dict([
+            (FrozenMultiset({1: 1, 2: 1, 4: 1}), FrozenMultiset({1: 1})),
+            (FrozenMultiset({2: 1, 3: 1}), FrozenMultiset({1: 1})),
+            # templates are never copies of one another
+            (FrozenMultiset({3: 1, 4: 1}), FrozenMultiset({1: 2})),
+        ]))
+        self.assertEqual(JOIN_STATISTICS.pruned, 1)
+        self.assertEqual(JOIN_STATISTICS.evaluated, 3)
+        JOIN_STATISTICS.reset()
+        self.assertEqual(
+            VariantSet.product_sets([left, right], parameters=parameters),
+            left + right,
+        )
+        self.assertEqual(JOIN_STATISTICS.pruned, 2)
+
+    def test_plan_joins_first_the_set_shrinking_the_intermediate_result(self):
+        parameters = VariantSetParameters(max_depth=2)
+
+        def cards(*ids: int):
+            return VariantSet.ingredients_to_entry(FrozenMultiset({i: 1 for i in ids}), FrozenMultiset())
+        smallest = VariantSet(parameters=parameters, entries=[cards(1), cards(2)])
+        small = VariantSet(parameters=parameters, entries=[cards(10), cards(11), cards(12), cards(13)])
+        shrinking = VariantSet(parameters=parameters, entries=[cards(1), cards(3, 4), cards(5, 6), cards(7, 8), cards(9, 14)])
+        plan = VariantSet.plan_and_sets([small, shrinking, smallest], parameters=parameters)
+        # joined with the smallest set, the largest one leaves a single entry, so it comes before the other
+        self.assertEqual(list(plan.operands), [smallest, shrinking, small])
+        # the sketches of small sets are exact, and so is the join they computed, which is not made again
+        self.assertEqual(plan.estimate, 4)
+        self.assertIs(plan.parameters, parameters)
+        expected = (smallest & small) & shrinking
+        JOIN_STATISTICS.reset()
+        self.assertEqual(plan.execute(), expected)
+        self.assertEqual(JOIN_STATISTICS.evaluated, 0)
+        self.assertEqual(VariantSet.and_sets([small, shrinking, smallest], parameters=parameters), (smallest & small) & shrinking)
+        self.assertEqual(VariantSet.plan_and_sets([small]).estimate, len(small))
+        self.assertEqual(VariantSet.plan_and_sets([]).estimate, 0)
+
+    def test_plan_estimates_large_joins_from_samples(self):
+        size = SKETCH_SAMPLE_SIZE * 8
+
+        def cards(*ids: int):
+            return VariantSet.ingredients_to_entry(FrozenMultiset({i: 1 for i in ids}), FrozenMultiset())
+        for max_depth, expected in ((float('inf'), size * size), (2, size * size), (1, 0)):
+            with self.subTest(max_depth=max_depth):
+                parameters = VariantSetParameters(max_depth=max_depth)
+                left = VariantSet(parameters=parameters, entries=[cards(i) for i in range(1, size + 1)])
+                right = VariantSet(parameters=parameters, entries=[cards(i) for i in range(size + 1, 2 * size + 1)])
+                JOIN_STATISTICS.reset()
+                plan = VariantSet.plan_and_sets([left, right], parameters=parameters)
+                # estimated without joining the sets
+                self.assertEqual(JOIN_STATISTICS.evaluated + JOIN_STATISTICS.pruned, 0)
+                self.assertEqual(plan.estimate, max(size, expected))
+                self.assertIsNone(plan.result)
+                self.assertEqual(len(plan.execute()), expected)  # type: ignore
+                # the limit holds on the actual entries, whatever the samples estimated
+                self.assertEqual(len(plan.execute(limit=max(size, expected))), expected)  # type: ignore
+                if expected:
+                    JOIN_STATISTICS.reset()
+                    self.assertIsNone(plan.execute(limit=size))
+                    # the join stopped as soon as it went past the limit
+                    self.assertLess(JOIN_STATISTICS.evaluated, expected)
@@ -0,0 +1,107 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import mock
+from spellbook.models import Combo
+from spellbook.variants.variant_data import Data
+from spellbook.variants.combo_graph import Graph, GraphEvaluation
+from spellbook.variants.generation_tracking import compute_fingerprints
+from spellbook.variants.variant_set_cache import CACHE_DIR_ENV_VAR, resolve_cache_directory, cache_path
+from spellbook.variants.variant_set_cache import node_key, subtree_digests, load_variant_sets, store_variant_sets
+from spellbook.tests.testing import SpellbookTestCaseWithSeeding
+
+
+class VariantSetCacheTests(SpellbookTestCaseWithSeeding):
+    def setUp(self):
+        super().setUp()
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def _evaluated_graph(self, data: Data, **kwargs) -> Graph:
+        graph = Graph(data, **kwargs)
+        graph.evaluate(graph.combo_nodes.keys())
+        return graph
+
+    def test_resolve_cache_directory(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(resolve_cache_directory())
+        with mock.patch.dict(os.environ, {CACHE_DIR_ENV_VAR: '  '}):
+            self.assertIsNone(resolve_cache_directory())
+        with mock.patch.dict(os.environ, {CACHE_DIR_ENV_VAR: self.directory}):
+            self.assertEqual(resolve_cache_directory(), self.directory)
+
+    def test_round_trip(self):
+        data = Data()
+        fingerprints = compute_fingerprints(data)
+        for evaluation in GraphEvaluation:
+            with self.subTest(evaluation=evaluation):
+                graph = self._evaluated_graph(data, evaluation=evaluation)
+                digests = subtree_digests(graph, fingerprints)
+                stored = store_variant_sets(graph, digests, self.directory)
+                self.assertGreater(stored, 0)
+                restored = Graph(data, evaluation=evaluation)
+                with self.assertNumQueries(0):
+                    self.assertEqual(load_variant_sets(restored, subtree_digests(restored, fingerprints), self.directory), stored)
+                for combo_id, combo in graph.combo_nodes.items():
+                    self.assertEqual(restored.combo_nodes[combo_id].variant_set, combo.variant_set)
+                    self.assertCountEqual(restored.results(restored.variants(combo_id)), graph.results(graph.variants(combo_id)))
+
+    def test_variant_sets_are_kept_per_parameters(self):
+        data = Data()
+        fingerprints = compute_fingerprints(data)
+        graph = self._evaluated_graph(data, card_limit=5)
+        store_variant_sets(graph, subtree_digests(graph, fingerprints), self.directory)
+        other = Graph(data, card_limit=3)
+        self.assertEqual(load_variant_sets(other, subtree_digests(other, fingerprints), self.directory), 0)
+        self.assertNotEqual(
+            cache_path(self.directory, graph.variant_set_parameters, graph.evaluation),
+            cache_path(self.directory, other.variant_set_parameters, other.evaluation),
+        )
+
+    def test_changes_invalidate_what_depends_on_them(self):
+        data = Data()
+        fingerprints = compute_fingerprints(data)
+        graph = self._evaluated_graph(data)
+        digests = subtree_digests(graph, fingerprints)
+        store_variant_sets(graph, digests, self.directory)
+        combo = Combo.objects.get(id=self.b2_id)
+        combo.mana_needed += '{W}'
+        combo.save()
+        data = Data()
+        changed_fingerprints = compute_fingerprints(data)
+        self.assertNotEqual(changed_fingerprints['combo'][self.b2_id], fingerprints['combo'][self.b2_id])
+        restored = Graph(data)
+        changed_digests = subtree_digests(restored, changed_fingerprints)
+        loaded = load_variant_sets(restored, changed_digests, self.directory)
+        self.assertLess(loaded, len(changed_digests))
+        self.assertIsNone(restored.combo_nodes[self.b2_id].variant_set)
+        stored_digests = {node_key(node): digest for node, digest in digests.items()}
+        for node, digest in changed_digests.items():
+            if node.variant_set is not None:
+                self.assertEqual(stored_digests[node_key(node)], digest)
+        self.assertEqual(restored.variants(self.b2_id), Graph(data).variants(self.b2_id))
+
+    def test_damaged_cache_is_ignored(self):
+        data = Data()
+        graph = Graph(data)
+        path = cache_path(self.directory, graph.variant_set_parameters, graph.evaluation)
+        with open(path, 'wb') as file:
+            file.write(b'not a cache')
+        digests = subtree_digests(graph, compute_fingerprints(data))
+        self.assertEqual(load_variant_sets(graph, digests, self.directory), 0)
+        graph.evaluate(graph.combo_nodes.keys())
+        self.assertGreater(store_variant_sets(graph, digests, self.directory), 0)
+        self.assertFalse([name for name in os.listdir(self.directory) if name.endswith('.tmp')])
+
+    def test_truncated_cache_is_ignored(self):
+        data = Data()
+        fingerprints = compute_fingerprints(data)
+        graph = self._evaluated_graph(data)
+        store_variant_sets(graph, subtree_digests(graph, fingerprints), self.directory)
+        path = cache_path(self.directory, graph.variant_set_parameters, graph.evaluation)
+        with open(path, 'rb') as file:
+            content = file.read()
+        with open(path, 'wb') as file:
+            file.write(content[:-5])
+        restored = Graph(data)
+        self.assertEqual(load_variant_sets(restored, subtree_digests(restored, fingerprints), self.directory), 0)
@@ -1,13 +1,14 @@
 import os
 from itertools import chain
+from tempfile import TemporaryDirectory
 from unittest import mock, skipUnless
 from django.db.models import Count
 from spellbook.models.combo import CardInCombo, FeatureNeededInCombo
 from spellbook.models.feature_attribute import FeatureAttribute
 from spellbook.tests.testing import SpellbookTestCase, SpellbookTestCaseWithSeeding
 from spellbook.models import Variant, Card, OrderedIngredient, CardInVariant, TemplateInVariant, Template, Combo, Feature, VariantAlias, FeatureOfCard, ZoneLocation
-from spellbook.models import VariantGenerationFingerprints, VariantOfCombo, FeatureProducedByVariant, id_from_cards_and_templates_ids
-from spellbook.variants.combo_graph import FeatureWithAttributes
+from spellbook.models import VariantGenerationFingerprints, VariantGenerationComboCost, VariantOfCombo, FeatureProducedByVariant, id_from_cards_and_templates_ids
+from spellbook.variants.combo_graph import EVALUATION_ENV_VAR, FeatureWithAttributes
 from spellbook.variants.multiset import FrozenMultiset
 from spellbook.variants.variant_data import Data
 from spellbook.variants import variants_generator
@@ -16,6 +17,10 @@ from spellbook.variants.replacements import ReplacementContext
 from spellbook.variants.variants_generator import generate_variants, subtract_features, update_state
 from spellbook.variants.variants_generator import sync_variant_aliases, restore_variants
 from spellbook.variants.variants_generator import VariantDefinition, _restore_variant, _update_variant, _create_variant, _perform_bulk_saves
+from spellbook.variants.variants_generator import BATCH_SIZE_ENV_VAR, DefinitionSpool, emit_variants_from_graph, resolve_batch_size
+from spellbook.variants.generation_tracking import ComboCost, compute_fingerprints, load_combo_costs
+from spellbook.variants.variant_set_cache import CACHE_DIR_ENV_VAR
+from spellbook.variants.generation_checkpoint import CHECKPOINT_DIR_ENV_VAR, open_checkpoint
 from multiprocessing_utils import WORKERS_ENV_VAR, parallelism_is_available, resolve_workers
 
 
@@ -36,6 +41,83 @@ class VariantsGeneratorTests(SpellbookTestCaseWithSeeding):
                     self.assertTrue(card_set.issuperset(feature_replacement.card_ids.distinct_elements()))
                     self.assertTrue(template_set.issuperset(feature_replacement.template_ids.distinct_elements()))
 
+    def test_get_variants_from_graph_logs_join_statistics(self):
+        logs = list[str]()
+        get_variants_from_graph(data=Data(), log=logs.append)
+        self.assertTrue(any(line.startswith('Variant set joins: ') and 'pruned' in line for line in logs))
+
+    def test_get_variants_from_graph_with_condensed_evaluation(self):
+        expected = get_variants_from_graph(data=Data())
+        logs = list[str]()
+        with mock.patch.dict('os.environ', {EVALUATION_ENV_VAR: 'condensed'}):
+            result = get_variants_from_graph(data=Data(), log=logs.append)
+        self.assertEqual(result.keys(), expected.keys())
+        for id, variant_definition in result.items():
+            self.assertEqual(variant_definition.card_ids, expected[id].card_ids)
+            self.assertEqual(variant_definition.template_ids, expected[id].template_ids)
+            self.assertEqual(variant_definition.of_ids, expected[id].of_ids)
+        self.assertTrue(any(line.startswith('Evaluating the graph') for line in logs))
+
+    def test_get_variants_from_graph_with_variant_set_cache(self):
+        data = Data()
+        fingerprints = compute_fingerprints(data)
+        expected = get_variants_from_graph(data=data)
+        with TemporaryDirectory() as directory, mock.patch.dict(os.environ, {CACHE_DIR_ENV_VAR: directory}):
+            first_logs = list[str]()
+            first = get_variants_from_graph(data=data, log=first_logs.append, fingerprints=fingerprints)
+            self.assertTrue(os.listdir(directory))
+            second_logs = list[str]()
+            second = get_variants_from_graph(data=Data(), log=second_logs.append, fingerprints=fingerprints)
+        self.assertTrue(any(line.startswith('Loaded 0 of') for line in first_logs))
+        self.assertTrue(any(line.startswith('Loaded ') and not line.startswith('Loaded 0 of') for line in second_logs))
+        for result in (first, second):
+            self.assertEqual(result.keys(), expected.keys())
+            for id, variant_definition in result.items():
+                self.assertEqual(variant_definition.card_ids, expected[id].card_ids)
+                self.assertEqual(variant_definition.template_ids, expected[id].template_ids)
+                self.assertEqual(variant_definition.of_ids, expected[id].of_ids)
+
+    def test_get_variants_from_graph_resumes_from_a_checkpoint(self):
+        data = Data()
+        expected = get_variants_from_graph(data=data)
+        with TemporaryDirectory() as directory:
+            get_variants_from_graph(data=data, checkpoint=open_checkpoint(directory, 'job', 'plan'))
+            path = open_checkpoint(directory, 'job', 'plan').path
+            chunks = sorted(os.listdir(path))
+            self.assertEqual(len(chunks), len(data.generator_combos))
+            # every chunk completed, so nothing is computed again
+            logs = list[str]()
+            with mock.patch.object(variants_generator, '_build_definitions_from_variant_set', side_effect=AssertionError('computed again')):
+                resumed = get_variants_from_graph(data=Data(), log=logs.append, checkpoint=open_checkpoint(directory, 'job', 'plan'))
+            self.assertIn(f'Resumed {len(data.generator_combos)} combos from the checkpoint of an interrupted run.', logs)
+            # only the chunks that were lost are computed again
+            for chunk in chunks[len(chunks) // 2:]:
+                os.unlink(os.path.join(path, chunk))
+            partially_resumed = get_variants_from_graph(data=Data(), checkpoint=open_checkpoint(directory, 'job', 'plan'))
+            self.assertEqual(len(os.listdir(path)), len(chunks))
+        for result in (resumed, partially_resumed):
+            self.assertEqual(result.keys(), expected.keys())
+            for id, variant_definition in result.items():
+                self.assertEqual(variant_definition.card_ids, expected[id].card_ids)
+                self.assertEqual(variant_definition.template_ids, expected[id].template_ids)
+                self.assertEqual(variant_definition.of_ids, expected[id].of_ids)
+                self.assertEqual(variant_definition.feature_replacements.keys(), expected[id].feature_replacements.keys())
+
+    def test_generation_clears_its_checkpoint_on_success(self):
+        with TemporaryDirectory() as directory, mock.patch.dict(os.environ, {CHECKPOINT_DIR_ENV_VAR: directory}):
+            with mock.patch.object(variants_generator, '_perform_bulk_saves', side_effect=RuntimeError('evicted')):
+                with self.assertRaises(RuntimeError):
+                    generate_variants(job='a-job')
+            self.assertTrue(os.listdir(directory))
+            # the retry of a failed job is another job, which resumes all the same
+            logs = list[str]()
+            self.assertEqual(generate_variants(job='the-retry', log=logs.append), (self.expected_variant_count, 0, 0))
+            self.assertTrue(any(line.startswith('Resumed ') for line in logs))
+            self.assertEqual(os.listdir(directory), [])
+            # without a job there is nothing to resume
+            self.assertEqual(generate_variants(), (0, 0, 0))
+            self.assertEqual(os.listdir(directory), [])
+
     def test_subtract_features(self):
         c = Combo.objects.create(mana_needed='{W}', status=Combo.Status.UTILITY)
         c.cardincombo_set.create(card_id=self.c1_id, order=1, zone_locations=ZoneLocation.BATTLEFIELD)
@@ -261,6 +343,39 @@ class VariantsGeneratorTests(SpellbookTestCaseWithSeeding):
         # while a newly built one starts over without it
         self.assertEqual(ReplacementContext.build(data, replacements, [combo], {}).apply('unknown here: [[XYZ]]'), 'unknown here: [[XYZ]]')
 
+    def test_replacement_contexts_are_shared(self):
+        combo = Combo.objects.create(status=Combo.Status.UTILITY)
+        feature = FeatureWithAttributes(Feature.objects.get(id=self.f1_id), frozenset())
+        replacements = {feature: [([Card.objects.get(id=self.c1_id)], []), ([Card.objects.get(id=self.c2_id)], [])]}
+        data = Data()
+        first = ReplacementContext.build(data, replacements, [combo], {})
+        self.assertEqual(first.apply('[[FA|XYZ]] and [[FA$2]]'), 'A A and B B')
+        self.assertEqual(first.apply('[[FA$2]] or [[XYZ]]'), 'B B or A A')
+        second = ReplacementContext.build(data, replacements, [combo], {})
+        self.assertIsNot(second, first)
+        self.assertIs(second.base, first.base)
+        # the aliases of a variant stay with it
+        self.assertEqual(second.apply('[[XYZ]]'), '[[XYZ]]')
+        # while a text without aliases is rendered once for all of them
+        self.assertEqual(second.apply('[[FA$2]] or [[XYZ]]'), 'B B or [[XYZ]]')
+        self.assertIn(('[[FA$2]] or [[XYZ]]', None), first.rendered)
+        self.assertEqual(first.apply('[[FA$2]] or [[XYZ]]'), 'B B or A A')
+        self.assertEqual(second.apply('[[FA]] and [[FA$2]]', combo.id), 'A A and B B')
+        self.assertEqual(first.rendered[('[[FA]] and [[FA$2]]', None)], 'A A and B B')
+        # a postfix alias never grows the lists shared with the other variants
+        third = ReplacementContext.build(data, replacements, [combo], {})
+        self.assertEqual(third.apply('[[FA|XYZ]] [[FA$2|XYZ]] [[XYZ$3]]'), 'A A B B B B')
+        self.assertEqual(third.apply('[[FA$3]]'), '[[FA$3]]')
+        self.assertEqual(len(first.base['FA']), 2)
+        # other ingredients, faces or positions build another context
+        for other in (
+            ReplacementContext.build(data, {feature: replacements[feature][:1]}, [combo], {}),
+            ReplacementContext.build(data, replacements, [combo], {self.c1_id: 1}),
+            ReplacementContext.build(data, replacements, [combo], {}, card_positions={self.c2_id: 1, self.c1_id: 2}),
+        ):
+            self.assertIsNot(other.base, first.base)
+        self.assertEqual(ReplacementContext.build(data, replacements, [combo], {}, card_positions={self.c2_id: 1, self.c1_id: 2}).apply('[[FA$1]]'), 'B B')
+
     def test_replacement_order_follows_needed_features(self):
         landfall = FeatureAttribute.objects.create(name='Landfall')
         untapper = FeatureAttribute.objects.create(name='Untapper Effect')
@@ -958,6 +1073,86 @@ class IncrementalGenerationTests(SpellbookTestCaseWithSeeding):
         generate_variants(combo.id)
         self.assertEqual(VariantGenerationFingerprints.objects.count(), 0)
 
+    def test_generation_stores_the_combo_costs(self):
+        generate_variants()
+        costs = load_combo_costs()
+        self.assertEqual(costs.keys(), {combo.id for combo in Combo.objects.filter(status=Combo.Status.GENERATOR)})
+        self.assertTrue(all(cost.seconds >= 0 and cost.variant_count >= 0 for cost in costs.values()))
+        self.assertGreater(sum(cost.variant_count for cost in costs.values()), 0)
+        self.assertEqual(VariantGenerationComboCost.objects.count(), len(costs))
+        self.assertEqual(set(VariantGenerationFingerprints.objects.values_list('kind', flat=True)), {'meta', 'card', 'template', 'feature', 'combo'})
+        combo: Combo = Combo.objects.filter(status=Combo.Status.GENERATOR).first()  # type: ignore
+        combo.delete()
+        generate_variants(incremental=True)
+        self.assertNotIn(combo.id, load_combo_costs())
+
+    def test_generation_logs_the_memory_held_by_each_table(self):
+        logs = list[str]()
+        generate_variants(log=logs.append)
+        self.assertIn(f'Loaded {Card.objects.count()} cards rows', '\n'.join(logs))
+        self.assertTrue(any(line.startswith('Loaded ') and line.endswith(' MiB.') and ' cardincombos rows' in line for line in logs))
+
+    def test_generation_reads_no_deferred_column(self):
+        Variant.objects.all().delete()
+        with mock.patch.object(Card, 'refresh_from_db', side_effect=AssertionError('a card column was loaded lazily')), \
+                mock.patch.object(Template, 'refresh_from_db', side_effect=AssertionError('a template column was loaded lazily')), \
+                mock.patch.object(Feature, 'refresh_from_db', side_effect=AssertionError('a feature column was loaded lazily')):
+            generate_variants()
+        self.assertGreater(Variant.objects.count(), 0)
+        card = Data().id_to_card[self.c1_id]
+        self.assertIn('image_uri_front_png', card.get_deferred_fields())
+        self.assertNotIn('type_line', card.get_deferred_fields())
+
+    def test_resolve_batch_size(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(resolve_batch_size())
+        with mock.patch.dict(os.environ, {BATCH_SIZE_ENV_VAR: ' 500 '}):
+            self.assertEqual(resolve_batch_size(), 500)
+        for configured in ('0', '-3', 'many'):
+            with self.subTest(configured=configured), mock.patch.dict(os.environ, {BATCH_SIZE_ENV_VAR: configured}):
+                self.assertRaises(ValueError, resolve_batch_size)
+
+    def test_spooled_definitions_match_the_merged_ones(self):
+        data = Data()
+        expected = get_variants_from_graph(data=data)
+        with DefinitionSpool() as spool:
+            emit_variants_from_graph(data, spool.add)
+            self.assertEqual(len(spool), len(expected))
+            self.assertEqual(dict(spool.definitions()), expected)
+
+    def test_pipelined_generation_matches_the_default_one(self):
+        logs = list[str]()
+        with mock.patch.dict(os.environ, {BATCH_SIZE_ENV_VAR: '2'}):
+            added, restored, deleted = generate_variants(log=logs.append)
+        self.assertEqual((added, restored, deleted), (self.expected_variant_count, 0, 0))
+        self.assertIn(f'Saved {self.expected_variant_count}/{self.expected_variant_count} variants.', logs)
+        # A default generation over the pipelined result must be a no-op
+        self.assertEqual(generate_variants(), (0, 0, 0))
+        Variant.objects.update(status=Variant.Status.RESTORE)
+        Combo.objects.filter(status=Combo.Status.GENERATOR).order_by('id').first().delete()  # type: ignore
+        expected_count = len(get_variants_from_graph(data=Data()))
+        with mock.patch.dict(os.environ, {BATCH_SIZE_ENV_VAR: '3'}):
+            added, restored, deleted = generate_variants(incremental=True)
+        self.assertEqual(added, 0)
+        self.assertEqual(restored, expected_count)
+        self.assertEqual(deleted, self.expected_variant_count - expected_count)
+        self.assertEqual(Variant.objects.count(), expected_count)
+        self.assertEqual(generate_variants(), (0, 0, 0))
+
+    def test_pipelined_generation_failing_halfway_saves_no_batch(self):
+        saves = mock.Mock(side_effect=[None, RuntimeError('second batch failed')])
+
+        def perform_bulk_saves(*args, **kwargs):
+            saves()
+            return _perform_bulk_saves(*args, **kwargs)
+        with mock.patch.dict(os.environ, {BATCH_SIZE_ENV_VAR: '2'}), mock.patch.object(variants_generator, '_perform_bulk_saves', perform_bulk_saves):
+            self.assertRaises(RuntimeError, generate_variants)
+        self.assertEqual(saves.call_count, 2)
+        self.assertEqual(Variant.objects.count(), 0)
+        self.assertEqual(CardInVariant.objects.count(), 0)
+        self.assertEqual(VariantOfCombo.objects.count(), 0)
+        self.assertEqual(generate_variants(), (self.expected_variant_count, 0, 0))
+
     def _generate_capturing_metadata(self, **kwargs) -> dict[str, object]:
         captured = dict[str, object]()
         generate_variants(metadata=lambda key, value: captured.__setitem__(key, value), **kwargs)
@@ -1010,6 +1205,20 @@ class ParallelGenerationTests(SpellbookTestCaseWithSeeding):
             added, restored, deleted = generate_variants()
         self.assertEqual((added, restored, deleted), (0, 0, 0))
 
+    @skipUnless(parallelism_is_available(), 'parallel generation requires the fork start method and a non-daemonic process')
+    def test_parallel_generation_reports_its_efficiency(self):
+        captured = dict[str, object]()
+        combo_costs = dict[int, ComboCost]()
+        data = Data()
+        with mock.patch.object(variants_generator, 'MIN_COMBOS_FOR_PARALLELISM', 1):
+            parallel = get_variants_from_graph(data=data, workers=2, metadata=captured.__setitem__, combo_costs=combo_costs)
+        self.assertEqual(parallel, get_variants_from_graph(data=data, workers=1))
+        self.assertEqual(combo_costs.keys(), {combo.id for combo in data.generator_combos})
+        efficiency = captured['graph_parallel_efficiency']
+        assert isinstance(efficiency, float)
+        self.assertGreaterEqual(efficiency, 0)
+        self.assertLessEqual(efficiency, 1)
+
 
 class ParallelGenerationOverACycleTests(SpellbookTestCase):
     '''One graph is shared by every generator combo of a group, and the two paths take its combos in a
@@ -0,0 +1,58 @@
+from spellbook.models import Card, DataVersion
+from spellbook.views.card_index import CardIndex, card_index
+from ..testing import SpellbookTestCaseWithSeeding
+
+
+class CardIndexTests(SpellbookTestCaseWithSeeding):
+    def test_lookups(self):
+        index = CardIndex([
+            (3, 'Fire // Ice', 'UR', False),
+            (1, 'Ice', 'U', True),
+            (2, 'Bonecrusher Giant // Stomp', 'R', True),
+        ])
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.card_id('fire // ice'), 3)
+        self.assertEqual(index.card_id('fire'), 3)
+        self.assertEqual(index.card_id('ice'), 1)
+        self.assertEqual(index.card_id('stomp'), 2)
+        self.assertIsNone(index.card_id('Fire'))
+        self.assertIsNone(index.card_id('fir'))
+        self.assertIsNone(index.card_id('zzz'))
+        self.assertIn(2, index)
+        self.assertNotIn(4, index)
+        self.assertEqual(index.identity(3), 'UR')
+        self.assertEqual(index.identity(1), 'U')
+        self.assertIsNone(index.identity(0))
+        self.assertTrue(index.is_commander(1))
+        self.assertFalse(index.is_commander(3))
+        self.assertFalse(index.is_commander(4))
+
+    def test_empty(self):
+        index = CardIndex([])
+        self.assertEqual(len(index), 0)
+        self.assertIsNone(index.card_id('a'))
+        self.assertNotIn(1, index)
+
+    def test_card_index_follows_the_cards(self):
+        index = card_index()
+        self.assertEqual(len(index), Card.objects.count())
+        card = Card.objects.get(pk=self.c1_id)
+        self.assertEqual(index.card_id(card.name.lower()), card.id)
+        self.assertEqual(index.identity(card.id), card.identity)
+        self.assertEqual(index.is_commander(card.id), card.is_commander)
+        with self.assertNumQueries(1):
+            self.assertIs(card_index(), index)
+        card_name = card.name.lower()
+        card.name = 'Renamed Card'
+        card.save()
+        renamed_index = card_index()
+        self.assertIsNot(renamed_index, index)
+        self.assertEqual(renamed_index.card_id('renamed card'), card.id)
+        self.assertIsNone(renamed_index.card_id(card_name))
+        Card.objects.filter(pk=card.id).update(name='Silently Renamed Card')
+        self.assertIs(card_index(), renamed_index)
+        DataVersion.bump(DataVersion.CARDS)
+        self.assertEqual(card_index().card_id('silently renamed card'), card.id)
+        new_card = Card.objects.create(name='New Card // Its Back', identity='B', legal_commander=True, spoiler=False, type_line='Creature // Sorcery')
+        self.assertEqual(card_index().card_id('its back'), new_card.id)
+        self.assertEqual(card_index().identity(new_card.id), 'B')
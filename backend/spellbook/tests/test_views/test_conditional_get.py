@@ -0,0 +1,102 @@
+from django.contrib.auth.models import Permission
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+from spellbook.models import Card, DataVersion, Variant
+from website.models import WebsiteProperty, COMBO_OF_THE_DAY_PROPERTY, FEATURED_SET_CODES_PROPERTIES
+from ..testing import SpellbookTestCaseWithSeeding
+
+
+class ConditionalGetTests(SpellbookTestCaseWithSeeding):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.generate_and_publish_variants()
+        DataVersion.bump(DataVersion.CATALOG)
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers=headers, follow=True)  # type: ignore
+
+    def test_every_read_endpoint_has_an_etag(self):
+        for basename in ('variants', 'cards', 'templates', 'features', 'variant-aliases'):
+            with self.subTest(basename=basename):
+                response = self.get(reverse(f'{basename}-list'))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertRegex(response['ETag'], r'^"[0-9a-f]{64}"$')
+                self.assertIn('Last-Modified', response)
+
+    def test_if_none_match(self):
+        url = reverse('variants-list')
+        etag = self.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.get(url, if_none_match=f'W/{etag}').status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.get(url, if_none_match='"other"').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get(url + '?limit=1', if_none_match=etag).status_code, status.HTTP_200_OK)
+
+    def test_catalog_changes_change_the_etag(self):
+        url = reverse('cards-list')
+        etag = self.get(url)['ETag']
+        self.assertEqual(self.get(url)['ETag'], etag)
+        card = Card.objects.first()
+        assert card is not None
+        card.save()
+        response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_bumping_replaces_every_stamp_at_once(self):
+        before = DataVersion.stamp(DataVersion.CATALOG)
+        assert before is not None
+        with self.assertNumQueries(1):
+            DataVersion.bump(DataVersion.CATALOG, DataVersion.REFERENCE)
+        after = DataVersion.stamp(DataVersion.CATALOG)
+        assert after is not None
+        self.assertNotEqual(after[0], before[0])
+        self.assertGreater(after[1], before[1])
+        self.assertIsNotNone(DataVersion.current(DataVersion.REFERENCE))
+        self.assertEqual(DataVersion.objects.filter(kind=DataVersion.CATALOG).count(), 1)
+
+    def test_featured_set_codes_change_the_etag(self):
+        url = reverse('variants-list') + '?q=is:featured'
+        etag = self.get(url)['ETag']
+        WebsiteProperty.objects.update_or_create(key=COMBO_OF_THE_DAY_PROPERTY, defaults={'value': '1'})
+        self.assertEqual(self.get(url)['ETag'], etag)
+        WebsiteProperty.objects.update_or_create(key=FEATURED_SET_CODES_PROPERTIES[0], defaults={'value': 'abc'})
+        self.assertNotEqual(self.get(url)['ETag'], etag)
+
+    def test_detail(self):
+        card = Card.objects.first()
+        assert card is not None
+        url = reverse('cards-detail', args=[card.id])
+        response = self.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get(url, if_none_match=response['ETag']).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.get(url, if_modified_since=response['Last-Modified']).status_code, status.HTTP_304_NOT_MODIFIED)
+        card.save()
+        card.refresh_from_db()
+        response = self.get(url, if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stamp = DataVersion.stamp(DataVersion.CATALOG)
+        assert stamp is not None
+        self.assertEqual(response['Last-Modified'], http_date(max(card.updated, stamp[1]).timestamp()))
+
+    def test_missing_detail(self):
+        response = self.get(reverse('cards-detail', args=[0]), if_none_match='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', response)
+        self.assertEqual(self.get(reverse('cards-detail', args=['not-an-id'])).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_editors_have_their_own_etags(self):
+        Variant.objects.filter(pk=Variant.objects.first().pk).update(status=Variant.Status.DRAFT)  # type: ignore
+        url = reverse('variants-list')
+        etag = self.get(url)['ETag']
+        self.user.user_permissions.add(Permission.objects.get(codename='change_variant'))
+        self.client.force_login(self.user)
+        response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,95 @@
+import json
+from django.contrib.auth.models import Permission
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from django.db.models import Count
+from spellbook.models import DataVersion, Variant
+from spellbook.views.response_cache import variants_list_cache
+from ..testing import SpellbookTestCaseWithSeeding
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'response-cache-tests'},
+    },
+)
+class VariantsListCacheTests(SpellbookTestCaseWithSeeding):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.generate_and_publish_variants()
+
+    def setUp(self):
+        super().setUp()
+        variants_list_cache.cache.clear()
+
+    def get(self, **query_params):
+        response = self.client.get(reverse('variants-list'), query_params=query_params, follow=True)  # type: ignore
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_repeated_requests_hit(self):
+        first = self.get(q='card:a', limit=2)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(1):
+            second = self.get(q='card:a', limit=2)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(json.loads(second.content), json.loads(first.content))
+        self.assertDictEqual(variants_list_cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_parameters_are_normalized(self):
+        self.get(q='card:a', limit=1, count='true')
+        self.assertEqual(self.get(q='  card:a ', limit=1, count='TRUE')['X-Cache'], 'HIT')
+        self.assertEqual(self.get(q='card:a', limit=1, count='true', offset=1)['X-Cache'], 'MISS')
+        self.assertEqual(self.get(q='card:a', limit=1)['X-Cache'], 'MISS')
+        self.assertEqual(self.get(q='card:a', limit=1, ordering='card_count')['X-Cache'], 'MISS')
+        self.assertEqual(self.get(q='card:a', limit=1, ordering=' card_count')['X-Cache'], 'HIT')
+        self.assertEqual(self.get(q='card:a', limit=1, group_by_combo='true')['X-Cache'], 'MISS')
+        self.assertEqual(self.get(q='card:a', limit=1, group_by_combo='1')['X-Cache'], 'HIT')
+
+    def test_links_follow_the_request(self):
+        self.get(limit=1)
+        response = self.get(limit=1, other='x')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        result = json.loads(response.content)
+        self.assertIn('other=x', result['next'])
+        self.assertIn('offset=1', result['next'])
+
+    def test_random_ordering_is_not_cached(self):
+        self.assertNotIn('X-Cache', self.get(ordering='?'))
+        self.assertNotIn('X-Cache', self.get(ordering='-?'))
+
+    def test_editors_have_their_own_entries(self):
+        Variant.objects.filter(pk=Variant.objects.first().pk).update(status=Variant.Status.DRAFT)  # type: ignore
+        DataVersion.bump(DataVersion.CATALOG)
+        public = self.get()
+        self.user.user_permissions.add(Permission.objects.get(codename='change_variant'))
+        self.client.force_login(self.user)
+        editor = self.get()
+        self.assertEqual(editor['X-Cache'], 'MISS')
+        self.assertGreater(len(json.loads(editor.content)['results']), len(json.loads(public.content)['results']))
+
+    def test_catalog_changes_invalidate(self):
+        self.get()
+        self.assertEqual(self.get()['X-Cache'], 'HIT')
+        DataVersion.bump(DataVersion.CATALOG)
+        self.assertEqual(self.get()['X-Cache'], 'MISS')
+        self.assertEqual(self.get()['X-Cache'], 'HIT')
+        variant = Variant.objects.first()
+        assert variant is not None
+        variant.save()
+        self.assertEqual(self.get()['X-Cache'], 'MISS')
+
+    def test_bulk_status_changes_invalidate(self):
+        variant = Variant.objects.alias(of_count=Count('of')).filter(of_count=1).first()
+        assert variant is not None
+        self.get()
+        self.assertEqual(self.get()['X-Cache'], 'HIT')
+        # the variants generated by the deleted combo alone are set to be restored in bulk
+        variant.of.get().delete()
+        self.assertEqual(Variant.objects.get(pk=variant.pk).status, Variant.Status.RESTORE)
+        response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertNotIn(variant.id, [result['id'] for result in json.loads(response.content)['results']])
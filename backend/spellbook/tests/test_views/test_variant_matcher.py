@@ -0,0 +1,73 @@
+import random
+from spellbook.models import Card, Variant, CardInVariant
+from spellbook.variants.multiset import FrozenMultiset
+from spellbook.views.utils import Deck, find_variants
+from spellbook.views.variant_matcher import VariantMatcher, variant_matcher
+from ..testing import SpellbookTestCaseWithSeeding
+
+
+class VariantMatcherTests(SpellbookTestCaseWithSeeding):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.generate_variants()
+
+    def test_matcher(self):
+        matcher = VariantMatcher(
+            variant_ids=['a', 'b', 'c', 'd'],
+            cards=[('a', 1, 1), ('a', 2, 2), ('b', 2, 1), ('b', 3, 1), ('c', 1, 1), ('x', 1, 1)],
+            templates=[('b', 1, 1), ('c', 2, 2), ('d', 1, 1)],
+        )
+        self.assertEqual(len(matcher), 4)
+        cases = [
+            ({1: 1, 2: 2}, {}, 0, ['a']),
+            ({1: 1, 2: 1}, {}, 1, ['a', 'd']),
+            ({1: 1, 2: 1}, {1: 1}, 0, ['d']),
+            ({2: 1, 3: 1}, {1: 1}, 0, ['b', 'd']),
+            ({1: 1}, {2: 1}, 1, ['c', 'd']),
+            ({}, {1: 1}, 0, ['d']),
+            ({4: 1}, {}, 0, []),
+        ]
+        for cards, templates, missing, expected in cases:
+            with self.subTest(cards=cards, templates=templates, missing=missing):
+                missing_cards = matcher.missing_cards(FrozenMultiset(cards), missing)
+                found = matcher.find(missing_cards, FrozenMultiset(templates), missing) if missing_cards else []
+                self.assertEqual(sorted(found), expected)
+
+    def test_find_variants_matches_the_recipes(self):
+        card_ids = list(Card.objects.values_list('id', flat=True))
+        recipes = {
+            variant.id: (
+                FrozenMultiset({civ.card_id: civ.quantity for civ in variant.cardinvariant_set.all()}),
+                FrozenMultiset({tiv.template_id: tiv.quantity for tiv in variant.templateinvariant_set.all()}),
+            )
+            for variant in Variant.objects.prefetch_related('cardinvariant_set', 'templateinvariant_set')
+        }
+        rng = random.Random(42)
+        for _ in range(20):
+            cards = FrozenMultiset({card_id: rng.randint(1, 2) for card_id in rng.sample(card_ids, rng.randint(0, len(card_ids)))})
+            deck = Deck(main=cards, commanders=FrozenMultiset(), identity='WUBRG')
+            for missing in (0, 1, 2):
+                with self.subTest(cards=cards, missing=missing):
+                    expected = sorted(
+                        id
+                        for id, (variant_cards, variant_templates) in recipes.items()
+                        if sum(max(quantity - cards[card_id], 0) for card_id, quantity in variant_cards.items()) + sum(max(quantity - deck.templates[template_id], 0) for template_id, quantity in variant_templates.items()) <= missing
+                    )
+                    self.assertEqual(sorted(find_variants(deck, missing)), expected)
+
+    def test_variant_matcher_follows_the_variants(self):
+        matcher = variant_matcher()
+        self.assertEqual(len(matcher), Variant.objects.count())
+        with self.assertNumQueries(1):
+            self.assertIs(variant_matcher(), matcher)
+        card_in_variant = CardInVariant.objects.filter(quantity=1).first()
+        assert card_in_variant is not None
+        card_in_variant.quantity = 2
+        card_in_variant.save()
+        self.assertIsNot(variant_matcher(), matcher)
+        matcher = variant_matcher()
+        Variant.objects.all().delete()
+        self.generate_variants()
+        self.assertIsNot(variant_matcher(), matcher)
+        self.assertEqual(len(variant_matcher()), Variant.objects.count())
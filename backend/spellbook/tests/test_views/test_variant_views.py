@@ -9,7 +9,8 @@ from common.inspection import json_to_python_lambda
 from spellbook.models import Card, Template, Feature, Variant, CardInVariant, TemplateInVariant, Combo, VariantAlias
 from spellbook.views import VariantViewSet
 from spellbook.serializers import VariantSerializer
-from spellbook.transformers.variants_query_transformer import variants_query_parser
+from spellbook.transformers.query_parsing import parse_query
+from spellbook.transformers.variants_query_transformer import PARSER, variants_query_parser
 from spellbook.views.variants import VariantGroupedByComboFilter
 from website.models import WebsiteProperty, FEATURED_SET_CODES_PROPERTIES
 from ..testing import SpellbookTestCaseWithSeeding
@@ -1290,6 +1291,32 @@ class VariantViewsTests(SpellbookTestCaseWithSeeding):
                 sql, _ = queryset.query.get_compiler(using='default').as_sql()
                 self.assertEqual(sql.count('EXISTS'), expected)
 
+    def test_variants_query_searches_ingredient_ids_on_postgresql(self):
+        # SQLite cannot run the array operators, so the lookups making up the condition are the assertion
+        def lookups(q: models.Q) -> list[str]:
+            return [
+                lookup
+                for child in q.children
+                for lookup in (lookups(child) if isinstance(child, models.Q) else [child[0] if isinstance(child, tuple) else type(child).__name__])
+            ]
+        queries = [
+            ('card:a', ['card_ids__overlap']),
+            ('-card:a', ['card_ids__overlap']),
+            ('@card:a', ['card_ids__contained_by']),
+            ('card:a card:b', ['card_ids__overlap', 'card_ids__overlap']),
+            ('card:a OR card:b', ['card_ids__overlap']),
+            ('t:creature', ['card_ids__overlap']),
+            ('template:a OR template:b', ['template_ids__overlap']),
+            ('@template:a', ['template_ids__contained_by']),
+            ('commander:a', ['commander_card_ids__overlap']),
+            ('results:a', ['Exists']),
+        ]
+        with patch('spellbook.transformers.variants_query_filters.base.connection', vendor='postgresql'), \
+                patch('spellbook.transformers.variants_query_filters.commander_search_filters.connection', vendor='postgresql'):
+            for q, expected in queries:
+                with self.subTest(f'lookups for: {q}'):
+                    self.assertEqual(lookups(parse_query(PARSER, q).to_q()), expected)
+
     def test_variants_query_rewrites_reach_spellbook_id_terms(self):
         # The alias lookup is a node rather than a subquery hidden in a Q, so two identical `sid:`
         # terms compare equal and the rewrites apply to them like any other condition.
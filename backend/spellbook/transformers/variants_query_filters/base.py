@@ -3,8 +3,10 @@ from dataclasses import dataclass, field
 from functools import reduce
 from operator import and_
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.db.models import Exists, Model, OuterRef, Q
-from spellbook.models import Card, CardInVariant, FeatureProducedByVariant, TemplateInVariant, Variant, VariantAlias
+from spellbook.models import Card, CardInVariant, FeatureProducedByVariant, Template, TemplateInVariant, Variant, VariantAlias
+from spellbook.models.fields import IdArraySubquery
 
 
 _QUOTED_OR_SHORT_VALUE_REGEX = r'"(?P<long_value>(?:[^"\\]|\\")+)"|(?P<short_value>.+)'
@@ -17,12 +19,20 @@ SHORT_QUERY_VALUE_PATTERN = re.compile(_QUOTED_OR_SHORT_VALUE_REGEX, re.IGNORECA
 CORRELATIONS: dict[type[Model], str] = {
     Variant: '',
     Card: 'cardinvariant__variant_id',
+    Template: 'templateinvariant__variant_id',
     CardInVariant: 'variant_id',
     TemplateInVariant: 'variant_id',
     FeatureProducedByVariant: 'variant_id',
     VariantAlias: 'variant_id',
 }
 
+# The id array of Variant listing the related rows of each model, which PostgreSQL searches with a GIN
+# index instead of correlating a subquery with every candidate row.
+ARRAY_COLUMNS: dict[type[Model], str] = {
+    Card: 'card_ids',
+    Template: 'template_ids',
+}
+
 
 @dataclass(frozen=True)
 class QueryValue:
@@ -75,6 +85,12 @@ class VariantQueryFilter:
     A condition on Variant itself is that predicate. A condition on any other model becomes a
     correlated EXISTS, because PostgreSQL keeps EXISTS cheap under OR and under negation while it
     degrades an `IN`/`NOT IN` subquery into a plain SubPlan re-executed for every candidate row.
+
+    On PostgreSQL a condition on a model with an id array on Variant compares that array with the ids
+    of the matching rows instead, collected once by an uncorrelated subquery: some related row matches
+    when the arrays overlap. Under an `all-` prefix the predicate is the negation of what every related
+    row must match, so "no related row fails" becomes "the array is contained in the ids that match",
+    which keeps the collected ids to the few matching rows rather than the many failing ones.
     '''
     predicate: Q
     model: type[Model] = Variant
@@ -88,6 +104,13 @@ class VariantQueryFilter:
         return VariantQueryFilter(self.predicate, self.model, not self.negated)
 
     def to_q(self) -> Q:
+        column = ARRAY_COLUMNS.get(self.model) if connection.vendor == 'postgresql' else None
+        if column is not None:
+            if self.negated and self.predicate.negated:
+                positive = Q(*self.predicate.children, _connector=self.predicate.connector)
+                return Q(**{f'{column}__contained_by': IdArraySubquery(self.model._default_manager.filter(positive).values('id'))})
+            q = Q(**{f'{column}__overlap': IdArraySubquery(self.model._default_manager.filter(self.predicate).values('id'))})
+            return ~q if self.negated else q
         match CORRELATIONS[self.model]:
             case '':
                 q = self.predicate
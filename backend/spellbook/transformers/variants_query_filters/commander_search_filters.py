@@ -1,21 +1,25 @@
-from spellbook.models import CardInVariant
+from django.db import connection
+from spellbook.models import Card, CardInVariant
+from spellbook.models.fields import IdArraySubquery
 from .base import QueryValue, VariantQuery, Q, ValidationError
 
 
-def commander_filter(qv: QueryValue) -> VariantQuery:
+def commander_name_q(qv: QueryValue, prefix: str = '') -> Q:
     match qv.operator:
         case ':':
-            q = Q(card__name__icontains=qv.value) \
-                | Q(card__name_unaccented__icontains=qv.value) \
-                | Q(card__name_unaccented_simplified__icontains=qv.value) \
-                | Q(card__name_unaccented_simplified_with_spaces__icontains=qv.value)
-            q &= Q(must_be_commander=True)
+            lookup = 'icontains'
         case '=':
-            q = Q(card__name__iexact=qv.value) \
-                | Q(card__name_unaccented__iexact=qv.value) \
-                | Q(card__name_unaccented_simplified__iexact=qv.value) \
-                | Q(card__name_unaccented_simplified_with_spaces__iexact=qv.value)
-            q &= Q(must_be_commander=True)
+            lookup = 'iexact'
         case _:
             raise ValidationError(f'Operator {qv.operator} is not supported for commander name search.')
-    return qv.to_filter(q, CardInVariant)
+    return Q(**{f'{prefix}name__{lookup}': qv.value}) \
+        | Q(**{f'{prefix}name_unaccented__{lookup}': qv.value}) \
+        | Q(**{f'{prefix}name_unaccented_simplified__{lookup}': qv.value}) \
+        | Q(**{f'{prefix}name_unaccented_simplified_with_spaces__{lookup}': qv.value})
+
+
+def commander_filter(qv: QueryValue) -> VariantQuery:
+    if connection.vendor == 'postgresql' and not qv.is_for_all_related():
+        # Searched in the commander ids of the variant, through its GIN index
+        return qv.to_filter(Q(commander_card_ids__overlap=IdArraySubquery(Card.objects.filter(commander_name_q(qv)).values('id'))))
+    return qv.to_filter(commander_name_q(qv, 'card__') & Q(must_be_commander=True), CardInVariant)
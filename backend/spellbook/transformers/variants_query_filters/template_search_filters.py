@@ -1,4 +1,4 @@
-from spellbook.models import TemplateInVariant
+from spellbook.models import Template
 from .base import QueryValue, VariantQuery, Q, ValidationError
 
 
@@ -8,9 +8,9 @@ def template_search_filter(qv: QueryValue) -> VariantQuery:
         raise ValidationError(f'Prefix {qv.prefix} is not supported for template search with numbers.')
     match qv.operator:
         case ':' if not value_is_digit:
-            return qv.to_filter(Q(template__name__icontains=qv.value), TemplateInVariant)
+            return qv.to_filter(Q(name__icontains=qv.value), Template)
         case '=' if not value_is_digit:
-            return qv.to_filter(Q(template__name__iexact=qv.value), TemplateInVariant)
+            return qv.to_filter(Q(name__iexact=qv.value), Template)
         case '<' if value_is_digit:
             return qv.to_filter(Q(template_count__lt=qv.value))
         case '>' if value_is_digit:
@@ -0,0 +1,17 @@
+# cython: language_level=3
+# cython: boundscheck=False
+# cython: wraparound=False
+# cython: cdivision=True
+# cython: initializedcheck=False
+# cython: embedsignature=True
+# cython: optimize.use_switch=True
+# cython: optimize.unpack_method_calls=True
+# cython: infer_types=True
+# cython: overflowcheck=False
+# cython: profile=False
+# cython: annotation_typing=True
+
+cimport cython
+
+# BulkWriter and CopyBulkWriter are left as plain classes: they run a handful of times per save phase,
+# and their time goes to the database rather than to the loops building the rows
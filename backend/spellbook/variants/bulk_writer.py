@@ -0,0 +1,130 @@
+from typing import Sequence
+from django.db import connection, transaction
+from django.db.models import Field, Manager, Model
+from django.db.models.expressions import DatabaseDefault, Expression
+from spellbook.models import DEFAULT_BATCH_SIZE
+from spellbook.models.mixins import PreSaveManager
+
+
+class BulkWriter:
+    '''Writes model instances in bulk through the ORM, a batch of `DEFAULT_BATCH_SIZE` per statement.'''
+
+    def create(self, manager: Manager, objs: Sequence[Model], skip_pre_save: bool = False) -> None:
+        if skip_pre_save:
+            manager.bulk_create(objs, batch_size=DEFAULT_BATCH_SIZE, skip_pre_save=True)  # type: ignore[call-arg]
+        else:
+            manager.bulk_create(objs, batch_size=DEFAULT_BATCH_SIZE)
+
+    def update(self, manager: Manager, objs: Sequence[Model], fields: Sequence[str], skip_pre_save: bool = False) -> None:
+        if skip_pre_save:
+            manager.bulk_update(objs, fields=fields, batch_size=DEFAULT_BATCH_SIZE, skip_pre_save=True)  # type: ignore[call-arg]
+        else:
+            manager.bulk_update(objs, fields=fields, batch_size=DEFAULT_BATCH_SIZE)
+
+
+class CopyBulkWriter(BulkWriter):
+    '''
+    Streams the rows with `COPY FROM STDIN` into a temporary staging table, then applies all of them
+    with a single `INSERT ... SELECT` or `UPDATE ... FROM` statement, sparing the database the parsing
+    and planning of a large statement per batch. Unlike `bulk_create`, it does not read back the
+    primary keys the database assigns. Rows it cannot stream, holding expressions, go through the ORM.
+    '''
+
+    def create(self, manager: Manager, objs: Sequence[Model], skip_pre_save: bool = False) -> None:
+        if not objs:
+            return
+        model = manager.model
+        opts = model._meta
+        if not skip_pre_save and isinstance(manager, PreSaveManager):
+            for obj in objs:
+                obj.pre_save()  # type: ignore[attr-defined]
+        without_pk = sum(obj.pk is None for obj in objs)
+        if opts.auto_field is not None and 0 < without_pk < len(objs):
+            # the ORM inserts the two kinds of rows separately
+            super().create(manager, objs, skip_pre_save=True)
+            return
+        fields = list[Field]()
+        defaults = dict[Field, object]()
+        for f in opts.concrete_fields:
+            if f.generated or f is opts.auto_field and without_pk:
+                continue
+            database_defaults = sum(isinstance(getattr(obj, f.attname), DatabaseDefault) for obj in objs)
+            if database_defaults == len(objs):
+                # left out of the insert, so that the database fills it in
+                continue
+            if database_defaults:
+                if isinstance(f.db_default, Expression):
+                    super().create(manager, objs, skip_pre_save=True)
+                    return
+                defaults[f] = f.db_default
+            fields.append(f)
+        rows = list[list[object]]()
+        for obj in objs:
+            obj._prepare_related_fields_for_save(operation_name='bulk_create')
+            row = list[object]()
+            for f in fields:
+                value = f.pre_save(obj, True)
+                if isinstance(value, DatabaseDefault):
+                    value = defaults[f]
+                elif isinstance(value, Expression):
+                    super().create(manager, objs, skip_pre_save=True)
+                    return
+                row.append(f.get_db_prep_save(value, connection))
+            rows.append(row)
+        columns = ', '.join(connection.ops.quote_name(f.column) for f in fields)
+        with transaction.atomic(), connection.cursor() as cursor:
+            staging = self._stage(cursor, opts.db_table, columns, rows)
+            cursor.execute(f'INSERT INTO {connection.ops.quote_name(opts.db_table)} ({columns}) SELECT {columns} FROM {staging}')
+            cursor.execute(f'DROP TABLE {staging}')
+        for obj in objs:
+            obj._state.adding = False
+            obj._state.db = connection.alias
+
+    def update(self, manager: Manager, objs: Sequence[Model], fields: Sequence[str], skip_pre_save: bool = False) -> None:
+        if not objs:
+            return
+        model = manager.model
+        opts = model._meta
+        if not skip_pre_save and isinstance(manager, PreSaveManager):
+            for obj in objs:
+                obj.pre_save()  # type: ignore[attr-defined]
+        updated_fields = [opts.get_field(name) for name in fields]
+        primary_key = opts.pk
+        assert primary_key is not None
+        rows = list[list[object]]()
+        for obj in objs:
+            row = [primary_key.get_db_prep_save(obj.pk, connection)]
+            for f in updated_fields:
+                value = getattr(obj, f.attname)
+                if isinstance(value, Expression):
+                    super().update(manager, objs, fields, skip_pre_save=True)
+                    return
+                row.append(f.get_db_prep_save(value, connection))
+            rows.append(row)
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(f.column) for f in (primary_key, *updated_fields))
+        assignments = ', '.join(f'{quote(f.column)} = staging.{quote(f.column)}' for f in updated_fields)
+        with transaction.atomic(), connection.cursor() as cursor:
+            staging = self._stage(cursor, opts.db_table, columns, rows)
+            cursor.execute(
+                f'UPDATE {quote(opts.db_table)} SET {assignments} FROM {staging} AS staging '
+                f'WHERE {quote(opts.db_table)}.{quote(primary_key.column)} = staging.{quote(primary_key.column)}'
+            )
+            cursor.execute(f'DROP TABLE {staging}')
+
+    def _stage(self, cursor, table: str, columns: str, rows: list[list[object]]) -> str:
+        '''Copies the rows into a new temporary table shaped like the given columns of the table, returning its name.'''
+        staging = connection.ops.quote_name(f'{table}_staging')
+        # dropped at commit at the latest, should the statements using it fail
+        cursor.execute(f'CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS SELECT {columns} FROM {connection.ops.quote_name(table)} WITH NO DATA')
+        with cursor.copy(f'COPY {staging} ({columns}) FROM STDIN') as copy:
+            for row in rows:
+                copy.write_row(row)
+        return staging
+
+
+def bulk_writer() -> BulkWriter:
+    '''Returns the writer streaming rows with `COPY` on PostgreSQL, and the ORM one on any other database.'''
+    if connection.vendor == 'postgresql':
+        return CopyBulkWriter()
+    return BulkWriter()
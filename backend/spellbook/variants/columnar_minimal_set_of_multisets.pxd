@@ -0,0 +1,43 @@
+# cython: language_level=3
+# cython: boundscheck=False
+# cython: wraparound=False
+# cython: cdivision=True
+# cython: initializedcheck=False
+# cython: embedsignature=True
+# cython: optimize.use_switch=True
+# cython: optimize.unpack_method_calls=True
+# cython: infer_types=True
+# cython: overflowcheck=False
+# cython: profile=False
+# cython: annotation_typing=True
+
+cimport cython
+
+from spellbook.variants.packed_entry cimport PackedEntry
+from spellbook.variants.minimal_set_of_multisets cimport AbstractMinimalSetOfMultisets
+
+
+cpdef bint _slice_issubset(object first, Py_ssize_t first_start, Py_ssize_t first_end, object second, Py_ssize_t second_start, Py_ssize_t second_end)
+
+
+cdef class ColumnarMinimalSetOfMultisets(AbstractMinimalSetOfMultisets):
+    cdef readonly object _values
+    cdef readonly object _offsets
+    cdef readonly object _totals
+    cdef readonly object _signatures
+    cdef bytearray _alive
+    cdef Py_ssize_t _live
+    cdef bint _has_empty
+    cdef dict _element_to_slots
+
+    cpdef _append(self, tuple packed, Py_ssize_t total, unsigned long long signature)
+    cpdef _kill(self, Py_ssize_t slot)
+    cpdef set _candidate_slots(self, PackedEntry entry)
+    cpdef PackedEntry _slot_entry(self, Py_ssize_t slot)
+    cpdef bint _slot_issubset(self, Py_ssize_t slot, PackedEntry entry)
+    cpdef bint _slot_issuperset(self, Py_ssize_t slot, PackedEntry entry)
+    cpdef _compact(self)
+    cpdef _clear(self)
+    cpdef AbstractMinimalSetOfMultisets subtree(self, PackedEntry under)
+    cpdef add(self, PackedEntry aset)
+    cpdef Py_ssize_t nbytes(self)
@@ -0,0 +1,269 @@
+from array import array
+from typing import Iterable
+from .packed_entry import PackedEntry, COUNT_LIMIT
+from .minimal_set_of_multisets import AbstractMinimalSetOfMultisets
+
+
+_EMPTY_ENTRY = PackedEntry()
+
+# Below this many slots the arena is never compacted: rebuilding it would cost more than the dead slots
+_MIN_SLOTS_TO_COMPACT = 64
+
+
+def _slice_issubset(first, first_start, first_end, second, second_start, second_end) -> bool:
+    '''
+    Merge-walks two sorted runs of packed integers, telling whether the first is a sub-multiset of the second.
+    The runs can be slices of the arena or whole packed tuples, so no entry is materialized to compare them.
+    The bounds are left unannotated for the declarations in the .pxd file to type them as C integers.
+    '''
+    i: int = first_start
+    j: int = second_start
+    while i < first_end:
+        if second_end - j < first_end - i:
+            return False
+        packed_first = first[i]
+        packed_second = second[j]
+        if packed_first == packed_second:
+            i += 1
+            j += 1
+            continue
+        element_first = packed_first // COUNT_LIMIT
+        element_second = packed_second // COUNT_LIMIT
+        if element_first == element_second:
+            if packed_first > packed_second:
+                return False
+            i += 1
+            j += 1
+        elif element_first > element_second:
+            j += 1
+        else:
+            return False
+    return True
+
+
+class ColumnarMinimalSetOfMultisets(AbstractMinimalSetOfMultisets):
+    '''
+    A minimal set of multisets storing its entries column-wise in a flat arena.
+
+    The packed integers of every entry are laid out back to back in a single int64 array,
+    delimited by an offsets array (the CSR layout), with per-slot totals, element signatures
+    (see `PackedEntry`) and liveness flags alongside. An entry therefore costs a few machine
+    words instead of a Python tuple of Python integers wrapped in a `PackedEntry`, and subset
+    checks walk the arena in place, after the signatures had their chance to reject them.
+    Removed entries leave a dead slot behind, reclaimed by compacting the arena once dead
+    slots outnumber live ones.
+
+    The element index maps each element to an int64 array of the slots of the entries
+    containing it, like the one of `MinimalSetOfMultisets` maps it to a set of entries.
+    Dead slots stay in those arrays until the next compaction, and readers skip them.
+    This class is a drop-in replacement for `MinimalSetOfMultisets`, but keeps no `PackedEntry`
+    at all: entries are materialized only when iterated.
+    '''
+
+    __slots__ = ('_values', '_offsets', '_totals', '_signatures', '_alive', '_live', '_has_empty', '_element_to_slots')
+    _values: array
+    _offsets: array
+    _totals: array
+    _signatures: array
+    _alive: bytearray
+    _live: int
+    _has_empty: bool
+    _element_to_slots: dict
+
+    def __init__(
+        self,
+        sets: Iterable[PackedEntry] | None = None,
+        _internal: Iterable[PackedEntry] | None = None,
+    ):
+        '''
+        Initializes a new columnar minimal set of multisets.
+
+        Args:
+            sets (Iterable[PackedEntry] | None): Optional initial sets to be added to the collection,
+            discarding all sets that are supersets of other sets in the collection.
+            _internal (Iterable[PackedEntry] | None): Already-minimal sets adopted without dominance checks.
+        '''
+        self._values = array('q')
+        self._offsets = array('q', (0,))
+        self._totals = array('q')
+        self._signatures = array('Q')
+        self._alive = bytearray()
+        self._live = 0
+        self._has_empty = False
+        self._element_to_slots = {}
+        if _internal is not None:
+            for entry in _internal:
+                if entry:
+                    self._append(entry._packed, entry._total, entry.signature())
+                else:
+                    self._has_empty = True
+        if sets is not None:
+            self.extend(sets)
+
+    def _append(self, packed: tuple, total, signature):
+        slot = len(self._alive)
+        self._values.extend(packed)
+        self._offsets.append(len(self._values))
+        self._totals.append(total)
+        self._signatures.append(signature)
+        self._alive.append(1)
+        self._live += 1
+        element_to_slots = self._element_to_slots
+        for packed_item in packed:
+            element = packed_item // COUNT_LIMIT
+            bucket = element_to_slots.get(element)
+            if bucket is None:
+                element_to_slots[element] = array('q', (slot,))
+            else:
+                bucket.append(slot)
+
+    def _kill(self, slot):
+        # the slot stays in the buckets of the index until the next compaction
+        self._alive[slot] = 0
+        self._live -= 1
+
+    def _candidate_slots(self, entry: PackedEntry) -> set:
+        '''
+        Returns the live slots sharing at least one element with the given entry.
+        '''
+        candidates = set()
+        element_to_slots = self._element_to_slots
+        alive = self._alive
+        for element in entry.distinct_elements():
+            bucket = element_to_slots.get(element)
+            if bucket is not None:
+                for slot in bucket:
+                    if alive[slot]:
+                        candidates.add(slot)
+        return candidates
+
+    def _slot_entry(self, slot) -> PackedEntry:
+        return PackedEntry(tuple(self._values[self._offsets[slot]:self._offsets[slot + 1]]))
+
+    def _slot_issubset(self, slot, entry: PackedEntry) -> bool:
+        packed = entry._packed
+        start = self._offsets[slot]
+        end = self._offsets[slot + 1]
+        if end - start > len(packed) or self._totals[slot] > entry._total or self._signatures[slot] & ~entry.signature():
+            return False
+        return _slice_issubset(self._values, start, end, packed, 0, len(packed))
+
+    def _slot_issuperset(self, slot, entry: PackedEntry) -> bool:
+        packed = entry._packed
+        start = self._offsets[slot]
+        end = self._offsets[slot + 1]
+        if len(packed) > end - start or entry._total > self._totals[slot] or entry.signature() & ~self._signatures[slot]:
+            return False
+        return _slice_issubset(packed, 0, len(packed), self._values, start, end)
+
+    def _compact(self):
+        '''
+        Rebuilds the arena keeping only its live slots, renumbering them in order.
+        '''
+        values = self._values
+        offsets = self._offsets
+        totals = self._totals
+        signatures = self._signatures
+        alive = self._alive
+        self._clear()
+        for slot in range(len(alive)):
+            if alive[slot]:
+                self._append(tuple(values[offsets[slot]:offsets[slot + 1]]), totals[slot], signatures[slot])
+
+    def _clear(self):
+        self._values = array('q')
+        self._offsets = array('q', (0,))
+        self._totals = array('q')
+        self._signatures = array('Q')
+        self._alive = bytearray()
+        self._live = 0
+        self._element_to_slots = {}
+
+    def subtree(self, under: PackedEntry) -> 'ColumnarMinimalSetOfMultisets':
+        '''
+        Creates a new minimal set of multisets containing all sets in the collection that are subsets of the given set.
+        '''
+        result = ColumnarMinimalSetOfMultisets()
+        result._has_empty = self._has_empty
+        values = self._values
+        offsets = self._offsets
+        signatures = self._signatures
+        signature = under.signature()
+        for slot in sorted(self._candidate_slots(under)):
+            if not signatures[slot] & ~signature and self._slot_issubset(slot, under):
+                result._append(tuple(values[offsets[slot]:offsets[slot + 1]]), self._totals[slot], signatures[slot])
+        return result
+
+    def add(self, aset: PackedEntry):
+        '''
+        Adds a set to the collection if it is not a superset of any set in the collection.
+        If the set is a subset of any set in the collection, every superset of the set is removed,
+        and the set is added to the collection.
+        '''
+        if self._has_empty:
+            return
+        if not aset:
+            self._clear()
+            self._has_empty = True
+            return
+        candidates = self._candidate_slots(aset)
+        for slot in candidates:
+            if self._slot_issubset(slot, aset):
+                return
+        for slot in candidates:
+            if self._slot_issuperset(slot, aset):
+                self._kill(slot)
+        self._append(aset._packed, aset._total, aset.signature())
+        slots = len(self._alive)
+        if slots >= _MIN_SLOTS_TO_COMPACT and self._live * 2 < slots:
+            self._compact()
+
+    def nbytes(self) -> int:
+        '''
+        Returns the bytes held by the arena buffers, excluding the element index.
+        '''
+        nbytes = len(self._alive)
+        for buffer in (self._values, self._offsets, self._totals, self._signatures):
+            nbytes += buffer.itemsize * len(buffer)
+        return nbytes
+
+    def __iter__(self):
+        if self._has_empty:
+            yield _EMPTY_ENTRY
+        alive = self._alive
+        for slot in range(len(alive)):
+            if alive[slot]:
+                yield self._slot_entry(slot)
+
+    def __len__(self):
+        return self._live + (1 if self._has_empty else 0)
+
+    def __contains__(self, aset: PackedEntry):
+        if not aset:
+            return self._has_empty
+        bucket = self._element_to_slots.get(aset._packed[0] // COUNT_LIMIT)
+        if bucket is None:
+            return False
+        packed = aset._packed
+        values = self._values
+        offsets = self._offsets
+        alive = self._alive
+        for slot in bucket:
+            if alive[slot] and offsets[slot + 1] - offsets[slot] == len(packed) and tuple(values[offsets[slot]:offsets[slot + 1]]) == packed:
+                return True
+        return False
+
+    def __repr__(self):
+        return f'ColumnarMinimalSetOfMultisets({set(self)})'
+
+    def __copy__(self):
+        result = ColumnarMinimalSetOfMultisets()
+        result._values = array('q', self._values)
+        result._offsets = array('q', self._offsets)
+        result._totals = array('q', self._totals)
+        result._signatures = array('Q', self._signatures)
+        result._alive = bytearray(self._alive)
+        result._live = self._live
+        result._has_empty = self._has_empty
+        result._element_to_slots = {element: array('q', bucket) for element, bucket in self._element_to_slots.items()}
+        return result
@@ -27,17 +27,13 @@ cdef class Node:
     cdef Graph _graph
     cdef readonly object item
     cdef Py_hash_t _hash
-    cdef object _state
-    cdef object _subgraph_state
 
-    cpdef _reset_state(self)
-    cpdef _reset_subgraph_state(self)
     cpdef _reset_filtered_variant_set(self)
     cpdef _reset_filtered_replacement_variant_set(self)
 
 
 cdef class NodeWithState(Node):
-    pass
+    cdef Py_ssize_t _index
 
 
 cdef class NodeWithoutState(Node):
@@ -80,11 +76,12 @@ cdef class ComboNode(NodeWithState):
     cdef readonly dict features_needed_for_replacements
 
 
-cpdef bint satisfies(object produced, object needed)
+cpdef list node_dependencies(NodeWithState node)
 
 
 cdef class Graph:
     cdef readonly Py_ssize_t variant_limit
+    cdef readonly object evaluation
     cdef public VariantSetParameters variant_set_parameters
     cdef VariantSet _empty_variant_set
     cdef public bint subgraph
@@ -92,16 +89,31 @@ cdef class Graph:
     cdef readonly dict card_nodes
     cdef readonly dict template_nodes
     cdef readonly dict combo_nodes
-    cdef set _to_reset_nodes_state
-    cdef set _to_reset_nodes_subgraph_state
+    cdef bytearray _states
+    cdef bytearray _subgraph_states
+    cdef bytes _not_visited_states
     cdef set _to_reset_nodes_filtered_variant_set
     cdef set _to_reset_nodes_filtered_replacement_variant_set
+    cdef list _ingredient_nodes
+    cdef list _nodes_with_state
+    cdef dict _variant_set_caches
+    cdef list _components
+    cdef dict _component_of
+    cdef bytearray _evaluated_components
+    cdef object _results_cache
 
     cpdef _mark_nodes_with_differing_replacements(self)
+    cpdef _build_ingredient_variant_sets(self)
     cpdef _reset(self)
     cpdef list results(self, VariantSet variant_set)
+    cpdef object result(self, FrozenMultiset cards, FrozenMultiset templates)
+    cpdef list strongly_connected_components(self)
+    cpdef _condense(self)
+    cpdef _evaluate_components(self, list combos)
+    cpdef _evaluate_component(self, Py_ssize_t index)
+    cpdef tuple _evaluate_node(self, NodeWithState node)
     cpdef tuple _combo_nodes_down(self, ComboNode combo)
     cpdef tuple _feature_with_attribute_matchers_nodes_down(self, FeatureWithAttributesMatcherNode feature)
     cpdef tuple _feature_with_attributes_nodes_down(self, FeatureWithAttributesNode feature)
     cpdef set _uncountable_feature_blockers(self, ComboNode combo, set available)
-    cpdef set _countable_feature_blockers(self, ComboNode combo, dict available)
+    cpdef set _countable_feature_blockers(self, ComboNode combo, dict available, dict matcher_totals)
@@ -1,11 +1,12 @@
+import os
 from typing import Mapping, Iterable
-from collections import deque, defaultdict, Counter
+from collections import deque, defaultdict, Counter, OrderedDict
 from .multiset import FrozenMultiset, Multiset
 from itertools import chain
 from enum import Enum
 from dataclasses import dataclass
-from spellbook.models import Card, Feature, FeatureNeededInCombo, FeatureOfCard, Combo, Template
-from .variant_data import AttributesMatcher, Data
+from spellbook.models import Card, Feature, Combo, Template
+from .variant_data import AttributesMatcher, Data, FeatureNeededInComboRow, FeatureOfCardRow
 from .variant_set import VariantSet, VariantSetParameters, cardid, templateid
 
 
@@ -15,6 +16,41 @@ class NodeState(Enum):
     VISITED = 2
 
 
+# The states by value, as the graph keeps them in its state arrays
+_NODE_STATES = tuple(NodeState)
+
+
+class GraphEvaluation(Enum):
+    '''How the graph computes the variant sets of its nodes.
+
+    DEPTH_FIRST walks down from each requested combo, breaking cycles on the nodes still being visited,
+    and only caches what a walk saw in full, so the nodes of a cycle are walked again by later requests.
+    CONDENSED splits the graph into its strongly connected components once, then evaluates the
+    components below a requested combo bottom-up, dependencies first, solving each cycle to a fixpoint,
+    so that every node is computed once however many combos share it. On acyclic graphs the two agree;
+    through a cycle the fixpoint can also reach the variants the depth-first cycle breaking cuts off.'''
+    DEPTH_FIRST = 'depth_first'
+    CONDENSED = 'condensed'
+
+
+# Selects how the generation evaluates its graphs, see `GraphEvaluation`
+EVALUATION_ENV_VAR = 'GRAPH_EVALUATION'
+
+# How many recipes a graph remembers for the variants found again from other combos, least recently used first out
+RESULTS_CACHE_SIZE = 8192
+
+
+def resolve_evaluation() -> GraphEvaluation:
+    '''Returns the graph evaluation named by `GRAPH_EVALUATION`, the depth-first one by default.'''
+    configured = os.environ.get(EVALUATION_ENV_VAR, '').strip().lower()
+    if not configured:
+        return GraphEvaluation.DEPTH_FIRST
+    try:
+        return GraphEvaluation(configured)
+    except ValueError:
+        raise ValueError(f'{EVALUATION_ENV_VAR} is set to {configured!r}, which is not one of {", ".join(e.value for e in GraphEvaluation)}') from None
+
+
 class Node:
     def __init__(self, graph: 'Graph', item):
         self._variant_set: VariantSet | None = None
@@ -74,12 +110,6 @@ class Node:
     def __repr__(self) -> str:
         return self.__str__()
 
-    def _reset_state(self):
-        self._state = NodeState.NOT_VISITED
-
-    def _reset_subgraph_state(self):
-        self._subgraph_state = NodeState.NOT_VISITED
-
     def _reset_filtered_variant_set(self):
         self._filtered_variant_set = None
 
@@ -93,29 +123,27 @@ class Node:
 
 
 class NodeWithState(Node):
+    '''A combo or a feature, whose visit state during a walk is kept by the graph, in a byte at the index of
+    the node, so that a walk is reset by clearing the bytes in one go rather than by visiting what it touched.'''
+
     def __init__(self, graph: 'Graph', item):
         super().__init__(graph, item)
-        self._state = NodeState.NOT_VISITED
-        self._subgraph_state = NodeState.NOT_VISITED
+        self._index = -1
 
     @property
     def state(self) -> NodeState:
-        return self._subgraph_state if self._graph.subgraph else self._state
+        graph = self._graph
+        return _NODE_STATES[(graph._subgraph_states if graph.subgraph else graph._states)[self._index]]
 
     @state.setter
     def state(self, value: NodeState):
-        if self._graph.subgraph:
-            self._subgraph_state = value
-            self._graph._to_reset_nodes_subgraph_state.add(self)
-        else:
-            self._state = value
-            self._graph._to_reset_nodes_state.add(self)
+        graph = self._graph
+        (graph._subgraph_states if graph.subgraph else graph._states)[self._index] = value.value
 
 
 class NodeWithoutState(Node):
-    def __init__(self, graph: 'Graph', item, variant_set: VariantSet):
-        super().__init__(graph, item)
-        self._variant_set = variant_set
+    '''A card, a template or a feature of a card, whose variant set is fixed by the parameters of the
+    graph alone, and computed by the graph whenever those are set.'''
 
     @property  # type: ignore[misc]
     def variant_set(self) -> VariantSet:
@@ -127,14 +155,10 @@ class CardNode(NodeWithoutState):
             self,
             graph: 'Graph',
             card: Card,
-            features_of_card: Iterable[FeatureOfCard],
+            features_of_card: Iterable[FeatureOfCardRow],
             feature_with_attributes_nodes: dict[int, dict[frozenset[int], 'FeatureWithAttributesNode']],
     ):
-        variant_set = VariantSet(
-            parameters=graph.variant_set_parameters,
-            entries=(VariantSet.ingredients_to_entry(FrozenMultiset({card.id: 1}), FrozenMultiset()),),
-        )
-        super().__init__(graph, card, variant_set)
+        super().__init__(graph, card)
         self.combos = dict['ComboNode', int]()
         self.features = list['FeatureOfCardNode']()
         for feature_of_card in features_of_card:
@@ -151,11 +175,7 @@ class CardNode(NodeWithoutState):
 
 class TemplateNode(NodeWithoutState):
     def __init__(self, graph: 'Graph', template: Template):
-        variant_set = VariantSet(
-            parameters=graph.variant_set_parameters,
-            entries=(VariantSet.ingredients_to_entry(FrozenMultiset(), FrozenMultiset({template.id: 1})),),
-        )
-        super().__init__(graph, template, variant_set)
+        super().__init__(graph, template)
         self.combos = dict['ComboNode', int]()
 
 
@@ -163,16 +183,12 @@ class FeatureOfCardNode(NodeWithoutState):
     def __init__(
         self,
         graph: 'Graph',
-        feature_of_card: FeatureOfCard,
+        feature_of_card: FeatureOfCardRow,
         quantity: int,
         card: CardNode,
         feature: 'FeatureWithAttributesNode',
     ):
-        variant_set = VariantSet.product_sets(
-            [card.variant_set] * quantity,
-            parameters=graph.variant_set_parameters,
-        )
-        super().__init__(graph, feature_of_card, variant_set)
+        super().__init__(graph, feature_of_card)
         self.quantity = quantity
         self.card = card
         self.feature = feature
@@ -206,7 +222,7 @@ class FeatureWithAttributesMatcherNode(NodeWithState):
         self.matches = set[FeatureWithAttributesNode]()
 
 
-def count_needed_features(needed: Iterable[tuple[FeatureNeededInCombo, FeatureWithAttributesMatcherNode]]) -> dict[Feature, Counter[FeatureWithAttributesMatcherNode]]:
+def count_needed_features(needed: Iterable[tuple[FeatureNeededInComboRow, FeatureWithAttributesMatcherNode]]) -> dict[Feature, Counter[FeatureWithAttributesMatcherNode]]:
     '''How many copies of each feature the given rows ask for, grouped by the matcher asking for them.
     An uncountable feature is only ever needed once, however many rows of the combo ask for it.'''
     result = dict[Feature, Counter[FeatureWithAttributesMatcherNode]]()
@@ -295,16 +311,25 @@ class VariantRecipe(VariantIngredients):
     needed_combos: set[comboid]
 
 
-def satisfies(produced: Iterable[FeatureWithAttributes], needed: Iterable[FeatureWithAttributesMatcher]) -> bool:
-    for n in needed:
-        found = False
-        for p in produced:
-            if p.feature == n.feature and n.matcher.matches(p.attributes):
-                found = True
-                break
-        if not found:
-            return False
-    return True
+def node_dependencies(node: NodeWithState) -> list[NodeWithState]:
+    '''The nodes whose variant sets the variant set of the given one is made of.
+    Cards, templates and features of cards are left out, their variant sets being fixed at construction.'''
+    if isinstance(node, ComboNode):
+        return [matcher for group in node.features_needed.values() for matcher in group]
+    if isinstance(node, FeatureWithAttributesMatcherNode):
+        return list(node.matches)
+    assert isinstance(node, FeatureWithAttributesNode)
+    return list(node.produced_by_combos)
+
+
+@dataclass
+class VariantSetCache:
+    '''The variant sets a graph computed under some parameters, aligned with its node lists, kept aside
+    while the graph works under other parameters.'''
+    ingredient_variant_sets: list[VariantSet]
+    variant_sets: list[VariantSet | None]
+    replacement_variant_sets: list[VariantSet | None]
+    evaluated_components: bytearray
 
 
 class GraphError(Exception):
@@ -316,8 +341,12 @@ class Graph:
             data: Data,
             card_limit=5,
             variant_limit=10000,
-            allow_multiple_copies=False):
+            allow_multiple_copies=False,
+            evaluation=GraphEvaluation.DEPTH_FIRST):
+        '''Builds the nodes out of the data, then sets the given parameters. The nodes only depend on the
+        data, so the same graph can serve other parameters later on, see `parameterize`.'''
         self.variant_limit = variant_limit
+        self.evaluation = evaluation
         self.variant_set_parameters = VariantSetParameters(max_depth=card_limit, allow_multiple_copies=allow_multiple_copies)
         self._empty_variant_set = VariantSet(parameters=self.variant_set_parameters)
         self.subgraph = False
@@ -346,10 +375,92 @@ class Graph:
                         feature_with_attributes_matcher_node.matches.add(matching_node)
                         matching_node.matches.append(feature_with_attributes_matcher_node)
         self._mark_nodes_with_differing_replacements()
-        self._to_reset_nodes_state: set[Node] = set()
-        self._to_reset_nodes_subgraph_state: set[Node] = set()
+        self._ingredient_nodes = list[NodeWithoutState]()
+        for card_node in self.card_nodes.values():
+            self._ingredient_nodes.append(card_node)
+            # after their card, whose variant set theirs is made of
+            self._ingredient_nodes.extend(card_node.features)
+        self._ingredient_nodes.extend(self.template_nodes.values())
+        self._nodes_with_state = list[NodeWithState](chain(
+            self.combo_nodes.values(),
+            (node for d in feature_with_attributes_nodes.values() for node in d.values()),
+            (node for d in feature_attributes_matcher_nodes.values() for node in d.values()),
+        ))
+        for index, node in enumerate(self._nodes_with_state):
+            node._index = index
+        self._states = bytearray(len(self._nodes_with_state))
+        self._subgraph_states = bytearray(len(self._nodes_with_state))
+        self._not_visited_states = bytes(len(self._nodes_with_state))
+        self._variant_set_caches = dict[VariantSetParameters, VariantSetCache]()
         self._to_reset_nodes_filtered_variant_set: set[Node] = set()
         self._to_reset_nodes_filtered_replacement_variant_set: set[Node] = set()
+        self._components: list[list[NodeWithState]] = []
+        self._component_of: dict[NodeWithState, int] = {}
+        self._evaluated_components = bytearray()
+        self._results_cache = OrderedDict[VariantIngredients, VariantRecipe]()
+        if evaluation is GraphEvaluation.CONDENSED:
+            self._condense()
+        self._build_ingredient_variant_sets()
+
+    def _build_ingredient_variant_sets(self) -> None:
+        '''Computes the variant sets of cards, templates and features of cards under the current parameters.'''
+        node: NodeWithoutState
+        for node in self._ingredient_nodes:
+            if isinstance(node, CardNode):
+                entry = VariantSet.ingredients_to_entry(FrozenMultiset({node.item.id: 1}), FrozenMultiset())
+                node._variant_set = VariantSet(parameters=self.variant_set_parameters, entries=(entry,))
+            elif isinstance(node, TemplateNode):
+                entry = VariantSet.ingredients_to_entry(FrozenMultiset(), FrozenMultiset({node.item.id: 1}))
+                node._variant_set = VariantSet(parameters=self.variant_set_parameters, entries=(entry,))
+            else:
+                assert isinstance(node, FeatureOfCardNode)
+                node._variant_set = VariantSet.product_sets([node.card.variant_set] * node.quantity, parameters=self.variant_set_parameters)
+
+    def parameterize(self, card_limit=5, variant_limit=10000, allow_multiple_copies=False) -> None:
+        '''Switches the graph to other parameters without rebuilding its nodes. The variant sets computed
+        under the current parameters are kept aside, keyed by them, and the ones kept aside earlier for the
+        new parameters are picked up again, so that switching back and forth recomputes nothing.'''
+        self._reset()
+        self._results_cache.clear()
+        self.variant_limit = variant_limit
+        parameters = VariantSetParameters(max_depth=card_limit, allow_multiple_copies=allow_multiple_copies)
+        if parameters == self.variant_set_parameters:
+            return
+        node: NodeWithState
+        ingredient_node: NodeWithoutState
+        self._variant_set_caches[self.variant_set_parameters] = VariantSetCache(
+            ingredient_variant_sets=[ingredient_node._variant_set for ingredient_node in self._ingredient_nodes],
+            variant_sets=[node._variant_set for node in self._nodes_with_state],
+            replacement_variant_sets=[node._replacement_variant_set for node in self._nodes_with_state],
+            evaluated_components=self._evaluated_components,
+        )
+        self.variant_set_parameters = parameters
+        cache = self._variant_set_caches.pop(parameters, None)
+        if cache is None:
+            self._build_ingredient_variant_sets()
+            for node in self._nodes_with_state:
+                node._variant_set = None
+                node._replacement_variant_set = None
+            self._evaluated_components = bytearray(len(self._components))
+            return
+        for ingredient_node, variant_set in zip(self._ingredient_nodes, cache.ingredient_variant_sets):
+            ingredient_node._variant_set = variant_set
+        for node, variant_set, replacement_variant_set in zip(self._nodes_with_state, cache.variant_sets, cache.replacement_variant_sets):
+            node._variant_set = variant_set
+            node._replacement_variant_set = replacement_variant_set
+        self._evaluated_components = cache.evaluated_components
+
+    def forget_variant_sets(self) -> None:
+        '''Drops the variant sets of combos and features computed so far, under any parameters, keeping the
+        nodes and the variant sets of the ingredients.'''
+        node: NodeWithState
+        self._reset()
+        self._results_cache.clear()
+        self._variant_set_caches.clear()
+        for node in self._nodes_with_state:
+            node._variant_set = None
+            node._replacement_variant_set = None
+        self._evaluated_components = bytearray(len(self._components))
 
     def _mark_nodes_with_differing_replacements(self) -> None:
         '''Marks every node whose replacements could differ from its whole variant set: the combos
@@ -439,14 +550,10 @@ class Graph:
 
     def _reset(self):
         node: Node
-        for node in self._to_reset_nodes_subgraph_state:
-            node._reset_subgraph_state()
-        self._to_reset_nodes_subgraph_state.clear()
+        self._subgraph_states[:] = self._not_visited_states
         if self.subgraph:
             return
-        for node in self._to_reset_nodes_state:
-            node._reset_state()
-        self._to_reset_nodes_state.clear()
+        self._states[:] = self._not_visited_states
         for node in self._to_reset_nodes_filtered_variant_set:
             node._reset_filtered_variant_set()
         self._to_reset_nodes_filtered_variant_set.clear()
@@ -461,17 +568,186 @@ class Graph:
     def variants(self, combo_id: int) -> VariantSet:
         combo_node = self.combo_nodes[combo_id]
         self._reset()
+        if self.evaluation is GraphEvaluation.CONDENSED:
+            self._evaluate_components([combo_node])
+            return combo_node.variant_set  # type: ignore[return-value]
         variant_set, _, _ = self._combo_nodes_down(combo_node)
         return variant_set
 
+    def evaluate(self, combo_ids: Iterable[int]) -> None:
+        '''Computes ahead of time the variant sets of the given combos and of everything below them,
+        so that processes forked afterwards inherit them.'''
+        if self.evaluation is GraphEvaluation.CONDENSED:
+            self._reset()
+            self._evaluate_components([self.combo_nodes[combo_id] for combo_id in combo_ids])
+            return
+        for combo_id in combo_ids:
+            self._reset()
+            self._combo_nodes_down(self.combo_nodes[combo_id])
+        self._reset()
+
+    def strongly_connected_components(self) -> list[list[NodeWithState]]:
+        '''The strongly connected components of the combo, matcher and feature nodes, each listed after
+        the ones it depends on.'''
+        if not self._component_of and self.combo_nodes:
+            self._condense()
+        return self._components
+
+    def restore_variant_sets(self, variant_sets: Mapping[NodeWithState, tuple[VariantSet, VariantSet]]) -> None:
+        '''Adopts variant sets computed earlier under the current parameters, for instance by a previous
+        generation, as if this graph had computed them. A cycle is only taken as evaluated when all of its
+        nodes are given, since evaluating it starts over from all of its nodes.'''
+        self._reset()
+        self._results_cache.clear()
+        for node, (variant_set, replacement_variant_set) in variant_sets.items():
+            node.variant_set = variant_set
+            node.replacement_variant_set = replacement_variant_set
+        if self.evaluation is GraphEvaluation.CONDENSED:
+            for index, component in enumerate(self._components):
+                if all(node in variant_sets for node in component):
+                    self._evaluated_components[index] = 1
+
+    # -----------------------------------------------------------------------
+    # Condensed evaluation
+    # -----------------------------------------------------------------------
+
+    def _condense(self) -> None:
+        '''Splits the nodes reachable from the combos into strongly connected components, with an
+        iterative Tarjan walk. Tarjan emits a component only after every component it depends on,
+        so the component indexes are already a valid bottom-up evaluation order.'''
+        index_of = dict[NodeWithState, int]()
+        lowlink = dict[NodeWithState, int]()
+        stack = list[NodeWithState]()
+        on_stack = set[NodeWithState]()
+        components = self._components
+        component_of = self._component_of
+        for root in self.combo_nodes.values():
+            if root in index_of:
+                continue
+            index_of[root] = lowlink[root] = len(index_of)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(node_dependencies(root)))]
+            while work:
+                node, dependencies = work[-1]
+                descended = False
+                for dependency in dependencies:
+                    if dependency not in index_of:
+                        index_of[dependency] = lowlink[dependency] = len(index_of)
+                        stack.append(dependency)
+                        on_stack.add(dependency)
+                        work.append((dependency, iter(node_dependencies(dependency))))
+                        descended = True
+                        break
+                    if dependency in on_stack and index_of[dependency] < lowlink[node]:
+                        lowlink[node] = index_of[dependency]
+                if descended:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                if lowlink[node] == index_of[node]:
+                    component = list[NodeWithState]()
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component_of[member] = len(components)
+                        component.append(member)
+                        if member is node:
+                            break
+                    components.append(component)
+        self._evaluated_components = bytearray(len(components))
+
+    def _evaluate_components(self, combos: list[ComboNode]) -> None:
+        '''Evaluates the components the given combos depend on, and theirs, which are not evaluated yet.'''
+        component_of = self._component_of
+        evaluated = self._evaluated_components
+        pending = set[int]()
+        to_visit = [component_of[combo] for combo in combos]
+        while to_visit:
+            index = to_visit.pop()
+            if evaluated[index] or index in pending:
+                continue
+            pending.add(index)
+            for node in self._components[index]:
+                for dependency in node_dependencies(node):
+                    to_visit.append(component_of[dependency])
+        for index in sorted(pending):
+            self._evaluate_component(index)
+            evaluated[index] = 1
+
+    def _evaluate_component(self, index) -> None:
+        '''Evaluates the nodes of a component whose dependencies outside of it are all evaluated.
+
+        A node alone in its component is computed in a single step. The nodes of a cycle start from the
+        empty variant set and are recomputed, each from the current sets of the others, until none of them
+        changes: what the sets cover only grows along the way and is bounded by the card limit, so this
+        reaches the least fixpoint, where every variant is backed by a derivation that does not go around
+        the cycle to justify itself.'''
+        component = self._components[index]
+        if len(component) == 1:
+            self._evaluate_node(component[0])
+            return
+        component_of = self._component_of
+        empty, _, _ = self._unresolved()
+        dependents = defaultdict[NodeWithState, list[NodeWithState]](list)
+        for node in component:
+            node.variant_set = empty
+            node.replacement_variant_set = empty
+            for dependency in node_dependencies(node):
+                if component_of[dependency] == index:
+                    dependents[dependency].append(node)
+        to_evaluate = deque(component)
+        queued = set(component)
+        while to_evaluate:
+            node = to_evaluate.popleft()
+            queued.discard(node)
+            previous_variant_set = node.variant_set
+            previous_replacement_variant_set = node.replacement_variant_set
+            node.variant_set = None
+            variant_set, replacement_variant_set = self._evaluate_node(node)
+            if variant_set != previous_variant_set or replacement_variant_set != previous_replacement_variant_set:
+                for dependent in dependents[node]:
+                    if dependent not in queued:
+                        queued.add(dependent)
+                        to_evaluate.append(dependent)
+
+    def _evaluate_node(self, node: NodeWithState) -> tuple[VariantSet, VariantSet]:
+        '''Computes the variant sets of a node out of the cached ones of its dependencies, reusing the
+        depth-first steps: with every dependency cached, they never go deeper than one level.'''
+        if isinstance(node, ComboNode):
+            variant_set, replacement_variant_set, complete = self._combo_nodes_down(node)
+        elif isinstance(node, FeatureWithAttributesMatcherNode):
+            variant_set, replacement_variant_set, complete = self._feature_with_attribute_matchers_nodes_down(node)
+        else:
+            assert isinstance(node, FeatureWithAttributesNode)
+            variant_set, replacement_variant_set, complete = self._feature_with_attributes_nodes_down(node)
+        assert complete
+        return variant_set, replacement_variant_set
+
     def results(self, variant_set: VariantSet) -> list[VariantRecipe]:
         result = list[VariantRecipe]()
         for cards, templates in variant_set.variants():
-            self._reset()
-            recipe = self._card_nodes_up(VariantIngredients(cards, templates))
-            result.append(recipe)
+            result.append(self.result(cards, templates))
         return result
 
+    def result(self, cards: FrozenMultiset[cardid], templates: FrozenMultiset[templateid]) -> VariantRecipe:
+        '''The recipe of the variant with the given ingredients. It only depends on them and on the parameters,
+        so the recipes of the variants many combos share are computed once, and shared: they must not be modified.'''
+        ingredients = VariantIngredients(cards, templates)
+        recipe = self._results_cache.get(ingredients)
+        if recipe is not None:
+            self._results_cache.move_to_end(ingredients)
+            return recipe
+        self._reset()
+        recipe = self._card_nodes_up(ingredients)
+        self._results_cache[ingredients] = recipe
+        if len(self._results_cache) > RESULTS_CACHE_SIZE:
+            self._results_cache.popitem(last=False)
+        return recipe
+
     def _combo_nodes_down(self, combo: ComboNode) -> tuple[VariantSet, VariantSet, bool]:
         '''The variant set of a combo, the one restricted to its ingredients in replacements, and
         whether the walk saw everything it depends on. The second is the first itself for the combos no
@@ -523,12 +799,15 @@ class Graph:
             if replacement_variant_sets:
                 replacement_variant_sets_of_ingredients.append(VariantSet.product_sets(replacement_variant_sets, parameters=self.variant_set_parameters))
         variant_sets = card_variant_sets + template_variant_sets + needed_features_variant_sets
-        variant_count_estimate = 1
-        for vs in variant_sets:
-            variant_count_estimate *= len(vs)
-        if variant_count_estimate > self.variant_limit:
-            raise GraphError(f'Combo {combo.item} has too many variants, approx. {variant_count_estimate}')
-        variant_set = VariantSet.and_sets(variant_sets, parameters=self.variant_set_parameters)
+        # planned from the size sketches of the sets, before joining any of them, but since a sample can miss
+        # every surviving pair the limit is also enforced on the actual entries, while joining them
+        plan = VariantSet.plan_and_sets(variant_sets, parameters=self.variant_set_parameters)
+        if plan.estimate > self.variant_limit:
+            raise GraphError(f'Combo {combo.item} has too many variants, approx. {plan.estimate}')
+        joined_variant_set = plan.execute(limit=self.variant_limit)
+        if joined_variant_set is None:
+            raise GraphError(f'Combo {combo.item} has too many variants, more than {self.variant_limit}')
+        variant_set = joined_variant_set
         # no estimate needed: these sets are a subset of the ones already counted
         replacement_variant_set = VariantSet.and_sets(replacement_variant_sets_of_ingredients, parameters=self.variant_set_parameters) if combo.replacements_differ else variant_set
         return self._resolved(combo, variant_set, replacement_variant_set, complete)
@@ -596,6 +875,16 @@ class Graph:
         parked_combo_nodes_by_blocking_feature = defaultdict[FeatureWithAttributesNode, list[ComboNode]](list)
         combo_nodes: set[ComboNode] = set()
         replacements = defaultdict[FeatureWithAttributes, list[VariantIngredients]](list)
+        # running totals of the countable features available to each matcher, kept as the features are counted
+        matcher_totals = dict[FeatureWithAttributesMatcherNode, int]()
+        # reverse indexes of what produced each feature, for the closure of the needed combos and features of cards
+        combo_nodes_by_feature = defaultdict[FeatureWithAttributesNode, list[ComboNode]](list)
+        feature_of_card_nodes_by_feature = defaultdict[FeatureWithAttributesNode, list[FeatureOfCardNode]](list)
+
+        def count_feature(feature: FeatureWithAttributesNode, count: int) -> None:
+            countable_feature_nodes[feature] = countable_feature_nodes.get(feature, 0) + count
+            for matcher in feature.matches:
+                matcher_totals[matcher] = matcher_totals.get(matcher, 0) + count
 
         def unpark_combo_nodes_blocked_on(feature: FeatureWithAttributesNode) -> None:
             parked = parked_combo_nodes_by_blocking_feature.pop(feature, None)
@@ -618,13 +907,14 @@ class Graph:
             for feature_of_card in card.features:
                 feature_of_card_nodes.add(feature_of_card)
                 feature = feature_of_card.feature
+                feature_of_card_nodes_by_feature[feature].append(feature_of_card)
                 cards_needed: int = feature_of_card.quantity
                 if feature.item.feature.uncountable:
                     feature_count: int = 1
                     uncountable_feature_nodes.add(feature)
                 else:
                     feature_count = quantity // cards_needed
-                    countable_feature_nodes[feature] = countable_feature_nodes.get(feature, 0) + feature_count
+                    count_feature(feature, feature_count)
                 replacements[feature.item].append(
                     VariantIngredients(
                         cards=FrozenMultiset({card.item.id: cards_needed}),
@@ -656,7 +946,7 @@ class Graph:
             else:
                 blocking_features = self._uncountable_feature_blockers(combo, uncountable_feature_nodes)
                 if blocking_features is None:
-                    blocking_features = self._countable_feature_blockers(combo, countable_feature_nodes)
+                    blocking_features = self._countable_feature_blockers(combo, countable_feature_nodes, matcher_totals)
                 if blocking_features is not None:
                     parked_combo_nodes.add(combo)
                     for blocking_feature in blocking_features:
@@ -670,6 +960,8 @@ class Graph:
                     self.subgraph = False
             combo.state = NodeState.VISITED
             combo_nodes.add(combo)
+            for feature in combo.features_produced:
+                combo_nodes_by_feature[feature].append(combo)
             if variant_set is not None and replacement_variant_set is not None:
                 variants_list = variant_set.variants()
                 # replacements leave out the opted out ingredients; the firing count does not
@@ -691,7 +983,7 @@ class Graph:
                 for feature in combo.features_produced:
                     if not feature.item.feature.uncountable:
                         replacements[feature.item].extend(replacements_for_combo)
-                        countable_feature_nodes[feature] = countable_feature_nodes.get(feature, 0) + quantity
+                        count_feature(feature, quantity)
                         unpark_combo_nodes_blocked_on(feature)
             for feature in combo.features_produced:
                 if feature.item.feature.uncountable and feature not in uncountable_feature_nodes:
@@ -708,56 +1000,42 @@ class Graph:
                                 else:
                                     feature_combo.state = NodeState.VISITED
 
-        interesting_features = set[FeatureWithAttributes]()
+        interesting_feature_nodes = set[FeatureWithAttributesNode]()
         for fa_node in chain(countable_feature_nodes.keys(), uncountable_feature_nodes):
             if not fa_node.item.feature.is_utility:
-                interesting_features.add(fa_node.item)
+                interesting_feature_nodes.add(fa_node)
 
         needed_combo_nodes = set[ComboNode]()
-        for combo_node in combo_nodes:
-            for fa_node in combo_node.features_produced:
-                if fa_node.item in interesting_features:
-                    needed_combo_nodes.add(combo_node)
-                    break
-
         needed_feature_of_card_nodes = set[FeatureOfCardNode]()
-        for foc_node in feature_of_card_nodes:
-            if foc_node.feature.item in interesting_features:
-                needed_feature_of_card_nodes.add(foc_node)
+        for fa_node in interesting_feature_nodes:
+            needed_combo_nodes.update(combo_nodes_by_feature.get(fa_node, ()))
+            needed_feature_of_card_nodes.update(feature_of_card_nodes_by_feature.get(fa_node, ()))
 
-        new_features_needed_by_needed_combos = set[FeatureWithAttributesMatcher]()
+        new_features_needed_by_needed_combos = set[FeatureWithAttributesMatcherNode]()
         for combo_node in needed_combo_nodes:
             for features_needed in combo_node.features_needed.values():
-                for fam_node in features_needed:
-                    new_features_needed_by_needed_combos.add(fam_node.item)
-
-        while not satisfies(interesting_features, new_features_needed_by_needed_combos):
-            new_features_produced_by_needed_combos = set[FeatureWithAttributes]()
-            for fa in chain(countable_feature_nodes.keys(), uncountable_feature_nodes):
-                for fam in new_features_needed_by_needed_combos:
-                    if fam.feature == fa.item.feature and fam.matcher.matches(fa.item.attributes):
-                        new_features_produced_by_needed_combos.add(fa.item)
-                        break
+                new_features_needed_by_needed_combos.update(features_needed)
+
+        # a needed feature is satisfied when an interesting feature matches it
+        while any(fam_node.matches.isdisjoint(interesting_feature_nodes) for fam_node in new_features_needed_by_needed_combos):
+            new_features_produced_by_needed_combos = set[FeatureWithAttributesNode]()
+            for fam_node in new_features_needed_by_needed_combos:
+                for fa_node in fam_node.matches:
+                    if fa_node in countable_feature_nodes or fa_node in uncountable_feature_nodes:
+                        new_features_produced_by_needed_combos.add(fa_node)
 
-            interesting_features.update(new_features_produced_by_needed_combos)
+            interesting_feature_nodes.update(new_features_produced_by_needed_combos)
 
             new_needed_combos = set[ComboNode]()
-            for combo_node in combo_nodes:
-                for fa_node in combo_node.features_produced:
-                    if fa_node.item in new_features_produced_by_needed_combos:
-                        new_needed_combos.add(combo_node)
-                        break
+            for fa_node in new_features_produced_by_needed_combos:
+                new_needed_combos.update(combo_nodes_by_feature.get(fa_node, ()))
+                needed_feature_of_card_nodes.update(feature_of_card_nodes_by_feature.get(fa_node, ()))
             needed_combo_nodes.update(new_needed_combos)
 
-            for foc_node in feature_of_card_nodes:
-                if foc_node.feature.item in new_features_produced_by_needed_combos:
-                    needed_feature_of_card_nodes.add(foc_node)
-
             new_features_needed_by_needed_combos.clear()
             for combo_node in new_needed_combos:
                 for features_needed in combo_node.features_needed.values():
-                    for fam_node in features_needed:
-                        new_features_needed_by_needed_combos.add(fam_node.item)
+                    new_features_needed_by_needed_combos.update(features_needed)
         self._reset()
         return VariantRecipe(
             cards=ingredients.cards,
@@ -781,33 +1059,30 @@ class Graph:
                         return matcher.matches
         return None
 
-    def _countable_feature_blockers(self, combo: ComboNode, available: dict[FeatureWithAttributesNode, int]) -> set[FeatureWithAttributesNode] | None:
-        '''Returns the feature nodes whose quantity increase could unblock the combo, or None if it is not blocked.'''
+    def _countable_feature_blockers(
+        self,
+        combo: ComboNode,
+        available: dict[FeatureWithAttributesNode, int],
+        matcher_totals: dict[FeatureWithAttributesMatcherNode, int],
+    ) -> set[FeatureWithAttributesNode] | None:
+        '''Returns the feature nodes whose quantity increase could unblock the combo, or None if it is not blocked.
+        The running totals of the matchers answer for each of them on its own, and only a feature needed through
+        more than one matcher has to add up the features matching any of them.'''
         for feature, group in combo.features_needed.items():
             if not feature.uncountable:
                 for matcher, required_quantity in group.items():
-                    matches = matcher.matches
-                    available_quantity = 0
-                    for f, q in available.items():
-                        if f in matches:
-                            available_quantity += q
-                            if available_quantity >= required_quantity:
-                                break
-                    if available_quantity < required_quantity:
-                        return matches
-                required_total_quantity = sum(group.values())
-                available_total_quantity = 0
-                for f, q in available.items():
-                    if f.item.feature == feature:
-                        for matcher in group:
-                            if f in matcher.matches:
-                                available_total_quantity += q
-                                break
-                        if available_total_quantity >= required_total_quantity:
-                            break
-                if available_total_quantity < required_total_quantity:
-                    blockers = set[FeatureWithAttributesNode]()
+                    if matcher_totals.get(matcher, 0) < required_quantity:
+                        return matcher.matches
+                if len(group) > 1:
+                    matching = set[FeatureWithAttributesNode]()
                     for matcher in group:
-                        blockers.update(matcher.matches)
-                    return blockers
+                        matching.update(matcher.matches)
+                    required_total_quantity = 0
+                    for required_quantity in group.values():
+                        required_total_quantity += required_quantity
+                    available_total_quantity = 0
+                    for f in matching:
+                        available_total_quantity += available.get(f, 0)
+                    if available_total_quantity < required_total_quantity:
+                        return matching
         return None
@@ -0,0 +1,18 @@
+# cython: language_level=3
+# cython: boundscheck=False
+# cython: wraparound=False
+# cython: cdivision=True
+# cython: initializedcheck=False
+# cython: embedsignature=True
+# cython: optimize.use_switch=True
+# cython: optimize.unpack_method_calls=True
+# cython: infer_types=True
+# cython: overflowcheck=False
+# cython: profile=False
+# cython: annotation_typing=True
+
+cimport cython
+
+cpdef bytes reference_digest()
+cpdef str snapshot_path(str directory)
+# load_reference_rows, store_reference_rows and load_data run once per generation, and are left as plain compiled defs
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable
+from uuid import UUID
+from django.db import connection
+from django.db.migrations.recorder import MigrationRecorder
+from spellbook.models import DataVersion
+from .variant_data import Data, fetch_reference_rows, reference_columns
+
+
+# Selects the directory the snapshot of the reference data is kept in between generations, disabled when unset
+SNAPSHOT_DIR_ENV_VAR = 'DATA_SNAPSHOT_DIR'
+
+# Bump this version to drop every stored snapshot, whenever their layout or meaning changes
+_SNAPSHOT_VERSION = 3
+
+# Leads every snapshot file, followed by the version of the layout and by the digest of the data it holds
+_MAGIC = b'SPELLDAT'
+_DIGEST_SIZE = 16
+_HEADER_SIZE = len(_MAGIC) + 4 + _DIGEST_SIZE
+
+# The stamps replaced by every change of the reference tables: the cards have their own, the rest share one
+_STAMPED_KINDS = (DataVersion.CARDS, DataVersion.REFERENCE)
+
+# The values JSON has no type for, stored as single key objects naming their type
+_DATETIME_KEY = '__datetime__'
+_DECIMAL_KEY = '__decimal__'
+_UUID_KEY = '__uuid__'
+
+SNAPSHOT_FILE_NAME = 'reference-data.snapshot'
+
+
+def resolve_snapshot_directory() -> str | None:
+    '''Returns the directory named by `DATA_SNAPSHOT_DIR`, or None when the snapshot is disabled.'''
+    configured = os.environ.get(SNAPSHOT_DIR_ENV_VAR, '').strip()
+    return configured or None
+
+
+def _stamps() -> dict[str, UUID]:
+    return dict(DataVersion.objects.filter(kind__in=_STAMPED_KINDS).values_list('kind', 'version'))
+
+
+def reference_digest() -> bytes:
+    '''
+    Digests the stamps of the reference tables, which every change to them replaces, without reading
+    the tables themselves. The cards are stamped by `DataVersion.CARDS`, and the rest by
+    `DataVersion.REFERENCE`. Migrations rewrite rows without sending signals, so the latest one
+    applied is digested as well, along with the columns read from each table.
+    '''
+    stamps = _stamps()
+    missing = [kind for kind in _STAMPED_KINDS if kind not in stamps]
+    if missing:
+        # a stamp only exists once its data first changed, so the data as it stands now gets one
+        DataVersion.bump(*missing)
+        stamps = _stamps()
+    latest_migration = MigrationRecorder(connection).migration_qs.filter(app='spellbook').order_by('-id').values_list('name', flat=True).first()
+    hasher = hashlib.blake2b(digest_size=_DIGEST_SIZE)
+    hasher.update(repr((_SNAPSHOT_VERSION, latest_migration)).encode('utf8'))
+    for kind in _STAMPED_KINDS:
+        hasher.update(repr((kind, stamps[kind])).encode('utf8'))
+    hasher.update(repr(reference_columns()).encode('utf8'))
+    return hasher.digest()
+
+
+def snapshot_path(directory: str) -> str:
+    return os.path.join(directory, SNAPSHOT_FILE_NAME)
+
+
+def _encode_value(value: object) -> dict[str, str]:
+    if isinstance(value, datetime):
+        return {_DATETIME_KEY: value.isoformat()}
+    if isinstance(value, Decimal):
+        return {_DECIMAL_KEY: str(value)}
+    if isinstance(value, UUID):
+        return {_UUID_KEY: str(value)}
+    raise TypeError(f'Cannot store a {type(value).__name__} in a snapshot')
+
+
+def _decode_value(value: dict) -> object:
+    if len(value) == 1:
+        if _DATETIME_KEY in value:
+            return datetime.fromisoformat(value[_DATETIME_KEY])
+        if _DECIMAL_KEY in value:
+            return Decimal(value[_DECIMAL_KEY])
+        if _UUID_KEY in value:
+            return UUID(value[_UUID_KEY])
+    return value
+
+
+def load_reference_rows(directory: str, digest: bytes) -> dict[str, list[tuple]] | None:
+    '''
+    Reads the reference rows out of the snapshot, or returns None when the snapshot is missing,
+    damaged, or was taken of other data. The rows are stored as JSON, which can only ever decode
+    to plain values, whoever wrote the file.
+    '''
+    try:
+        with open(snapshot_path(directory), 'rb') as file:
+            header = file.read(_HEADER_SIZE)
+            if len(header) < _HEADER_SIZE or header[:len(_MAGIC)] != _MAGIC:
+                return None
+            version = int.from_bytes(header[len(_MAGIC):len(_MAGIC) + 4], 'little')
+            if version != _SNAPSHOT_VERSION or header[len(_MAGIC) + 4:] != digest:
+                return None
+            tables = json.loads(file.read(), object_hook=_decode_value)
+    except (OSError, ValueError):
+        # a damaged snapshot is a missing snapshot
+        return None
+    if not isinstance(tables, dict):
+        return None
+    return {name: [tuple(row) for row in rows] for name, rows in tables.items()}
+
+
+def store_reference_rows(directory: str, digest: bytes, reference: dict[str, list[tuple]]) -> None:
+    '''Replaces the snapshot with the given reference rows, taken of the data with the given digest.'''
+    os.makedirs(directory, exist_ok=True)
+    # written aside and then moved over, so that a reader never sees a partial file
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(_MAGIC)
+            file.write(_SNAPSHOT_VERSION.to_bytes(4, 'little'))
+            file.write(digest)
+            file.write(json.dumps(reference, default=_encode_value, separators=(',', ':')).encode('utf8'))
+        os.replace(temporary_path, snapshot_path(directory))
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def load_data(directory: str | None, log: Callable[[str], None] = lambda _: None) -> Data:
+    '''
+    Loads the generation data, taking its reference part from the snapshot in the given directory
+    when the tables did not change since it was taken, and taking a new snapshot otherwise.
+    Without a directory, everything is read from the database.
+    '''
+    if directory is None:
+        return Data()
+    # digested before fetching: a change landing in between makes the snapshot stale, never wrong
+    digest = reference_digest()
+    reference = load_reference_rows(directory, digest)
+    if reference is not None:
+        log('Loaded the reference data from the snapshot.')
+        return Data(reference=reference)
+    reference = fetch_reference_rows()
+    try:
+        store_reference_rows(directory, digest, reference)
+        log('Stored a new snapshot of the reference data.')
+    except OSError as e:
+        log(f'Could not store the snapshot of the reference data: {e}')
+    return Data(reference=reference)
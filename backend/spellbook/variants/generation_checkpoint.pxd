@@ -0,0 +1,18 @@
+# cython: language_level=3
+# cython: boundscheck=False
+# cython: wraparound=False
+# cython: cdivision=True
+# cython: initializedcheck=False
+# cython: embedsignature=True
+# cython: optimize.use_switch=True
+# cython: optimize.unpack_method_calls=True
+# cython: infer_types=True
+# cython: overflowcheck=False
+# cython: profile=False
+# cython: annotation_typing=True
+
+cimport cython
+
+cpdef str _key_directory(str directory, str key)
+# GenerationCheckpoint is left as a plain class and the other functions as plain compiled defs: they hold
+# generator expressions Cython cannot turn into a cpdef, and their cost is in the file system and in pickle
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import pickle
+import re
+import shutil
+import tempfile
+import time
+from typing import Iterable, Iterator, Mapping
+from .combo_graph import resolve_evaluation
+from .generation_tracking import Fingerprints
+from .variant_set import resolve_storage
+
+
+# Selects the directory the graph phase of a generation job keeps its completed chunks in until the job succeeds, disabled when unset
+CHECKPOINT_DIR_ENV_VAR = 'GENERATION_CHECKPOINT_DIR'
+
+# Bump this version to drop every stored checkpoint, whenever their layout or meaning changes
+_CHECKPOINT_VERSION = 2
+
+# The checkpoints of a generation not run again for this long are dropped by the next one opening its own
+_STALE_SECONDS = 7 * 24 * 60 * 60
+
+_CHUNK_SUFFIX = '.chunk'
+
+_SHARD_PREFIX = 'shard-'
+
+
+def resolve_checkpoint_directory() -> str | None:
+    '''Returns the directory named by `GENERATION_CHECKPOINT_DIR`, or None when the checkpoints are disabled.'''
+    configured = os.environ.get(CHECKPOINT_DIR_ENV_VAR, '').strip()
+    return configured or None
+
+
+def plan_digest(fingerprints: Fingerprints, combo_ids: Iterable[int]) -> str:
+    '''
+    Digests what the graph phase of a generation computes from: the fingerprints of every entity, the generator
+    combos to compute, in order, and the settings of the process that change what it computes.
+    '''
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(repr(_CHECKPOINT_VERSION).encode('utf8'))
+    hasher.update(repr((resolve_evaluation().value, resolve_storage().__name__)).encode('utf8'))
+    for kind in sorted(fingerprints):
+        hasher.update(repr((kind, sorted(fingerprints[kind].items()))).encode('utf8'))
+    hasher.update(repr(list(combo_ids)).encode('utf8'))
+    return hasher.hexdigest()
+
+
+def _key_directory(directory: str, key: str) -> str:
+    # the key names a directory, so it is kept to characters that are safe in a path
+    return os.path.join(directory, re.sub(r'[^\w.-]', '_', key))
+
+
+class GenerationCheckpoint:
+    '''
+    Keeps the variant definitions computed by each completed chunk of combos of the graph phase, along with
+    the ids of those combos, in a directory named after the digest of the plan, within the one of the key of
+    the generation: what it generates, rather than the job running it, which every retry enqueues anew. Any
+    job generating the same plan again after one was interrupted reads them back instead of computing those combos.
+
+    A shard of the job, computing some of its combos in another task, keeps its chunks in a directory of its own
+    within the one of the plan, named after the digest of the shard, which the job lists in `shards` to read them.
+    '''
+
+    def __init__(self, directory: str, key: str, digest: str, shard: str | None = None):
+        self.key = key
+        self.digest = digest
+        self.key_path = _key_directory(directory, key)
+        self.path = os.path.join(self.key_path, digest)
+        if shard is not None:
+            self.path = os.path.join(self.path, _SHARD_PREFIX + shard)
+        self.shards = list[str]()
+        self._sequence = 0
+
+    def chunks(self) -> Iterator[tuple[list[int], dict[str, object]]]:
+        '''
+        Reads back the stored chunks in the order they were completed, and then the ones of each listed shard,
+        skipping a damaged one, whose combos are then computed again.
+        '''
+        yield from self._read_chunks(self.path, own=True)
+        for shard in self.shards:
+            yield from self._read_chunks(os.path.join(self.path, _SHARD_PREFIX + shard), own=False)
+
+    def _read_chunks(self, path: str, own: bool) -> Iterator[tuple[list[int], dict[str, object]]]:
+        try:
+            names = sorted(name for name in os.listdir(path) if name.endswith(_CHUNK_SUFFIX))
+        except FileNotFoundError:
+            return
+        for name in names:
+            if own:
+                self._sequence = max(self._sequence, int(name.removesuffix(_CHUNK_SUFFIX)) + 1)
+            try:
+                with open(os.path.join(path, name), 'rb') as file:
+                    payload = pickle.load(file)
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+                continue
+            if not isinstance(payload, dict) or payload.get('version') != _CHECKPOINT_VERSION:
+                continue
+            yield payload['combo_ids'], payload['definitions']
+
+    def store(self, combo_ids: list[int], definitions: Mapping[str, object]) -> None:
+        '''Stores the definitions computed by a completed chunk of combos.'''
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, f'{self._sequence:08}{_CHUNK_SUFFIX}')
+        self._sequence += 1
+        # written aside and then moved over, so that a reader never sees a partial file
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                pickle.dump({'version': _CHECKPOINT_VERSION, 'combo_ids': combo_ids, 'definitions': definitions}, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    def clear(self) -> None:
+        '''Drops everything stored for the key, once its job succeeded.'''
+        shutil.rmtree(self.key_path, ignore_errors=True)
+
+
+def open_checkpoint(directory: str, key: str, digest: str) -> GenerationCheckpoint:
+    '''
+    Opens the checkpoint of a key for the plan with the given digest, dropping the ones stored for any
+    other plan of the same key, since the data changed and they can never be resumed, and the ones of
+    any other key not opened for `_STALE_SECONDS`, left behind by jobs that failed and were not retried.
+    '''
+    checkpoint = GenerationCheckpoint(directory, key, digest)
+    try:
+        names = os.listdir(checkpoint.key_path)
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        if name != digest:
+            shutil.rmtree(os.path.join(checkpoint.key_path, name), ignore_errors=True)
+    os.makedirs(checkpoint.key_path, exist_ok=True)
+    # the key directory is touched on every opening, so that the age of a checkpoint is the one of its last job
+    os.utime(checkpoint.key_path)
+    stale_before = time.time() - _STALE_SECONDS
+    for entry in os.scandir(directory):
+        if entry.is_dir() and entry.path != checkpoint.key_path:
+            try:
+                if entry.stat().st_mtime < stale_before:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except FileNotFoundError:
+                continue
+    return checkpoint
@@ -0,0 +1,17 @@
+# cython: language_level=3
+# cython: boundscheck=False
+# cython: wraparound=False
+# cython: cdivision=True
+# cython: initializedcheck=False
+# cython: embedsignature=True
+# cython: optimize.use_switch=True
+# cython: optimize.unpack_method_calls=True
+# cython: infer_types=True
+# cython: overflowcheck=False
+# cython: profile=False
+# cython: annotation_typing=True
+
+cimport cython
+
+# GenerationProfile and PhaseProfile are left as plain classes and the functions as plain compiled defs: a phase
+# is entered a few times per generation, and the phase context manager is a generator Cython cannot cpdef
@@ -0,0 +1,101 @@
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Iterable, Iterator
+from spellbook.models import VariantGenerationProfile
+from .generation_tracking import ComboCost
+
+
+# Enables tracing the memory allocated by each phase of a generation with tracemalloc, which slows it down, disabled when unset
+TRACE_MEMORY_ENV_VAR = 'GENERATION_TRACE_MEMORY'
+
+# How many of the costliest combos a profile keeps
+PROFILE_TOP_COMBOS = 100
+
+# How many profiles are kept, the oldest ones being dropped as new generations store theirs
+PROFILE_HISTORY = 30
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+_FALSE_VALUES = ('', '0', 'false', 'no', 'off')
+
+
+def resolve_memory_tracing() -> bool:
+    '''Returns whether `GENERATION_TRACE_MEMORY` enables tracing the memory allocated by each phase.'''
+    configured = os.environ.get(TRACE_MEMORY_ENV_VAR, '').strip()
+    if configured.lower() in _TRUE_VALUES:
+        return True
+    if configured.lower() in _FALSE_VALUES:
+        return False
+    raise ValueError(f'{TRACE_MEMORY_ENV_VAR} is set to {configured!r}, which is neither true nor false')
+
+
+def _max_rss(who: int) -> int:
+    # the peak resident set is in kibibytes, except on macOS where it is in bytes
+    usage = resource.getrusage(who).ru_maxrss
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+@dataclass
+class PhaseProfile:
+    '''
+    What a phase of a generation took: its wall time, the peak resident set of the process and of its largest
+    forked worker so far, in bytes, and the peak of the memory the phase allocated, when it was traced.
+    '''
+    name: str
+    seconds: float = 0.0
+    max_rss: int = 0
+    max_worker_rss: int = 0
+    traced_peak: int | None = None
+
+
+class GenerationProfile:
+    '''
+    Records the phases of a generation, a phase run many times adding up its wall time and keeping its peaks.
+    Along with the costs of the combos measured in the graph phase, it makes the report of the generation.
+    '''
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.phases = dict[str, PhaseProfile]()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        profile = self.phases.setdefault(name, PhaseProfile(name=name))
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            profile.seconds += time.perf_counter() - start
+            profile.max_rss = max(profile.max_rss, _max_rss(resource.RUSAGE_SELF))
+            profile.max_worker_rss = max(profile.max_worker_rss, _max_rss(resource.RUSAGE_CHILDREN))
+            if tracing:
+                traced_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                profile.traced_peak = max(profile.traced_peak or 0, traced_peak)
+
+    def phases_report(self) -> list[dict[str, object]]:
+        return [asdict(phase) for phase in self.phases.values()]
+
+    def report(self, combo_costs: dict[int, ComboCost], combo_ids: Iterable[int]) -> dict[str, object]:
+        '''The phases, and the costliest of the given combos, costliest first.'''
+        measured = sorted((id for id in combo_ids if id in combo_costs), key=lambda id: combo_costs[id].seconds, reverse=True)
+        return {
+            'phases': self.phases_report(),
+            'combo_count': len(measured),
+            'combos': [{'id': id, **asdict(combo_costs[id])} for id in measured[:PROFILE_TOP_COMBOS]],
+        }
+
+
+def store_generation_profile(job: str, report: dict[str, object]) -> VariantGenerationProfile:
+    '''Stores the report of a generation, dropping the profiles older than the latest `PROFILE_HISTORY` ones.'''
+    profile = VariantGenerationProfile.objects.create(job=job, report=report)
+    stale = VariantGenerationProfile.objects.order_by('-created', '-id').values_list('id', flat=True)[PROFILE_HISTORY:]
+    VariantGenerationProfile.objects.filter(id__in=list(stale)).delete()
+    return profile
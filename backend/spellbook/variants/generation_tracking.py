@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Iterable
 from django.utils import timezone
-from spellbook.models import Combo, Variant, Playable, VariantGenerationFingerprints
+from spellbook.models import Combo, Variant, Playable, VariantGenerationFingerprints, VariantGenerationComboCost, DEFAULT_BATCH_SIZE
 from spellbook.models.constants import DEFAULT_CARD_LIMIT, DEFAULT_VARIANT_LIMIT, HIGHER_CARD_LIMIT, LOWER_VARIANT_LIMIT
 from .variant_data import Data
 
@@ -193,6 +193,57 @@ def store_fingerprints(fingerprints: Fingerprints) -> None:
         VariantGenerationFingerprints.objects.bulk_update(to_update, fields=['fingerprints', 'updated'])
 
 
+@dataclass(frozen=True)
+class ComboCost:
+    '''
+    What computing the variants of a generator combo took in the graph phase of a generation. Only the
+    seconds and the variant count are stored across generations, to schedule the next ones, while the
+    size of the largest set of entries its joins produced and the entry pairs they evaluated are profiled.
+    '''
+    seconds: float
+    variant_count: int
+    largest_set: int = 0
+    join_pairs: int = 0
+
+
+def load_combo_costs() -> dict[int, ComboCost]:
+    '''Loads the combo costs measured by the previous generations, empty when none were stored.'''
+    return {
+        combo_id: ComboCost(seconds=seconds, variant_count=variant_count)
+        for combo_id, seconds, variant_count in VariantGenerationComboCost.objects.values_list('combo_id', 'seconds', 'variant_count')
+    }
+
+
+def store_combo_costs(costs: dict[int, ComboCost], combo_ids: Iterable[int]) -> None:
+    '''
+    Persists the given combo costs on top of the stored ones, which keep standing for the combos
+    a partial generation did not measure, dropping the combos not in the given ids anymore.
+    '''
+    kept = set(combo_ids)
+    existing = {row.combo_id: row for row in VariantGenerationComboCost.objects.all()}
+    to_delete = [combo_id for combo_id in existing if combo_id not in kept]
+    to_create = list[VariantGenerationComboCost]()
+    to_update = list[VariantGenerationComboCost]()
+    for combo_id, cost in costs.items():
+        if combo_id not in kept:
+            continue
+        seconds = round(cost.seconds, 6)
+        row = existing.get(combo_id)
+        if row is None:
+            to_create.append(VariantGenerationComboCost(combo_id=combo_id, seconds=seconds, variant_count=cost.variant_count))
+        elif row.seconds != seconds or row.variant_count != cost.variant_count:
+            row.seconds = seconds
+            row.variant_count = cost.variant_count
+            row.updated = timezone.now()
+            to_update.append(row)
+    if to_delete:
+        VariantGenerationComboCost.objects.filter(combo_id__in=to_delete).delete()
+    if to_create:
+        VariantGenerationComboCost.objects.bulk_create(to_create, batch_size=DEFAULT_BATCH_SIZE)
+    if to_update:
+        VariantGenerationComboCost.objects.bulk_update(to_update, fields=['seconds', 'variant_count', 'updated'], batch_size=DEFAULT_BATCH_SIZE)
+
+
 class GenerationScope(Enum):
     FULL = 'full'
     INCREMENTAL = 'incremental'
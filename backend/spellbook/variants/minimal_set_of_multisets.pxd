@@ -16,14 +16,19 @@ cimport cython
 from spellbook.variants.packed_entry cimport PackedEntry
 
 
-cdef class MinimalSetOfMultisets:
+cdef class AbstractMinimalSetOfMultisets:
+    cpdef AbstractMinimalSetOfMultisets subtree(self, PackedEntry under)
+    cpdef add(self, PackedEntry aset)
+    cpdef extend(self, object sets)
+    cpdef AbstractMinimalSetOfMultisets copy(self)
+
+
+cdef class MinimalSetOfMultisets(AbstractMinimalSetOfMultisets):
     cdef readonly set __sets
     cdef dict __element_to_entries
 
     cpdef _index_add(self, PackedEntry entry)
     cpdef _index_remove(self, PackedEntry entry)
-    cpdef set _candidates_sharing_elements(self, PackedEntry entry)
-    cpdef MinimalSetOfMultisets subtree(self, PackedEntry under)
+    cpdef set _candidates_sharing_elements(self, PackedEntry entry, bint subsets_only=*)
+    cpdef AbstractMinimalSetOfMultisets subtree(self, PackedEntry under)
     cpdef add(self, PackedEntry aset)
-    cpdef extend(self, object sets)
-    cpdef MinimalSetOfMultisets copy(self)
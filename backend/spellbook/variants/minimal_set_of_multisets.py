@@ -5,7 +5,54 @@ from .packed_entry import PackedEntry
 _EMPTY_ENTRY = PackedEntry()
 
 
-class MinimalSetOfMultisets:
+class AbstractMinimalSetOfMultisets:
+    '''
+    The operations shared by the storages of a minimal set of multisets, which keep no state here.
+    Storages implement `subtree`, `add`, `__copy__`, `__iter__`, `__len__` and `__contains__`.
+    '''
+
+    __slots__ = ()
+
+    def subtree(self, under: PackedEntry) -> 'AbstractMinimalSetOfMultisets':
+        '''
+        Creates a new minimal set of multisets containing all sets in the collection that are subsets of the given set.
+        '''
+        raise NotImplementedError
+
+    def add(self, aset: PackedEntry):
+        '''
+        Adds a set to the collection if it is not a superset of any set in the collection.
+        If the set is a subset of any set in the collection, every superset of the set is removed,
+        and the set is added to the collection.
+        '''
+        raise NotImplementedError
+
+    def extend(self, sets: Iterable[PackedEntry]):
+        '''
+        Adds multiple sets to the collection, discarding all sets that are supersets of other sets in the collection.
+        '''
+        for s in sets:
+            self.add(s)
+
+    def __str__(self):
+        return str(set(self))
+
+    def __eq__(self, other):
+        if isinstance(other, AbstractMinimalSetOfMultisets):
+            return len(self) == len(other) and all(entry in other for entry in self)
+        return False
+
+    def copy(self):
+        'Returns a shallow copy of the collection.'
+        return self.__copy__()
+
+    def __or__(self, other: Self):
+        result = self.copy()
+        result.extend(other)
+        return result
+
+
+class MinimalSetOfMultisets(AbstractMinimalSetOfMultisets):
     '''
     A class representing a minimal set of multisets.
 
@@ -62,17 +109,25 @@ class MinimalSetOfMultisets:
                 if not bucket:
                     del element_to_entries[element]
 
-    def _candidates_sharing_elements(self, entry: PackedEntry) -> set:
+    def _candidates_sharing_elements(self, entry: PackedEntry, subsets_only: bool = False) -> set:
         '''
         Returns the entries in the collection sharing at least one element with the given entry.
         Every subset and every superset of the entry is among them, except for the empty entry.
+        With `subsets_only`, entries whose signature proves they hold an element missing from the given entry are left out.
         '''
         candidates = set()
         element_to_entries = self.__element_to_entries
+        signature = entry.signature()
+        candidate: PackedEntry
         for element in entry.distinct_elements():
             bucket = element_to_entries.get(element)
             if bucket is not None:
-                candidates.update(bucket)
+                if subsets_only:
+                    for candidate in bucket:
+                        if not candidate.signature() & ~signature:
+                            candidates.add(candidate)
+                else:
+                    candidates.update(bucket)
         return candidates
 
     def subtree(self, under: PackedEntry) -> 'MinimalSetOfMultisets':
@@ -82,7 +137,7 @@ class MinimalSetOfMultisets:
         result = set()
         if _EMPTY_ENTRY in self.__sets:
             result.add(_EMPTY_ENTRY)
-        for entry in self._candidates_sharing_elements(under):
+        for entry in self._candidates_sharing_elements(under, subsets_only=True):
             if entry.issubset(under):
                 result.add(entry)
         return MinimalSetOfMultisets(_internal=result)
@@ -102,24 +157,18 @@ class MinimalSetOfMultisets:
             sets.add(aset)
             return
         candidates = self._candidates_sharing_elements(aset)
+        signature = aset.signature()
         s: PackedEntry
         for s in candidates:
-            if s.issubset(aset):
+            if not s.signature() & ~signature and s.issubset(aset):
                 return
         for s in candidates:
-            if aset.issubset(s):
+            if not signature & ~s.signature() and aset.issubset(s):
                 sets.remove(s)
                 self._index_remove(s)
         sets.add(aset)
         self._index_add(aset)
 
-    def extend(self, sets: Iterable[PackedEntry]):
-        '''
-        Adds multiple sets to the collection, discarding all sets that are supersets of other sets in the collection.
-        '''
-        for s in sets:
-            self.add(s)
-
     def __iter__(self):
         return iter(self.__sets)
 
@@ -136,21 +185,12 @@ class MinimalSetOfMultisets:
         return f'MinimalSetOfMultisets({self.__sets})'
 
     def __eq__(self, other):
-        if isinstance(other, MinimalSetOfMultisets):
+        if type(other) is MinimalSetOfMultisets:
             return self.__sets == other.__sets
-        return False
+        return super().__eq__(other)
 
     def __copy__(self):
         result = MinimalSetOfMultisets()
         result.__sets = self.__sets.copy()
         result.__element_to_entries = {element: bucket.copy() for element, bucket in self.__element_to_entries.items()}
         return result
-
-    def copy(self):
-        'Returns a shallow copy of the collection.'
-        return self.__copy__()
-
-    def __or__(self, other: Self):
-        result = self.copy()
-        result.extend(other)
-        return result
@@ -14,14 +14,26 @@
 cimport cython
 
 
+cdef unsigned long long _SIGNATURE_MULTIPLIER
+cdef unsigned long long _SIGNATURE_MASK
+cdef int _SIGNATURE_SHIFT
+cdef unsigned long long _SIGNATURE_BIT
+cdef unsigned long long _SIGNATURE_NOT_COMPUTED
+
+cpdef unsigned long long element_signature(long long element)
+cpdef Py_ssize_t signature_size(object signature)
+
+
 cdef class PackedEntry:
     cdef readonly tuple _packed
     cdef readonly Py_ssize_t _total
+    cdef readonly unsigned long long _signature
     cdef Py_hash_t _hash
 
     cpdef list items(self)
     cpdef list distinct_elements(self)
     cpdef Py_ssize_t distinct_count(self)
+    cpdef unsigned long long signature(self)
     cpdef bint issubset(self, PackedEntry other)
     cpdef bint issuperset(self, PackedEntry other)
     cpdef PackedEntry union(self, PackedEntry other)
@@ -7,10 +7,29 @@ from spellbook.models.constants import MAX_INGREDIENT_QUANTITY
 # generous headroom while keeping the encoding tied to the model bound.
 COUNT_LIMIT = MAX_INGREDIENT_QUANTITY * MAX_INGREDIENT_QUANTITY
 
+# Fibonacci hashing multiplier, spreading consecutive element ids over the bits of the signature
+_SIGNATURE_MULTIPLIER = 0x9E3779B97F4A7C15
+_SIGNATURE_MASK = 0xFFFFFFFFFFFFFFFF
+_SIGNATURE_SHIFT = 58
+_SIGNATURE_BIT = 1
+
+# Sentinel value for the lazily computed signature, which is never zero for a non-empty entry
+_SIGNATURE_NOT_COMPUTED = 0
+
 # Sentinel value for the lazily computed hash, equal to the zero-initialized value of compiled class attributes
 _HASH_NOT_COMPUTED = 0
 
 
+def element_signature(element) -> int:
+    'Returns the signature bit of an element, picked by Fibonacci hashing.'
+    return _SIGNATURE_BIT << (((element * _SIGNATURE_MULTIPLIER) & _SIGNATURE_MASK) >> _SIGNATURE_SHIFT)
+
+
+def signature_size(signature) -> int:
+    'Returns the set bits of a signature, a lower bound on the distinct elements of the entries sharing it.'
+    return signature.bit_count()
+
+
 class PackedEntry:
     '''
     An immutable multiset of integer elements, packed as a sorted tuple of
@@ -19,11 +38,17 @@ class PackedEntry:
     Packing keeps subset checks and merges cache-friendly walks over sorted integers,
     and makes hashing and equality plain tuple operations.
     Elements can be negative: Python floor division and modulo decode them correctly.
+
+    Each entry also has a 64-bit bloom-style signature with one bit set per distinct element.
+    An entry whose signature has a bit the other lacks holds an element the other does not,
+    so `a.signature() & ~b.signature()` being nonzero rejects `a.issubset(b)` without a merge-walk.
+    The signature is computed on first use, so entries discarded right after being built never pay for it.
     '''
 
-    __slots__ = ('_packed', '_total', '_hash')
+    __slots__ = ('_packed', '_total', '_signature', '_hash')
     _packed: tuple
     _total: int
+    _signature: int
     _hash: int
 
     def __init__(self, _internal: tuple = ()):
@@ -32,6 +57,7 @@ class PackedEntry:
         for packed_item in _internal:
             total += packed_item % COUNT_LIMIT
         self._total = total
+        self._signature = _SIGNATURE_NOT_COMPUTED
 
     @classmethod
     def from_items(cls, items: Iterable) -> 'PackedEntry':
@@ -63,6 +89,14 @@ class PackedEntry:
     def __len__(self) -> int:
         return self._total
 
+    def signature(self) -> int:
+        signature = self._signature
+        if signature == _SIGNATURE_NOT_COMPUTED:
+            for packed_item in self._packed:
+                signature |= element_signature(packed_item // COUNT_LIMIT)
+            self._signature = signature
+        return signature
+
     def issubset(self, other: 'PackedEntry') -> bool:
         first = self._packed
         second = other._packed
@@ -70,6 +104,8 @@ class PackedEntry:
         second_length: int = len(second)
         if first_length > second_length or self._total > other._total:
             return False
+        if self.signature() & ~other.signature():
+            return False
         i: int = 0
         j: int = 0
         while i < first_length:
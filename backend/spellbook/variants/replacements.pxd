@@ -13,5 +13,6 @@
 
 cimport cython
 
-# Everything here is left as plain compiled defs: the module is dominated by regex
-# substitution and dict lookups, and ReplacementContext is passed around as a Python object.
+# Everything here is left as plain compiled defs: the module is dominated by string joins
+# and dict lookups, ReplacementContext is passed around as a Python object, and compile_text
+# is wrapped by lru_cache, which a cpdef function cannot be.
@@ -1,12 +1,20 @@
 from collections import defaultdict
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Sequence
-from .variant_data import Data
+from .variant_data import Data, FeatureNeededInComboRow
 from .combo_graph import FeatureWithAttributes
-from spellbook.models import Card, Combo, FeatureNeededInCombo, Ingredient, Template
+from spellbook.models import Card, Combo, Ingredient, Template
 from spellbook.models.references import FEATURE_REPLACEMENT_PATTERN
 
 
+# How many built replacement contexts the data remembers for the variants sharing them, least recently used first out
+CONTEXTS_CACHE_SIZE = 8192
+
+# How many distinct texts stay tokenized at once
+TEXTS_CACHE_SIZE = 16384
+
+
 @dataclass(frozen=True)
 class Replacement:
     '''A single rendered replacement for a feature, keeping the backing card (when the replacement
@@ -22,6 +30,53 @@ class Replacement:
         return self.text
 
 
+@dataclass(frozen=True)
+class Placeholder:
+    '''A [[feature]] placeholder found in a text, split into the parts of FEATURE_REPLACEMENT_PATTERN.'''
+    key: str
+    face: int | None
+    alias: str | None
+    selector: str | None
+    postfix_alias: str | None
+    source: str
+
+
+@dataclass(frozen=True)
+class CompiledText:
+    '''A text tokenized into its literal parts and its placeholders, so that rendering it needs no regex.'''
+    parts: tuple[str | Placeholder, ...]
+    keys: frozenset[str]
+    registers_aliases: bool
+
+
+@lru_cache(maxsize=TEXTS_CACHE_SIZE)
+def compile_text(text: str) -> CompiledText:
+    '''Tokenizes a text once, however many variants render it.'''
+    parts = list[str | Placeholder]()
+    last = 0
+    for m in FEATURE_REPLACEMENT_PATTERN.finditer(text):
+        if m.start() > last:
+            parts.append(text[last:m.start()])
+        face = m.group('face')
+        parts.append(Placeholder(
+            key=m.group('key'),
+            face=int(face) if face else None,
+            alias=m.group('alias'),
+            selector=m.group('selector'),
+            postfix_alias=m.group('postfix_alias'),
+            source=m.group(0),
+        ))
+        last = m.end()
+    if last < len(text):
+        parts.append(text[last:])
+    placeholders = [part for part in parts if isinstance(part, Placeholder)]
+    return CompiledText(
+        parts=tuple(parts),
+        keys=frozenset(placeholder.key for placeholder in placeholders),
+        registers_aliases=any(placeholder.alias or placeholder.postfix_alias for placeholder in placeholders),
+    )
+
+
 class ReplacementContext:
     '''Substitutes the placeholders of every text of a single variant, from the replacements available
     to it, keyed by feature name.
@@ -33,11 +88,20 @@ class ReplacementContext:
     Aliases registered while rendering one text are visible to every text rendered afterwards, so one
     context spans a whole variant and the rendering order matters: the ingredient states first, in the
     ingredients' display order, then the variant text fields.
+
+    The contexts of variants with the same replacements and needed combos share their replacement
+    lists, which are never modified, and the texts they rendered without involving any alias.
     '''
 
-    def __init__(self, base: dict[str, list[Replacement]], by_combo: dict[int, dict[str, list[Replacement]]]) -> None:
+    def __init__(
+        self,
+        base: dict[str, list[Replacement]],
+        by_combo: dict[int, dict[str, list[Replacement]]],
+        rendered: dict[tuple[str, int | None], str] | None = None,
+    ) -> None:
         self.base = base
         self.by_combo = by_combo
+        self.rendered = rendered if rendered is not None else dict[tuple[str, int | None], str]()
         self.aliases = dict[str, list[Replacement]]()
 
     @classmethod
@@ -56,8 +120,46 @@ class ReplacementContext:
         computed once and reused across every text field the variant regenerates.
         The used_faces mapping (card id -> used face) makes a card whose face is specified
         display the corresponding half of its name instead of the whole name.
+        Variants sharing the needed combos, the replacing ingredients with their used faces and
+        their positions get a context built only once, remembered by the data.
         '''
-        needed_features_by_feature = defaultdict[int, list[FeatureNeededInCombo]](list)
+        key = (
+            tuple(combo.id for combo in needed_combos),
+            tuple(
+                (feature, tuple(
+                    (
+                        tuple((c.id, used_faces.get(c.id)) for c in cards),
+                        tuple(t.id for t in templates),
+                        cls._position(cards, templates, card_positions, template_positions),
+                    )
+                    for cards, templates in replacement_list
+                ))
+                for feature, replacement_list in replacements.items()
+            ),
+        )
+        contexts = data.replacement_contexts
+        cached = contexts.get(key)
+        if cached is not None:
+            contexts.move_to_end(key)
+        else:
+            cached = cls._build(data, replacements, needed_combos, used_faces, card_positions, template_positions)
+            contexts[key] = cached
+            if len(contexts) > CONTEXTS_CACHE_SIZE:
+                contexts.popitem(last=False)
+        # every variant starts without aliases
+        return cls(cached.base, cached.by_combo, cached.rendered)
+
+    @classmethod
+    def _build(
+        cls,
+        data: Data,
+        replacements: dict[FeatureWithAttributes, list[tuple[list[Card], list[Template]]]],
+        needed_combos: Sequence[Combo],
+        used_faces: dict[int, int | None],
+        card_positions: dict[int, int],
+        template_positions: dict[int, int],
+    ) -> 'ReplacementContext':
+        needed_features_by_feature = defaultdict[int, list[FeatureNeededInComboRow]](list)
         for combo in needed_combos:
             for feature_needed in data.combo_to_needed_features[combo.id]:
                 needed_features_by_feature[feature_needed.feature_id].append(feature_needed)
@@ -92,7 +194,7 @@ class ReplacementContext:
             base[name] = [replacement for entry in entries for replacement in entry[2]]
         by_combo = dict[int, dict[str, list[Replacement]]]()
         for combo in needed_combos:
-            needed_features_of_combo = defaultdict[int, list[FeatureNeededInCombo]](list)
+            needed_features_of_combo = defaultdict[int, list[FeatureNeededInComboRow]](list)
             for feature_needed in data.combo_to_needed_features[combo.id]:
                 needed_features_of_combo[feature_needed.feature_id].append(feature_needed)
             for_combo = dict[str, list[Replacement]]()
@@ -149,29 +251,47 @@ class ReplacementContext:
         return next((replacement for replacement in strings if attribute in replacement.attributes), None)
 
     def apply(self, text: str, combo_id: int | None = None) -> str:
-        def replacement_with_fallback(key: str, face: str | None, alias: str | None, selector: str | None, postfix_alias: str | None, otherwise: str) -> str:
-            face_index = int(face) if face else None
-            strings = self.aliases[key] if key in self.aliases else self._replacements_for(key, combo_id)
-            replacement = self._select(strings, selector)
+        compiled = compile_text(text)
+        if not compiled.keys:
+            return text
+        if combo_id not in self.by_combo:
+            # the texts of combos without their own ordering render as the texts of no combo
+            combo_id = None
+        if compiled.registers_aliases or not compiled.keys.isdisjoint(self.aliases):
+            return self._render(compiled, combo_id)
+        # the text neither reads nor writes aliases, so it renders the same in every variant sharing the context
+        key = (text, combo_id)
+        result = self.rendered.get(key)
+        if result is None:
+            result = self._render(compiled, combo_id)
+            self.rendered[key] = result
+        return result
+
+    def _render(self, compiled: CompiledText, combo_id: int | None) -> str:
+        rendered = list[str]()
+        for part in compiled.parts:
+            if isinstance(part, str):
+                rendered.append(part)
+                continue
+            strings = self.aliases[part.key] if part.key in self.aliases else self._replacements_for(part.key, combo_id)
+            replacement = self._select(strings, part.selector)
             if replacement is None:
-                return otherwise
-            result = replacement.resolve(face_index)
-            if alias:
+                rendered.append(part.source)
+                continue
+            result = replacement.resolve(part.face)
+            if part.alias:
                 # when a face is selected, the alias saves the resolved face name; otherwise it aliases the whole feature
-                self.aliases[alias] = [Replacement(text=result)] if face_index is not None else strings
-            if postfix_alias:
-                self.aliases.setdefault(postfix_alias, []).append(Replacement(text=result))
-            return result
-
-        return FEATURE_REPLACEMENT_PATTERN.sub(
-            lambda m: replacement_with_fallback(m.group('key'), m.group('face'), m.group('alias'), m.group('selector'), m.group('postfix_alias'), m.group(0)),
-            text,
-        )
+                self.aliases[part.alias] = [Replacement(text=result)] if part.face is not None else strings
+            if part.postfix_alias:
+                # a new list, because the one already aliased can be shared with the context or with other aliases
+                self.aliases[part.postfix_alias] = [*self.aliases.get(part.postfix_alias, ()), Replacement(text=result)]
+            rendered.append(result)
+        return ''.join(rendered)
 
     def render_ingredient_states(
         self,
         ingredient: Ingredient,
-        features_for_override: Sequence[FeatureNeededInCombo],
+        features_for_override: Sequence[FeatureNeededInComboRow],
     ) -> None:
         '''Substitutes the placeholders in the starting card state fields of an ingredient, preferring the
         states of the needed features it replaces over the ones inherited from the combos it appears in.'''
@@ -52,3 +52,4 @@ cdef class Data:
     cdef public dict variant_to_produces
     cdef public dict variant_produces_feature_dict
     cdef public frozenset utility_features_ids
+    cdef public object replacement_contexts
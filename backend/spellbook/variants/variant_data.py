@@ -1,4 +1,8 @@
+import sys
+from collections import OrderedDict
 from dataclasses import dataclass, fields
+from itertools import chain
+from django.db.models import QuerySet
 from spellbook.models.card import Card, FeatureOfCard
 from spellbook.models.feature import Feature
 from spellbook.models.feature_attribute import FeatureAttribute
@@ -90,34 +94,246 @@ class VariantIncludesComboRow:
     variant_id: str
 
 
+# Lightweight read-only rows for the combo and card relation tables, which the graph
+# and the restore phase only ever read through their columns.
+
+@dataclass(frozen=True, slots=True)
+class FeatureOfCardRow:
+    id: int
+    card_id: int
+    feature_id: int
+    quantity: int
+    zone_locations: str
+    battlefield_card_state: str
+    exile_card_state: str
+    graveyard_card_state: str
+    library_card_state: str
+    must_be_commander: bool
+    used_face: int | None
+    mana_needed: str
+    easy_prerequisites: str
+    notable_prerequisites: str
+
+
+@dataclass(frozen=True, slots=True)
+class CardInComboRow:
+    id: int
+    card_id: int
+    combo_id: int
+    quantity: int
+    zone_locations: str
+    battlefield_card_state: str
+    exile_card_state: str
+    graveyard_card_state: str
+    library_card_state: str
+    must_be_commander: bool
+    order: int
+    in_replacements: bool
+    used_face: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class TemplateInComboRow:
+    id: int
+    template_id: int
+    combo_id: int
+    quantity: int
+    zone_locations: str
+    battlefield_card_state: str
+    exile_card_state: str
+    graveyard_card_state: str
+    library_card_state: str
+    must_be_commander: bool
+    order: int
+    in_replacements: bool
+
+
+@dataclass(frozen=True, slots=True)
+class FeatureNeededInComboRow:
+    id: int
+    feature_id: int
+    combo_id: int
+    quantity: int
+    zone_locations: str
+    battlefield_card_state: str
+    exile_card_state: str
+    graveyard_card_state: str
+    library_card_state: str
+    must_be_commander: bool
+    order: int
+    in_replacements: bool
+
+
+@dataclass(frozen=True, slots=True)
+class FeatureProducedInComboRow:
+    id: int
+    feature_id: int
+    combo_id: int
+
+
+@dataclass(frozen=True, slots=True)
+class FeatureRemovedInComboRow:
+    id: int
+    feature_id: int
+    combo_id: int
+
+
+# What a variant ingredient can inherit its starting state from
+IngredientStateRow = FeatureOfCardRow | CardInComboRow | TemplateInComboRow
+
+
 def _load_rows(row_class, queryset):
     '''Loads lightweight rows via values_list, using the row dataclass field names as the model field names.'''
     field_names = [field.name for field in fields(row_class)]
     return [row_class(*row) for row in queryset.order_by().values_list(*field_names)]
 
 
+# The columns of the entity tables that neither the graph, the restore phase nor the fingerprints read,
+# left out of their model instances. Reading one would cost a query per instance.
+_UNREAD_FEATURE_COLUMNS = ('description',)
+_UNREAD_TEMPLATE_COLUMNS = ('scryfall_query', 'description')
+_UNREAD_CARD_COLUMNS = tuple(field for field in Card.scryfall_fields() if field.startswith(('image_uri_', 'layout_rotation_')))
+
+
+def _reference_querysets() -> dict[str, QuerySet]:
+    '''The querysets of the reference part of the generation data, which describes what variants can be made of.'''
+    generated = (Combo.Status.GENERATOR, Combo.Status.UTILITY)
+    return {
+        # Features
+        'features': Feature.objects.order_by().defer(*_UNREAD_FEATURE_COLUMNS),
+        'feature_attributes': FeatureAttribute.objects.order_by(),
+        # Cards
+        'cards': Card.objects.order_by().defer(*_UNREAD_CARD_COLUMNS),
+        'featureofcards': FeatureOfCard.objects.order_by(),
+        'featureofcard_attributes': FeatureOfCard.attributes.through.objects.order_by(),
+        # Templates
+        'templates': Template.objects.order_by().defer(*_UNREAD_TEMPLATE_COLUMNS),
+        # Combos
+        'combos': Combo.objects.order_by(),  # Draft combos are only used to update the variant count
+        'cardincombos': CardInCombo.objects.filter(combo__status__in=generated).order_by(),
+        'templateincombos': TemplateInCombo.objects.filter(combo__status__in=generated).order_by(),
+        'featureproducedincombos': FeatureProducedInCombo.objects.filter(combo__status__in=generated).order_by(),
+        'featureneededincombos': FeatureNeededInCombo.objects.filter(combo__status__in=generated).order_by(),
+        'featureremovedincombos': FeatureRemovedInCombo.objects.filter(combo__status__in=generated).order_by(),
+        'featureneededincombo_anyofattributes': FeatureNeededInCombo.any_of_attributes.through.objects.filter(featureneededincombo__combo__status__in=generated).order_by(),
+        'featureneededincombo_allofattributes': FeatureNeededInCombo.all_of_attributes.through.objects.filter(featureneededincombo__combo__status__in=generated).order_by(),
+        'featureneededincombo_noneofattributes': FeatureNeededInCombo.none_of_attributes.through.objects.filter(featureneededincombo__combo__status__in=generated).order_by(),
+        'featureproducedincombo_attributes': FeatureProducedInCombo.attributes.through.objects.filter(featureproducedincombo__combo__status__in=generated).order_by(),
+    }
+
+
+# The reference tables loaded as lightweight rows instead of model instances
+_REFERENCE_ROW_CLASSES: dict[str, type] = {
+    'featureofcards': FeatureOfCardRow,
+    'cardincombos': CardInComboRow,
+    'templateincombos': TemplateInComboRow,
+    'featureproducedincombos': FeatureProducedInComboRow,
+    'featureneededincombos': FeatureNeededInComboRow,
+    'featureremovedincombos': FeatureRemovedInComboRow,
+}
+
+# The attribute link tables, loaded as bare (owner id, attribute id) pairs
+_REFERENCE_LINK_COLUMNS: dict[str, tuple[str, str]] = {
+    'featureofcard_attributes': ('featureofcard_id', 'featureattribute_id'),
+    'featureneededincombo_anyofattributes': ('featureneededincombo_id', 'featureattribute_id'),
+    'featureneededincombo_allofattributes': ('featureneededincombo_id', 'featureattribute_id'),
+    'featureneededincombo_noneofattributes': ('featureneededincombo_id', 'featureattribute_id'),
+    'featureproducedincombo_attributes': ('featureproducedincombo_id', 'featureattribute_id'),
+}
+
+
+def _loaded_attnames(queryset: QuerySet) -> list[str]:
+    '''The columns a queryset loads into its model instances, in model order, honoring the fields its manager defers.'''
+    names, defer = queryset.query.deferred_loading
+    return [
+        field.attname
+        for field in queryset.model._meta.concrete_fields
+        if field.primary_key or (field.name not in names) == defer
+    ]
+
+
+def reference_columns() -> dict[str, list[str]]:
+    '''The columns read from each table of the reference part of the generation data.'''
+    return {name: _reference_columns(name, queryset) for name, queryset in _reference_querysets().items()}
+
+
+def _reference_columns(name: str, queryset: QuerySet) -> list[str]:
+    row_class = _REFERENCE_ROW_CLASSES.get(name)
+    if row_class is not None:
+        return [field.name for field in fields(row_class)]
+    link_columns = _REFERENCE_LINK_COLUMNS.get(name)
+    if link_columns is not None:
+        return list(link_columns)
+    return _loaded_attnames(queryset)
+
+
+def fetch_reference_rows() -> dict[str, list[tuple]]:
+    '''
+    Fetches the reference part of the generation data as plain value tuples, which are cheaper
+    to fetch than model instances, and can be stored as they are.
+    '''
+    return {
+        name: list(queryset.values_list(*_reference_columns(name, queryset)))
+        for name, queryset in _reference_querysets().items()
+    }
+
+
+def _materialize(name: str, queryset: QuerySet, rows: list[tuple]) -> list:
+    '''Turns value tuples back into the rows, pairs or model instances the table is held as.'''
+    row_class = _REFERENCE_ROW_CLASSES.get(name)
+    if row_class is not None:
+        return [row_class(*row) for row in rows]
+    if name in _REFERENCE_LINK_COLUMNS:
+        return rows
+    model = queryset.model
+    attnames = _loaded_attnames(queryset)
+    return [model.from_db(queryset.db, attnames, row) for row in rows]
+
+
+def _row_size(row) -> int:
+    '''The bytes taken by a row and by the values it holds, not counting what those values refer to in turn.'''
+    size = sys.getsizeof(row)
+    values = getattr(row, '__dict__', None)
+    if values is not None:
+        size += sys.getsizeof(values)
+        return size + sum(sys.getsizeof(value) for value in values.values())
+    if isinstance(row, tuple):
+        return size + sum(sys.getsizeof(value) for value in row)
+    return size + sum(sys.getsizeof(getattr(row, slot)) for slot in row.__slots__)
+
+
 class Data:
-    def __init__(self):
+    def __init__(self, reference: dict[str, list[tuple]] | None = None):
+        '''
+        Loads the generation data. The reference part can be given as rows fetched earlier
+        by `fetch_reference_rows`, while the variant part is always read from the database.
+        '''
+        if reference is None:
+            reference = fetch_reference_rows()
+        tables = {
+            name: _materialize(name, queryset, reference[name])
+            for name, queryset in _reference_querysets().items()
+        }
         # Features
-        features = list(Feature.objects.order_by())
-        feature_attributes = list(FeatureAttribute.objects.order_by())
+        features: list[Feature] = tables['features']
+        feature_attributes: list[FeatureAttribute] = tables['feature_attributes']
         # Cards
-        cards = list(Card.objects.order_by())
-        featureofcards = list(FeatureOfCard.objects.order_by())
-        featureofcard_attributes = list(FeatureOfCard.attributes.through.objects.order_by())
+        cards: list[Card] = tables['cards']
+        featureofcards: list[FeatureOfCardRow] = tables['featureofcards']
+        featureofcard_attributes: list[tuple[int, int]] = tables['featureofcard_attributes']
         # Templates
-        templates = list(Template.objects.order_by())
+        templates: list[Template] = tables['templates']
         # Combos
-        combos = list(Combo.objects.order_by())  # Draft combos are only used to update the variant count
-        cardincombos = list(CardInCombo.objects.filter(combo__status__in=(Combo.Status.GENERATOR, Combo.Status.UTILITY)).order_by())
-        templateincombos = list(TemplateInCombo.objects.filter(combo__status__in=(Combo.Status.GENERATOR, Combo.Status.UTILITY)).order_by())
-        featureproducedincombos = list(FeatureProducedInCombo.objects.filter(combo__status__in=(Combo.Status.GENERATOR, Combo.Status.UTILITY)).order_by())
-        featureneededincombos = list(FeatureNeededInCombo.objects.filter(combo__status__in=(Combo.Status.GENERATOR, Combo.Status.UTILITY)).order_by())
-        featureremovedincombos = list(FeatureRemovedInCombo.objects.filter(combo__status__in=(Combo.Status.GENERATOR, Combo.Status.UTILITY)).order_by())
-        featureneededincombo_anyofattributes = list(FeatureNeededInCombo.any_of_attributes.through.objects.filter(featureneededincombo__combo__status__in=(Combo.Status.GENERATOR, Combo.Status.UTILITY)).order_by())
-        featureneededincombo_allofattributes = list(FeatureNeededInCombo.all_of_attributes.through.objects.filter(featureneededincombo__combo__status__in=(Combo.Status.GENERATOR, Combo.Status.UTILITY)).order_by())
-        featureneededincombo_noneofattributes = list(FeatureNeededInCombo.none_of_attributes.through.objects.filter(featureneededincombo__combo__status__in=(Combo.Status.GENERATOR, Combo.Status.UTILITY)).order_by())
-        featureproducedincombo_attributes = list(FeatureProducedInCombo.attributes.through.objects.filter(featureproducedincombo__combo__status__in=(Combo.Status.GENERATOR, Combo.Status.UTILITY)).order_by())
+        combos: list[Combo] = tables['combos']
+        cardincombos: list[CardInComboRow] = tables['cardincombos']
+        templateincombos: list[TemplateInComboRow] = tables['templateincombos']
+        featureproducedincombos: list[FeatureProducedInComboRow] = tables['featureproducedincombos']
+        featureneededincombos: list[FeatureNeededInComboRow] = tables['featureneededincombos']
+        featureremovedincombos: list[FeatureRemovedInComboRow] = tables['featureremovedincombos']
+        featureneededincombo_anyofattributes: list[tuple[int, int]] = tables['featureneededincombo_anyofattributes']
+        featureneededincombo_allofattributes: list[tuple[int, int]] = tables['featureneededincombo_allofattributes']
+        featureneededincombo_noneofattributes: list[tuple[int, int]] = tables['featureneededincombo_noneofattributes']
+        featureproducedincombo_attributes: list[tuple[int, int]] = tables['featureproducedincombo_attributes']
         # Variants, loaded as lightweight rows instead of model instances
         variants = _load_rows(VariantRow, Variant.objects)
         cardinvariants = _load_rows(CardInVariantRow, CardInVariant.objects)
@@ -134,33 +350,33 @@ class Data:
         self.id_to_feature = {f.id: f for f in features}
         self.id_to_feature_attribute = {a.id: a for a in feature_attributes}
         self.generator_combos = [c for c in combos if c.status == Combo.Status.GENERATOR]
-        self.combo_to_cards = {c.id: list[CardInCombo]() for c in combos}
+        self.combo_to_cards = {c.id: list[CardInComboRow]() for c in combos}
         for cardincombo in cardincombos:
             x = self.combo_to_cards.get(cardincombo.combo_id)
             if x is not None:
                 x.append(cardincombo)
         for i in self.combo_to_cards.values():
             i.sort(key=lambda cic: cic.order)
-        self.combo_to_templates = {c.id: list[TemplateInCombo]() for c in combos}
+        self.combo_to_templates = {c.id: list[TemplateInComboRow]() for c in combos}
         for i in templateincombos:
             x = self.combo_to_templates.get(i.combo_id)
             if x is not None:
                 x.append(i)
         for i in self.combo_to_templates.values():
             i.sort(key=lambda tic: tic.order)
-        self.combo_to_produced_features = {c.id: list[FeatureProducedInCombo]() for c in combos}
+        self.combo_to_produced_features = {c.id: list[FeatureProducedInComboRow]() for c in combos}
         for i in featureproducedincombos:
             x = self.combo_to_produced_features.get(i.combo_id)
             if x is not None:
                 x.append(i)
-        self.combo_to_needed_features = {c.id: list[FeatureNeededInCombo]() for c in combos}
+        self.combo_to_needed_features = {c.id: list[FeatureNeededInComboRow]() for c in combos}
         for i in featureneededincombos:
             x = self.combo_to_needed_features.get(i.combo_id)
             if x is not None:
                 x.append(i)
         for i in self.combo_to_needed_features.values():
             i.sort(key=lambda fnic: (fnic.order, fnic.id))
-        self.combo_to_removed_features = {c.id: list[FeatureRemovedInCombo]() for c in combos}
+        self.combo_to_removed_features = {c.id: list[FeatureRemovedInComboRow]() for c in combos}
         for i in featureremovedincombos:
             x = self.combo_to_removed_features.get(i.combo_id)
             if x is not None:
@@ -168,20 +384,20 @@ class Data:
 
         self.feature_needed_in_combo_to_attributes_matcher = dict[int, AttributesMatcher]()
         feature_needed_in_combo_to_any_of_attributes = {f.id: set[int]() for f in featureneededincombos}
-        for i in featureneededincombo_anyofattributes:
-            x = feature_needed_in_combo_to_any_of_attributes.get(i.featureneededincombo_id)
+        for owner_id, attribute_id in featureneededincombo_anyofattributes:
+            x = feature_needed_in_combo_to_any_of_attributes.get(owner_id)
             if x is not None:
-                x.add(i.featureattribute_id)
+                x.add(attribute_id)
         feature_needed_in_combo_to_all_of_attributes = {f.id: set[int]() for f in featureneededincombos}
-        for i in featureneededincombo_allofattributes:
-            x = feature_needed_in_combo_to_all_of_attributes.get(i.featureneededincombo_id)
+        for owner_id, attribute_id in featureneededincombo_allofattributes:
+            x = feature_needed_in_combo_to_all_of_attributes.get(owner_id)
             if x is not None:
-                x.add(i.featureattribute_id)
+                x.add(attribute_id)
         feature_needed_in_combo_to_none_of_attributes = {f.id: set[int]() for f in featureneededincombos}
-        for i in featureneededincombo_noneofattributes:
-            x = feature_needed_in_combo_to_none_of_attributes.get(i.featureneededincombo_id)
+        for owner_id, attribute_id in featureneededincombo_noneofattributes:
+            x = feature_needed_in_combo_to_none_of_attributes.get(owner_id)
             if x is not None:
-                x.add(i.featureattribute_id)
+                x.add(attribute_id)
         for i in featureneededincombos:
             self.feature_needed_in_combo_to_attributes_matcher[i.id] = AttributesMatcher(
                 any_of=frozenset(feature_needed_in_combo_to_any_of_attributes[i.id]),
@@ -189,12 +405,12 @@ class Data:
                 none_of=frozenset(feature_needed_in_combo_to_none_of_attributes[i.id]),
             )
         self.feature_produced_in_combo_to_attributes = {f.id: set[int]() for f in featureproducedincombos}
-        for i in featureproducedincombo_attributes:
-            x = self.feature_produced_in_combo_to_attributes.get(i.featureproducedincombo_id)
+        for owner_id, attribute_id in featureproducedincombo_attributes:
+            x = self.feature_produced_in_combo_to_attributes.get(owner_id)
             if x is not None:
-                x.add(i.featureattribute_id)
-        self.card_to_features = {c.id: list[FeatureOfCard]() for c in cards}
-        self.features_to_cards = {f.id: list[FeatureOfCard]() for f in features}
+                x.add(attribute_id)
+        self.card_to_features = {c.id: list[FeatureOfCardRow]() for c in cards}
+        self.features_to_cards = {f.id: list[FeatureOfCardRow]() for f in features}
         for i in featureofcards:
             x = self.card_to_features.get(i.card_id)
             y = self.features_to_cards.get(i.feature_id)
@@ -202,10 +418,10 @@ class Data:
                 x.append(i)
                 y.append(i)
         self.feature_of_card_to_attributes = {f.id: set[int]() for f in featureofcards}
-        for i in featureofcard_attributes:
-            x = self.feature_of_card_to_attributes.get(i.featureofcard_id)
+        for owner_id, attribute_id in featureofcard_attributes:
+            x = self.feature_of_card_to_attributes.get(owner_id)
             if x is not None:
-                x.add(i.featureattribute_id)
+                x.add(attribute_id)
 
         self.variant_to_cards = {v.id: set[CardInVariantRow]() for v in variants}
         for i in cardinvariants:
@@ -242,6 +458,42 @@ class Data:
                 x.add(i)
         self.variant_produces_feature_dict = {(f.feature_id, f.variant_id): f for f in featureproducedbyvariants if f.feature_id in self.id_to_feature and f.variant_id in self.id_to_variant}
         self.utility_features_ids = frozenset(f.id for f in self.id_to_feature.values() if f.is_utility)
+        # The replacement contexts built from this data, filled and bounded by `ReplacementContext.build`
+        self.replacement_contexts = OrderedDict[tuple, object]()
+
+    def memory_report(self) -> list[tuple[str, int, int]]:
+        '''
+        Counts the rows held for every table, along with roughly how many bytes they take:
+        each row with the values it holds, but not what those values share with other rows.
+        '''
+        tables = {
+            'features': self.id_to_feature.values(),
+            'feature_attributes': self.id_to_feature_attribute.values(),
+            'cards': self.id_to_card.values(),
+            'featureofcards': self.id_to_feature_of_card.values(),
+            'templates': self.id_to_template.values(),
+            'combos': self.id_to_combo.values(),
+            'cardincombos': chain.from_iterable(self.combo_to_cards.values()),
+            'templateincombos': chain.from_iterable(self.combo_to_templates.values()),
+            'featureproducedincombos': chain.from_iterable(self.combo_to_produced_features.values()),
+            'featureneededincombos': chain.from_iterable(self.combo_to_needed_features.values()),
+            'featureremovedincombos': chain.from_iterable(self.combo_to_removed_features.values()),
+            'variants': self.id_to_variant.values(),
+            'cardinvariants': chain.from_iterable(self.variant_to_cards.values()),
+            'templateinvariants': chain.from_iterable(self.variant_to_templates.values()),
+            'variantofcombos': chain.from_iterable(self.variant_to_of_sets.values()),
+            'variantincludescombos': chain.from_iterable(self.variant_to_includes_sets.values()),
+            'featureproducedbyvariants': chain.from_iterable(self.variant_to_produces.values()),
+        }
+        report = list[tuple[str, int, int]]()
+        for name, rows in tables.items():
+            count = 0
+            size = 0
+            for row in rows:
+                count += 1
+                size += _row_size(row)
+            report.append((name, count, size))
+        return report
 
     def fetch_variants(self, ids) -> dict[str, Variant]:
         '''Hydrates full Variant model instances for the given ids, in chunks.'''
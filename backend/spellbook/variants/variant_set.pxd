@@ -14,7 +14,11 @@
 cimport cython
 
 from spellbook.variants.packed_entry cimport PackedEntry
-from spellbook.variants.minimal_set_of_multisets cimport MinimalSetOfMultisets
+from spellbook.variants.minimal_set_of_multisets cimport AbstractMinimalSetOfMultisets, MinimalSetOfMultisets
+from spellbook.variants.columnar_minimal_set_of_multisets cimport ColumnarMinimalSetOfMultisets
+
+
+cpdef AbstractMinimalSetOfMultisets new_minimal_set_of_multisets(object sets=*, object _internal=*)
 
 
 cdef class VariantSetParameters:
@@ -27,8 +31,17 @@ cdef class VariantSetParameters:
 
 cdef class VariantSet:
     cdef VariantSetParameters __parameters
-    cdef MinimalSetOfMultisets __sets
+    cdef AbstractMinimalSetOfMultisets __sets
 
-    cpdef MinimalSetOfMultisets entries(self)
+    cpdef AbstractMinimalSetOfMultisets entries(self)
+    cpdef AbstractMinimalSetOfMultisets _bounded_join(self, VariantSet other, bint combine, Py_ssize_t limit=*)
     cpdef VariantSet filter(self, PackedEntry entry)
     cpdef list variants(self)
+
+
+# SizeSketch and JoinPlan stay dataclasses: a plan is made once per combo, and its cost is in the
+# unions of the sampled entries, which are compiled all the same.
+cpdef tuple _sample(object entries, Py_ssize_t count)
+cpdef frozenset _card_set(PackedEntry entry)
+cpdef list _entries_by_shape(object entries, bint by_cards)
+cpdef _extend_product(list entry_lists, Py_ssize_t index, PackedEntry partial, frozenset partial_cards, VariantSetParameters parameters, AbstractMinimalSetOfMultisets result, object statistics)
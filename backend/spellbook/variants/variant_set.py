@@ -1,16 +1,86 @@
 from typing import Iterable, Callable, Self
-from itertools import product, chain
+from itertools import chain, islice
 from functools import reduce
-from operator import add
+from operator import itemgetter
 from dataclasses import dataclass
+import os
+import sys
 from .multiset import FrozenMultiset
-from .packed_entry import PackedEntry
-from .minimal_set_of_multisets import MinimalSetOfMultisets
+from .packed_entry import PackedEntry, signature_size
+from .minimal_set_of_multisets import AbstractMinimalSetOfMultisets, MinimalSetOfMultisets
+from .columnar_minimal_set_of_multisets import ColumnarMinimalSetOfMultisets
 
 cardid = int
 templateid = int
 Entry = PackedEntry
 
+# Selects the storage backing every variant set: `set` keeps the entries as `PackedEntry` objects in a
+# Python set, `columnar` packs them in a flat integer arena, trading some speed for a smaller footprint.
+STORAGE_ENV_VAR = 'VARIANT_SET_STORAGE'
+STORAGE_BACKENDS: dict[str, type[AbstractMinimalSetOfMultisets]] = {
+    'set': MinimalSetOfMultisets,
+    'columnar': ColumnarMinimalSetOfMultisets,
+}
+
+
+def resolve_storage() -> type[AbstractMinimalSetOfMultisets]:
+    '''Returns the minimal set of multisets implementation named by `VARIANT_SET_STORAGE`, the set one by default.'''
+    configured = os.environ.get(STORAGE_ENV_VAR, '').strip().lower()
+    if not configured:
+        return MinimalSetOfMultisets
+    try:
+        return STORAGE_BACKENDS[configured]
+    except KeyError:
+        raise ValueError(f'{STORAGE_ENV_VAR} is set to {configured!r}, which is not one of {", ".join(STORAGE_BACKENDS)}') from None
+
+
+# Read once: every variant set of a run has to share the same storage, forked workers included
+_STORAGE = resolve_storage()
+
+
+# Signatures hold 64 bits, so they cannot bound the size of a union beyond that
+_SIGNATURE_BITS = 64
+
+# How many entries of each operand the size sketches sample, so estimating a join costs at most its square in unions
+SKETCH_SAMPLE_SIZE = 16
+
+# The entry limit of a join that has none
+_NO_LIMIT = sys.maxsize
+
+
+@dataclass
+class JoinStatistics:
+    '''
+    Counts the entry pairs the variant set joins built and checked, and those they pruned beforehand,
+    along with the size of the largest set of entries a join produced.
+    '''
+    evaluated: int = 0
+    pruned: int = 0
+    largest: int = 0
+
+    def reset(self):
+        self.evaluated = 0
+        self.pruned = 0
+        self.largest = 0
+
+    def merge(self, other: 'JoinStatistics'):
+        self.evaluated += other.evaluated
+        self.pruned += other.pruned
+        self.largest = max(self.largest, other.largest)
+
+    def __str__(self) -> str:
+        total = self.evaluated + self.pruned
+        share = self.pruned / total if total else 0.0
+        return f'{self.evaluated} entry pairs evaluated, {self.pruned} pruned ({share:.1%}), largest result of {self.largest} entries'
+
+
+# Accumulated by every join of the process, reset and read by whoever measures a phase
+JOIN_STATISTICS = JoinStatistics()
+
+
+def new_minimal_set_of_multisets(sets: Iterable[Entry] | None = None, _internal: Iterable[Entry] | None = None) -> AbstractMinimalSetOfMultisets:
+    return _STORAGE(sets=sets, _internal=_internal)
+
 
 @dataclass(frozen=True)
 class VariantSetParameters:
@@ -30,19 +100,99 @@ class VariantSetParameters:
         return True
 
 
+@dataclass(frozen=True)
+class SizeSketch:
+    '''
+    Estimates how many entries a variant set, or an intersection of variant sets, holds, from an evenly
+    spread sample of at most `SKETCH_SAMPLE_SIZE` of its entries. Joining two sketches joins their samples
+    and scales the share of sampled pairs that survive `max_depth`, the other parameters and the
+    minimality of the result up to the product of the sizes. While the samples hold every entry,
+    the sketch is the join itself, and its size is exact.
+    '''
+    size: int
+    sample: tuple[Entry, ...]
+    exact: bool
+
+    @classmethod
+    def of(cls, variant_set: 'VariantSet') -> 'SizeSketch':
+        size = len(variant_set)
+        return cls(size=size, sample=_sample(variant_set.entries(), size), exact=size <= SKETCH_SAMPLE_SIZE)
+
+    def join(self, other: 'SizeSketch', parameters: VariantSetParameters) -> 'SizeSketch':
+        result: AbstractMinimalSetOfMultisets = new_minimal_set_of_multisets()
+        left_entry: PackedEntry
+        right_entry: PackedEntry
+        entry: PackedEntry
+        for left_entry in self.sample:
+            for right_entry in other.sample:
+                entry = left_entry | right_entry
+                if parameters._check_entry(entry):
+                    result.add(entry)
+        count = len(result)
+        if self.exact and other.exact:
+            size = count
+        else:
+            pairs = len(self.sample) * len(other.sample)
+            size = (self.size * other.size * count + pairs - 1) // pairs if pairs else 0
+        return SizeSketch(size=size, sample=_sample(result, count), exact=self.exact and other.exact and count <= SKETCH_SAMPLE_SIZE)
+
+
+def _sample(entries: Iterable[Entry], count) -> tuple[Entry, ...]:
+    '''Picks at most `SKETCH_SAMPLE_SIZE` entries, evenly spread over the given ones.'''
+    if count <= SKETCH_SAMPLE_SIZE:
+        return tuple(entries)
+    step = count // SKETCH_SAMPLE_SIZE
+    return tuple(islice(entries, 0, step * SKETCH_SAMPLE_SIZE, step))
+
+
+@dataclass(frozen=True)
+class JoinPlan:
+    '''
+    The order to intersect some variant sets in, each one picked as the one expected to keep the
+    intermediate result the smallest, along with the largest number of entries expected out of any step.
+    When the sketches computed the whole join exactly, its entries are kept in `result` and executing the
+    plan joins nothing again.
+    '''
+    operands: tuple['VariantSet', ...]
+    parameters: VariantSetParameters
+    estimate: int
+    result: tuple[Entry, ...] | None = None
+
+    def execute(self, limit=_NO_LIMIT) -> 'VariantSet | None':
+        '''
+        Joins the operands in the planned order. The estimate comes from samples, which can miss every pair
+        that survives, so the limit is enforced on the actual entries: as soon as an operand or a step holds
+        more than `limit` of them, the join stops and None is returned.
+        '''
+        if self.result is not None:
+            result = VariantSet(parameters=self.parameters, entries=self.result)
+            return result if len(result) <= limit else None
+        if not self.operands:
+            return VariantSet(parameters=self.parameters)
+        result = self.operands[0]
+        if len(result) > limit:
+            return None
+        for operand in self.operands[1:]:
+            assert result.parameters == operand.parameters, 'Cannot intersect VariantSets with different parameters'
+            result = VariantSet(parameters=result.parameters, _internal=result._bounded_join(operand, False, limit))
+            if len(result) > limit:
+                return None
+        return result
+
+
 class VariantSet:
     __slots__ = ('__parameters', '__sets')
 
-    def __init__(self, parameters: VariantSetParameters | None = None, entries: Iterable[Entry] = (), _internal: MinimalSetOfMultisets | None = None):
+    def __init__(self, parameters: VariantSetParameters | None = None, entries: Iterable[Entry] = (), _internal: AbstractMinimalSetOfMultisets | None = None):
         self.__parameters = parameters if parameters is not None else VariantSetParameters()
-        self.__sets = _internal if _internal is not None else MinimalSetOfMultisets(e for e in entries if self.parameters._check_entry(e))
+        self.__sets = _internal if _internal is not None else new_minimal_set_of_multisets(e for e in entries if self.parameters._check_entry(e))
 
     @property
     def parameters(self) -> VariantSetParameters:
         return self.__parameters
 
     @property
-    def sets(self) -> MinimalSetOfMultisets:
+    def sets(self) -> AbstractMinimalSetOfMultisets:
         return self.__sets
 
     @classmethod
@@ -88,29 +238,67 @@ class VariantSet:
 
     def __and__(self, other: Self):
         assert self.parameters == other.parameters, 'Cannot intersect VariantSets with different parameters'
-        parameters = self.__parameters
-        result: MinimalSetOfMultisets = MinimalSetOfMultisets()
-        left_entry: PackedEntry
-        right_entry: PackedEntry
-        entry: PackedEntry
-        for left_entry, right_entry in product(self.entries(), other.entries()):
-            entry = left_entry | right_entry
-            if parameters._check_entry(entry):
-                result.add(entry)
-        return self.__class__(parameters=self.parameters, _internal=result)
+        return self.__class__(parameters=self.parameters, _internal=self._bounded_join(other, combine=False))
 
     def __add__(self, other: Self):
         assert self.parameters == other.parameters, 'Cannot sum VariantSets with different parameters'
+        return self.__class__(parameters=self.parameters, _internal=self._bounded_join(other, combine=True))
+
+    def _bounded_join(self, other: Self, combine: bool, limit=_NO_LIMIT) -> AbstractMinimalSetOfMultisets:
+        '''
+        Joins every entry of this set with every entry of the other, by union or by combination,
+        stopping as soon as the result holds more than `limit` entries.
+
+        The entries of the other set are bucketed by distinct count and, when combining without
+        multiple copies, by card subset. A union or a combination has at least as many distinct
+        elements as either side, and as many as the set bits of their joined signatures, so whole
+        buckets and single pairs whose lower bound already exceeds `max_depth` are skipped before
+        anything is allocated, as are buckets sharing a card with a combined entry that would end
+        up with two copies of it. Only the remaining pairs are joined and checked.
+        '''
         parameters = self.__parameters
-        result: MinimalSetOfMultisets = MinimalSetOfMultisets()
-        left_key: PackedEntry
-        right_key: PackedEntry
+        max_depth = parameters.max_depth
+        forbid_shared_cards = combine and not parameters.allow_multiple_copies
+        check_signatures = max_depth < _SIGNATURE_BITS
+        buckets = _entries_by_shape(other.entries(), forbid_shared_cards)
+        result: AbstractMinimalSetOfMultisets = new_minimal_set_of_multisets()
+        evaluated = 0
+        pruned = 0
+        exceeded = False
+        left_entry: PackedEntry
+        right_entry: PackedEntry
         entry: PackedEntry
-        for left_key, right_key in product(self.entries(), other.entries()):
-            entry = left_key + right_key
-            if parameters._check_entry(entry):
-                result.add(entry)
-        return self.__class__(parameters=self.parameters, _internal=result)
+        for left_entry in self.entries():
+            if exceeded:
+                break
+            left_count = left_entry.distinct_count()
+            left_signature = left_entry.signature()
+            left_cards = _card_set(left_entry) if forbid_shared_cards else None
+            for right_count, right_cards, bucket in buckets:
+                if exceeded:
+                    break
+                if left_count > max_depth or right_count > max_depth:
+                    pruned += len(bucket)
+                    continue
+                if forbid_shared_cards and not left_cards.isdisjoint(right_cards):
+                    pruned += len(bucket)
+                    continue
+                for right_entry in bucket:
+                    if check_signatures and signature_size(left_signature | right_entry.signature()) > max_depth:
+                        pruned += 1
+                        continue
+                    entry = left_entry + right_entry if combine else left_entry | right_entry
+                    evaluated += 1
+                    if parameters._check_entry(entry):
+                        result.add(entry)
+                        if len(result) > limit:
+                            exceeded = True
+                            break
+        JOIN_STATISTICS.evaluated += evaluated
+        JOIN_STATISTICS.pruned += pruned
+        if len(result) > JOIN_STATISTICS.largest:
+            JOIN_STATISTICS.largest = len(result)
+        return result
 
     def variants(self) -> list[tuple[FrozenMultiset[cardid], FrozenMultiset[templateid]]]:
         return [self.entry_to_ingredients(e) for e in self.entries()]
@@ -121,7 +309,40 @@ class VariantSet:
 
     @classmethod
     def and_sets(cls, sets: list[Self], parameters: VariantSetParameters | None = None):
-        return cls.aggregate_sets(sorted(sets, key=len), strategy=lambda x, y: x & y, parameters=parameters)
+        result = cls.plan_and_sets(sets, parameters=parameters).execute()
+        assert result is not None
+        return result
+
+    @classmethod
+    def plan_and_sets(cls, sets: list[Self], parameters: VariantSetParameters | None = None) -> JoinPlan:
+        '''
+        Plans the intersection of the given sets from their size sketches: starting from the smallest
+        set, it greedily joins next the set whose join with the sets before it is expected to be the
+        smallest, since every step pairs each entry of the intermediate result with each entry of the
+        next set. With fewer than two sets there is nothing to join, and the estimate is their size.
+        '''
+        if parameters is None:
+            parameters = sets[0].parameters if sets else VariantSetParameters()
+        if len(sets) < 2:
+            return JoinPlan(operands=tuple(sets), parameters=parameters, estimate=max((len(s) for s in sets), default=0))
+        remaining = sorted(sets, key=len)
+        sketches = [SizeSketch.of(s) for s in remaining]
+        operands = [remaining.pop(0)]
+        joined = sketches.pop(0)
+        estimate = joined.size
+        while remaining:
+            best_index = 0
+            best_join = joined.join(sketches[0], parameters)
+            for index in range(1, len(remaining)):
+                candidate = joined.join(sketches[index], parameters)
+                if candidate.size < best_join.size:
+                    best_index = index
+                    best_join = candidate
+            operands.append(remaining.pop(best_index))
+            sketches.pop(best_index)
+            joined = best_join
+            estimate = max(estimate, joined.size)
+        return JoinPlan(operands=tuple(operands), parameters=parameters, estimate=estimate, result=joined.sample if joined.exact else None)
 
     @classmethod
     def sum_sets(cls, sets: list[Self], parameters: VariantSetParameters | None = None):
@@ -140,26 +361,79 @@ class VariantSet:
             return cls.sum_sets(sets, parameters=parameters)
         if len(sets) == 0:
             return cls(parameters=parameters)
-        result: MinimalSetOfMultisets = MinimalSetOfMultisets()
-        entry: PackedEntry
-        for key_combination in product(*(s.entries() for s in sets)):
-            cards_sets = set()
-            duplicated = False
-            for entry in key_combination:
-                card_set = frozenset(c for c in entry.distinct_elements() if c > 0)
-                if card_set:
-                    if card_set in cards_sets:
-                        duplicated = True
-                        break
-                    cards_sets.add(card_set)
-            if duplicated:
-                continue
-            entry = reduce(add, key_combination)
-            if parameters._check_entry(entry):
-                result.add(entry)
+        # Any card shared by two chosen entries ends up with two copies, so the combinations
+        # are built one set at a time, dropping a partial combination as soon as it is doomed
+        entry_lists = [[(entry, _card_set(entry)) for entry in s.entries()] for s in sets]
+        result: AbstractMinimalSetOfMultisets = new_minimal_set_of_multisets()
+        statistics = JoinStatistics()
+        _extend_product(entry_lists, 0, PackedEntry(), frozenset(), parameters, result, statistics)
+        statistics.largest = len(result)
+        JOIN_STATISTICS.merge(statistics)
         return cls(parameters=parameters, _internal=result)
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, VariantSet):
             return self.parameters == other.parameters and self.sets == other.sets
         return False
+
+
+def _card_set(entry: Entry) -> frozenset:
+    cards = []
+    for element in entry.distinct_elements():
+        if element > 0:
+            cards.append(element)
+    return frozenset(cards)
+
+
+def _entries_by_shape(entries: Iterable[Entry], by_cards: bool) -> list[tuple[int, frozenset | None, list[Entry]]]:
+    '''
+    Buckets the entries by distinct count and, if requested, by card subset, fewest elements first.
+    '''
+    buckets = dict[tuple[int, frozenset | None], list[Entry]]()
+    for entry in entries:
+        key = (entry.distinct_count(), _card_set(entry) if by_cards else None)
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = [entry]
+        else:
+            bucket.append(entry)
+    shapes = list[tuple[int, frozenset | None, list[Entry]]]()
+    for (count, cards), bucket in buckets.items():
+        shapes.append((count, cards, bucket))
+    shapes.sort(key=itemgetter(0))
+    return shapes
+
+
+def _extend_product(
+    entry_lists: list[list[tuple[Entry, frozenset]]],
+    index,
+    partial: Entry,
+    partial_cards: frozenset,
+    parameters: VariantSetParameters,
+    result: AbstractMinimalSetOfMultisets,
+    statistics: JoinStatistics,
+):
+    '''
+    Extends a partial combination with each entry of the next set, recursing until every set contributed one.
+    A partial combination only grows, so one already too deep or holding a card twice is abandoned with all its extensions.
+    '''
+    if index == len(entry_lists):
+        if parameters._check_entry(partial):
+            result.add(partial)
+        return
+    max_depth = parameters.max_depth
+    check_signatures = max_depth < _SIGNATURE_BITS
+    partial_signature = partial.signature()
+    entry: PackedEntry
+    for entry, cards in entry_lists[index]:
+        if not partial_cards.isdisjoint(cards):
+            statistics.pruned += 1
+            continue
+        if check_signatures and signature_size(partial_signature | entry.signature()) > max_depth:
+            statistics.pruned += 1
+            continue
+        extended = partial + entry
+        statistics.evaluated += 1
+        if extended.distinct_count() > max_depth:
+            continue
+        _extend_product(entry_lists, index + 1, extended, partial_cards | cards, parameters, result, statistics)
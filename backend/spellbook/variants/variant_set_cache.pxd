@@ -0,0 +1,26 @@
+# cython: language_level=3
+# cython: boundscheck=False
+# cython: wraparound=False
+# cython: cdivision=True
+# cython: initializedcheck=False
+# cython: embedsignature=True
+# cython: optimize.use_switch=True
+# cython: optimize.unpack_method_calls=True
+# cython: infer_types=True
+# cython: overflowcheck=False
+# cython: profile=False
+# cython: annotation_typing=True
+
+cimport cython
+
+from spellbook.variants.variant_set cimport VariantSet, VariantSetParameters
+from spellbook.variants.combo_graph cimport NodeWithState
+
+
+cpdef str node_key(NodeWithState node)
+cpdef bytes _encode(VariantSet variant_set)
+cpdef VariantSet _decode(bytes data, VariantSetParameters parameters)
+cpdef dict _read(str path)
+cpdef _write(object file, dict nodes)
+# _own_parts and subtree_digests are left as plain compiled defs, holding generator expressions Cython
+# cannot turn into a cpdef; cache_path, load_variant_sets and store_variant_sets run once per parameter group
@@ -0,0 +1,210 @@
+import hashlib
+import os
+import struct
+import tempfile
+from array import array
+from .packed_entry import PackedEntry
+from .variant_set import VariantSet, VariantSetParameters, new_minimal_set_of_multisets
+from .combo_graph import ComboNode, FeatureWithAttributesMatcherNode, FeatureWithAttributesNode, Graph, GraphEvaluation, NodeWithState, node_dependencies
+from .generation_tracking import Fingerprints
+
+
+# Selects the directory the variant sets of the graph nodes are kept in between generations, disabled when unset
+CACHE_DIR_ENV_VAR = 'VARIANT_SET_CACHE_DIR'
+
+# Bump this version to drop every stored variant set, whenever their encoding or meaning changes
+_CACHE_VERSION = 2
+
+# A cache file starts with this magic and the version, followed by one record per node: the lengths of
+# its key, digest, variant set and replacement variant set (-1 when it is the variant set itself),
+# then those four payloads. The variant sets are the native int64 arrays of `_encode`.
+_MAGIC = b'SBVS'
+_HEADER = struct.Struct('<4sI')
+_RECORD = struct.Struct('<IIqq')
+
+
+def resolve_cache_directory() -> str | None:
+    '''Returns the directory named by `VARIANT_SET_CACHE_DIR`, or None when the cache is disabled.'''
+    configured = os.environ.get(CACHE_DIR_ENV_VAR, '').strip()
+    return configured or None
+
+
+def node_key(node: NodeWithState) -> str:
+    '''Identifies a node across generations, out of the ids of what it stands for.'''
+    if isinstance(node, ComboNode):
+        return f'combo:{node.item.id}'
+    if isinstance(node, FeatureWithAttributesNode):
+        return f'feature:{node.item.feature.id}:{sorted(node.item.attributes)}'
+    assert isinstance(node, FeatureWithAttributesMatcherNode)
+    matcher = node.item.matcher
+    return f'matcher:{node.item.feature.id}:{sorted(matcher.any_of)}:{sorted(matcher.all_of)}:{sorted(matcher.none_of)}'
+
+
+def _own_parts(node: NodeWithState, fingerprints: Fingerprints) -> tuple:
+    '''The fingerprints of the entities the variant set of the node is directly made of, its dependencies aside.'''
+    if isinstance(node, ComboNode):
+        return (
+            fingerprints['combo'][node.item.id],
+            sorted((card.item.id, fingerprints['card'][card.item.id], quantity) for card, quantity in node.cards.items()),
+            sorted((template.item.id, fingerprints['template'][template.item.id], quantity) for template, quantity in node.templates.items()),
+        )
+    if isinstance(node, FeatureWithAttributesNode):
+        return (
+            fingerprints['feature'][node.item.feature.id],
+            sorted((feature_of_card.card.item.id, fingerprints['card'][feature_of_card.card.item.id]) for feature_of_card in node.produced_by_cards),
+        )
+    assert isinstance(node, FeatureWithAttributesMatcherNode)
+    return (fingerprints['feature'][node.item.feature.id],)
+
+
+def subtree_digests(graph: Graph, fingerprints: Fingerprints) -> dict[NodeWithState, str]:
+    '''
+    Digests, for every combo, matcher and feature node, the fingerprints of everything its variant set
+    depends on, down to the cards and templates. The nodes of a cycle depend on each other, so they share
+    the digest of their whole strongly connected component.
+    '''
+    digests = dict[NodeWithState, str]()
+    for component in graph.strongly_connected_components():
+        members = set(component)
+        hasher = hashlib.blake2b(digest_size=16)
+        for key, own_parts, dependency_keys, external_digests in sorted(
+            (
+                node_key(node),
+                _own_parts(node, fingerprints),
+                sorted(node_key(dependency) for dependency in node_dependencies(node)),
+                sorted(digests[dependency] for dependency in node_dependencies(node) if dependency not in members),
+            )
+            for node in component
+        ):
+            hasher.update(repr((key, own_parts, dependency_keys, external_digests)).encode('utf8'))
+            hasher.update(b'\x00')
+        digest = hasher.hexdigest()
+        for node in component:
+            digests[node] = digest
+    return digests
+
+
+def _encode(variant_set: VariantSet) -> bytes:
+    '''Lays the packed entries of a variant set out back to back, each one prefixed by its length.'''
+    buffer = array('q')
+    for entry in variant_set.entries():
+        buffer.append(len(entry._packed))
+        buffer.extend(entry._packed)
+    return buffer.tobytes()
+
+
+def _decode(data: bytes, parameters: VariantSetParameters) -> VariantSet:
+    buffer = array('q')
+    buffer.frombytes(data)
+    entries = list[PackedEntry]()
+    i = 0
+    while i < len(buffer):
+        length = buffer[i]
+        entries.append(PackedEntry(tuple(buffer[i + 1:i + 1 + length])))
+        i += 1 + length
+    # stored out of a minimal set, so they are minimal already
+    return VariantSet(parameters=parameters, _internal=new_minimal_set_of_multisets(_internal=entries))
+
+
+def cache_path(directory: str, parameters: VariantSetParameters, evaluation: GraphEvaluation) -> str:
+    '''The file holding the variant sets computed under the given parameters and evaluation.'''
+    copies = 'multiple' if parameters.allow_multiple_copies else 'singleton'
+    return os.path.join(directory, f'variant-sets-{parameters.max_depth}-{copies}-{evaluation.value}.bin')
+
+
+def _read(path: str) -> dict[str, tuple[str, bytes, bytes | None]]:
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except OSError:
+        return {}
+    # a damaged cache or one from another version is a missing cache
+    if len(data) < _HEADER.size or _HEADER.unpack_from(data) != (_MAGIC, _CACHE_VERSION):
+        return {}
+    nodes = dict[str, tuple[str, bytes, bytes | None]]()
+    offset = _HEADER.size
+    try:
+        while offset < len(data):
+            key_length, digest_length, length, replacement_length = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            end = offset + key_length + digest_length + length + max(replacement_length, 0)
+            if length < 0 or end > len(data):
+                return {}
+            key = data[offset:offset + key_length].decode('utf8')
+            offset += key_length
+            digest = data[offset:offset + digest_length].decode('utf8')
+            offset += digest_length
+            variant_set = data[offset:offset + length]
+            offset += length
+            replacement_variant_set = data[offset:end] if replacement_length >= 0 else None
+            offset = end
+            nodes[key] = (digest, variant_set, replacement_variant_set)
+    except (struct.error, UnicodeDecodeError):
+        return {}
+    return nodes
+
+
+def _write(file, nodes: dict[str, tuple[str, bytes, bytes | None]]) -> None:
+    file.write(_HEADER.pack(_MAGIC, _CACHE_VERSION))
+    for key, (digest, variant_set, replacement_variant_set) in nodes.items():
+        encoded_key = key.encode('utf8')
+        encoded_digest = digest.encode('utf8')
+        file.write(_RECORD.pack(len(encoded_key), len(encoded_digest), len(variant_set), len(replacement_variant_set) if replacement_variant_set is not None else -1))
+        file.write(encoded_key)
+        file.write(encoded_digest)
+        file.write(variant_set)
+        if replacement_variant_set is not None:
+            file.write(replacement_variant_set)
+
+
+def load_variant_sets(graph: Graph, digests: dict[NodeWithState, str], directory: str) -> int:
+    '''
+    Hands the graph the variant sets stored for its nodes under its current parameters, whose digest
+    did not change since they were stored, returning how many it got.
+    '''
+    parameters = graph.variant_set_parameters
+    stored = _read(cache_path(directory, parameters, graph.evaluation))
+    if not stored:
+        return 0
+    variant_sets = dict[NodeWithState, tuple[VariantSet, VariantSet]]()
+    for node, digest in digests.items():
+        entry = stored.get(node_key(node))
+        if entry is None or entry[0] != digest:
+            continue
+        variant_set = _decode(entry[1], parameters)
+        replacement_variant_set = _decode(entry[2], parameters) if entry[2] is not None else variant_set
+        variant_sets[node] = (variant_set, replacement_variant_set)
+    graph.restore_variant_sets(variant_sets)
+    return len(variant_sets)
+
+
+def store_variant_sets(graph: Graph, digests: dict[NodeWithState, str], directory: str) -> int:
+    '''
+    Stores the variant sets the graph computed under its current parameters, on top of the stored ones
+    which are still valid, returning how many nodes the cache holds afterwards.
+    '''
+    path = cache_path(directory, graph.variant_set_parameters, graph.evaluation)
+    current = {node_key(node): digest for node, digest in digests.items()}
+    nodes = {key: entry for key, entry in _read(path).items() if current.get(key) == entry[0]}
+    for node, digest in digests.items():
+        variant_set = node.variant_set
+        if variant_set is None:
+            continue
+        replacement_variant_set = node.replacement_variant_set
+        assert replacement_variant_set is not None
+        nodes[node_key(node)] = (
+            digest,
+            _encode(variant_set),
+            _encode(replacement_variant_set) if replacement_variant_set is not variant_set else None,
+        )
+    os.makedirs(directory, exist_ok=True)
+    # written aside and then moved over, so that a reader never sees a partial file
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            _write(file, nodes)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+    return len(nodes)
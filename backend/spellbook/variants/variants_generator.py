@@ -1,23 +1,33 @@
 import gc
 import logging
+import os
+import pickle
+import tempfile
+import time
 from collections import defaultdict
 from dataclasses import dataclass, field
-from itertools import chain
-from typing import Callable, Iterable, Sequence, TypeVar
+from itertools import batched, chain
+from typing import Callable, Iterable, Iterator, Sequence, TypeVar
 from django.utils.functional import cached_property
 from django.db import transaction
-from multiprocessing_utils import fork_pool, parallelism_is_available, resolve_workers, split_into_chunks
+from multiprocessing_utils import fork_pool, parallelism_is_available, resolve_workers, split_by_cost, split_evenly_by_cost, split_into_chunks
 from .multiset import FrozenMultiset
-from .variant_data import Data, CardInVariantRow, TemplateInVariantRow, FeatureProducedByVariantRow
-from .variant_set import VariantSet
-from .combo_graph import FeatureWithAttributes, Graph, GraphError, cardid, templateid, featureid
+from .variant_data import Data, CardInVariantRow, TemplateInVariantRow, FeatureProducedByVariantRow, FeatureNeededInComboRow, IngredientStateRow
+from .variant_set import VariantSet, JoinStatistics, JOIN_STATISTICS
+from .combo_graph import FeatureWithAttributes, Graph, GraphError, GraphEvaluation, NodeWithState, resolve_evaluation, cardid, templateid, featureid
 from .replacements import ReplacementContext
 from .generation_tracking import (
     GenerationPlan, GenerationScope, plan_full_generation, plan_incremental_generation,
     compute_fingerprints, load_stored_fingerprints, store_fingerprints,
+    ComboCost, load_combo_costs, store_combo_costs, Fingerprints,
 )
-from spellbook.models import Combo, FeatureNeededInCombo, Variant, CardInVariant, TemplateInVariant, ZoneLocation, CardType
-from spellbook.models import Card, VariantAlias, Ingredient, OrderedIngredient, FeatureProducedByVariant, VariantOfCombo, VariantIncludesCombo
+from .data_snapshot import resolve_snapshot_directory, load_data
+from .variant_set_cache import resolve_cache_directory, subtree_digests, load_variant_sets, store_variant_sets
+from .generation_checkpoint import CHECKPOINT_DIR_ENV_VAR, GenerationCheckpoint, open_checkpoint, plan_digest, resolve_checkpoint_directory
+from .generation_profile import GenerationProfile, resolve_memory_tracing, store_generation_profile
+from .bulk_writer import bulk_writer
+from spellbook.models import Combo, Variant, CardInVariant, TemplateInVariant, ZoneLocation, CardType
+from spellbook.models import Card, DataVersion, VariantAlias, Ingredient, OrderedIngredient, FeatureProducedByVariant, VariantOfCombo, VariantIncludesCombo
 from spellbook.models import id_from_cards_and_templates_ids, merge_mana_costs, join_with_conjunction, DEFAULT_BATCH_SIZE
 from spellbook.models.constants import DEFAULT_CARD_LIMIT, DEFAULT_VARIANT_LIMIT, HIGHER_CARD_LIMIT, LOWER_VARIANT_LIMIT
 
@@ -33,6 +43,9 @@ _I = TypeVar('_I', bound=OrderedIngredient)
 LogFunction = Callable[[str], None]
 ProgressFunction = Callable[[int, int], None]
 MetadataFunction = Callable[[str, object], None]
+# Runs each shard of the graph phase of a job, given the key of its checkpoint, the digest of its plan and the ids of the combos of
+# each shard, returning what each shard measured of the cost of its combos, or None for a shard that failed
+ShardRunner = Callable[[str, str, list[list[int]]], list[dict[int, ComboCost] | None]]
 
 # Fields of a Variant row that generation may modify on existing variants
 _VARIANT_UPDATE_FIELDS = [
@@ -109,12 +122,13 @@ def _build_definitions_from_variant_set(
     variant_set: VariantSet,
     result: dict[str, VariantDefinition],
 ) -> None:
-    variants = graph.results(variant_set)
-    for variant in variants:
-        id = id_from_cards_and_templates_ids(variant.cards.distinct_elements(), variant.templates.distinct_elements())
+    for cards, templates in variant_set.variants():
+        id = id_from_cards_and_templates_ids(cards.distinct_elements(), templates.distinct_elements())
         if id in result:
+            # found again, so there is no need to compute its recipe
             result[id].of_ids.add(combo.id)
             continue
+        variant = graph.result(cards, templates)
         needed_combo_ids = variant.needed_combos.copy()
         # Adding the current combo to the needed combos in case it is not already there
         # Which can happen if the combo does not produce useful features
@@ -154,17 +168,54 @@ def _merge_variant_definitions(target: dict[str, VariantDefinition], source: dic
 _GRAPH_WORKER_STATE: Graph | None = None
 
 
-def _graph_phase_worker(combos: list[Combo]) -> dict[str, VariantDefinition]:
+def _graph_phase_worker(chunk: tuple[int, list[Combo]]) -> tuple[int, dict[str, VariantDefinition], JoinStatistics, dict[int, ComboCost]]:
     assert _GRAPH_WORKER_STATE is not None
     graph = _GRAPH_WORKER_STATE
+    index, combos = chunk
     result = dict[str, VariantDefinition]()
+    costs = dict[int, ComboCost]()
+    # A pool worker runs many chunks, so it reports the joins of each chunk on its own
+    JOIN_STATISTICS.reset()
     for combo in combos:
+        start = time.perf_counter()
+        measured = _start_combo_join_statistics()
         try:
             variant_set = graph.variants(combo.id)
             _build_definitions_from_variant_set(graph, combo, variant_set, result)
         except GraphError as e:
             raise GraphError(f'Error while computing variants for generator combo {combo} with ID {combo.id}: {e}')
-    return result
+        costs[combo.id] = _combo_cost(start, measured, variant_set)
+    return index, result, JoinStatistics(evaluated=JOIN_STATISTICS.evaluated, pruned=JOIN_STATISTICS.pruned, largest=JOIN_STATISTICS.largest), costs
+
+
+def _start_combo_join_statistics() -> tuple[int, int]:
+    '''Starts measuring the joins of a combo, returning the entry pairs evaluated and the largest result so far.'''
+    measured = (JOIN_STATISTICS.evaluated, JOIN_STATISTICS.largest)
+    JOIN_STATISTICS.largest = 0
+    return measured
+
+
+def _combo_cost(start: float, measured: tuple[int, int], variant_set: VariantSet) -> ComboCost:
+    '''
+    What a combo took since it started at `start`, when the join statistics were `measured`. The joins only
+    count for the combo that first needed their nodes, the ones below its other combos being already computed.
+    '''
+    evaluated, largest = measured
+    cost = ComboCost(
+        seconds=time.perf_counter() - start,
+        variant_count=len(variant_set),
+        largest_set=max(JOIN_STATISTICS.largest, len(variant_set)),
+        join_pairs=JOIN_STATISTICS.evaluated - evaluated,
+    )
+    JOIN_STATISTICS.largest = max(JOIN_STATISTICS.largest, largest)
+    return cost
+
+
+def _estimated_costs(combos: list[Combo], combo_costs: dict[int, ComboCost]) -> list[float]:
+    '''The cost each combo is expected to have, out of the measured ones, falling back on their mean.'''
+    known = [combo_costs[combo.id].seconds for combo in combos if combo.id in combo_costs]
+    fallback = sum(known) / len(known) if known else 1.0
+    return [combo_costs[combo.id].seconds if combo.id in combo_costs else fallback for combo in combos]
 
 
 def get_variants_from_graph(
@@ -174,10 +225,68 @@ def get_variants_from_graph(
     log_error: LogFunction = lambda _: None,
     progress: ProgressFunction = lambda x, t: None,
     workers: int = 1,
+    metadata: MetadataFunction = lambda key, value: None,
+    combo_costs: dict[int, ComboCost] | None = None,
+    fingerprints: Fingerprints | None = None,
+    checkpoint: GenerationCheckpoint | None = None,
 ) -> dict[str, VariantDefinition]:
+    '''
+    Computes the definitions of the variants of the given generator combos, or of all of them.
+    The known costs of the combos, if any, schedule the parallel work, and are updated with the measured ones.
+    Given the current fingerprints, the variant sets of the graph nodes are also loaded from and stored to the
+    cache directory, when one is configured. Given a checkpoint, the chunks it holds are merged instead of
+    being computed again, and each chunk computed is stored in it.
+    '''
+    result = dict[str, VariantDefinition]()
+    # Merged in chunk order, so that the result does not depend on which worker finished first
+    pending = dict[int, dict[str, VariantDefinition]]()
+    next_position = 0
+
+    def merge(position: int, definitions: dict[str, VariantDefinition]) -> None:
+        nonlocal next_position
+        pending[position] = definitions
+        while next_position in pending:
+            _merge_variant_definitions(result, pending.pop(next_position))
+            next_position += 1
+    emit_variants_from_graph(data, merge, combos, log, log_error, progress, workers, metadata, combo_costs, fingerprints, checkpoint)
+    assert not pending
+    return result
+
+
+def emit_variants_from_graph(
+    data: Data,
+    emit: Callable[[int, dict[str, VariantDefinition]], None],
+    combos: Sequence[Combo] | None = None,
+    log: LogFunction = lambda _: None,
+    log_error: LogFunction = lambda _: None,
+    progress: ProgressFunction = lambda x, t: None,
+    workers: int = 1,
+    metadata: MetadataFunction = lambda key, value: None,
+    combo_costs: dict[int, ComboCost] | None = None,
+    fingerprints: Fingerprints | None = None,
+    checkpoint: GenerationCheckpoint | None = None,
+) -> None:
+    '''
+    Computes the definitions of the variants like `get_variants_from_graph`, but hands them to `emit` as soon
+    as each chunk of combos is done, along with the position of the chunk. Chunks may come out of order, and
+    a variant found by many chunks comes with each of them: the one in the earliest chunk is the one to keep,
+    with the generator combos of all of them. The chunks stored in the checkpoint, if any, come first.
+    '''
     global _GRAPH_WORKER_STATE
+    if combo_costs is None:
+        combo_costs = {}
     combos_by_status = dict[tuple[bool, bool], list[Combo]]()
     generator_combos = list(combos) if combos is not None else data.generator_combos
+    position = 0
+    if checkpoint is not None:
+        resumed_combo_ids = set[int]()
+        for combo_ids, definitions in checkpoint.chunks():
+            emit(position, definitions)  # type: ignore[arg-type]
+            position += 1
+            resumed_combo_ids.update(combo_ids)
+        if resumed_combo_ids:
+            log(f'Resumed {len(resumed_combo_ids)} combos from the checkpoint of an interrupted run.')
+            generator_combos = [combo for combo in generator_combos if combo.id not in resumed_combo_ids]
     results_progress_multiplier = 10
     progress_total = len(generator_combos) * (1 + results_progress_multiplier)
     progress_current = 0
@@ -185,7 +294,16 @@ def get_variants_from_graph(
         allows_many_cards = combo.allow_many_cards
         allows_multiple_copies = combo.allow_multiple_copies
         combos_by_status.setdefault((allows_many_cards, allows_multiple_copies), []).append(combo)
-    result = dict[str, VariantDefinition]()
+    JOIN_STATISTICS.reset()
+    worker_join_statistics = JoinStatistics()
+    evaluation = resolve_evaluation()
+    cache_directory = resolve_cache_directory() if fingerprints is not None else None
+    digests: dict[NodeWithState, str] | None = None
+    # Worker time spent on combos, over the time the pools held their workers, across all parallel groups
+    parallel_busy_seconds = 0.0
+    parallel_capacity_seconds = 0.0
+    # The nodes only depend on the data, so a single graph is built and then switched between the groups
+    graph: Graph | None = None
     for (allows_many_cards, allows_multiple_copies), combos_of_group in combos_by_status.items():
         conditions = ([f'at most {HIGHER_CARD_LIMIT} cards'] if allows_many_cards else [f'at most {DEFAULT_CARD_LIMIT} cards']) + \
             (['multiple copies'] if allows_multiple_copies else ['only singleton copies'])
@@ -195,32 +313,69 @@ def get_variants_from_graph(
         if allows_many_cards:
             card_limit = HIGHER_CARD_LIMIT
             variant_limit = LOWER_VARIANT_LIMIT
-        graph = Graph(
-            data,
-            card_limit=card_limit,
-            variant_limit=variant_limit,
-            allow_multiple_copies=allows_multiple_copies,
-        )
+        if graph is None:
+            graph = Graph(
+                data,
+                card_limit=card_limit,
+                variant_limit=variant_limit,
+                allow_multiple_copies=allows_multiple_copies,
+                evaluation=evaluation,
+            )
+        else:
+            # no group comes back, so what the previous one computed is of no further use
+            graph.forget_variant_sets()
+            graph.parameterize(card_limit=card_limit, variant_limit=variant_limit, allow_multiple_copies=allows_multiple_copies)
+        if cache_directory is not None:
+            assert fingerprints is not None
+            if digests is None:
+                digests = subtree_digests(graph, fingerprints)
+            loaded = load_variant_sets(graph, digests, cache_directory)
+            log(f'Loaded {loaded} of {len(digests)} node variant sets from the cache.')
+        if evaluation is GraphEvaluation.CONDENSED or cache_directory is not None:
+            # Evaluated once in the parent, the nodes shared by many combos are inherited by the workers
+            log(f'Evaluating the graph below {len(combos_of_group)} combos...')
+            try:
+                graph.evaluate(combo.id for combo in combos_of_group)
+            except GraphError:
+                log_error('Error while evaluating the graph')
+                raise
+            if cache_directory is not None:
+                assert digests is not None
+                stored = store_variant_sets(graph, digests, cache_directory)
+                log(f'Stored {stored} node variant sets in the cache.')
         if workers > 1 and parallelism_is_available() and len(combos_of_group) >= MIN_COMBOS_FOR_PARALLELISM:
             log(f'Computing all variants for {len(combos_of_group)} combos with {workers} workers...')
-            chunks = split_into_chunks(combos_of_group, workers)
+            # Costliest combos first, in chunks shrinking towards the end, handed out as workers free up
+            chunks = split_by_cost(combos_of_group, _estimated_costs(combos_of_group, combo_costs), workers)
+            processes = min(workers, len(chunks))
             # The forked workers never touch the inherited database connections,
             # so they can be safely left open in the parent process
             _GRAPH_WORKER_STATE = graph
+            start = time.perf_counter()
             try:
-                with fork_pool(min(workers, len(chunks))) as pool:
-                    for group_result in pool.imap(_graph_phase_worker, chunks):
-                        _merge_variant_definitions(result, group_result)
-                        progress_current += (1 + results_progress_multiplier) * sum(map(len, chunks)) // len(chunks)
+                with fork_pool(processes) as pool:
+                    for index, chunk_result, join_statistics, costs in pool.imap_unordered(_graph_phase_worker, enumerate(chunks)):
+                        if checkpoint is not None:
+                            # stored before emitting, which is free to modify the definitions
+                            checkpoint.store([combo.id for combo in chunks[index]], chunk_result)
+                        emit(position + index, chunk_result)
+                        worker_join_statistics.merge(join_statistics)
+                        combo_costs.update(costs)
+                        parallel_busy_seconds += sum(cost.seconds for cost in costs.values())
+                        progress_current += (1 + results_progress_multiplier) * len(chunks[index])
                         progress(min(progress_current, progress_total), progress_total)
             finally:
                 _GRAPH_WORKER_STATE = None
+            parallel_capacity_seconds += (time.perf_counter() - start) * processes
+            position += len(chunks)
             continue
         # Each combo is taken all the way through, the way the workers above already do it, so that the
         # two paths process a graph identically and each variant set is freed as soon as it is consumed
         log('Computing all variants recipes, following combos\' requirements graphs...')
         total = len(combos_of_group)
         for index, combo in enumerate(combos_of_group):
+            start = time.perf_counter()
+            measured = _start_combo_join_statistics()
             try:
                 variant_set = graph.variants(combo.id)
             except GraphError:
@@ -229,16 +384,27 @@ def get_variants_from_graph(
             progress_current += 1
             if len(variant_set) > _VARIANTS_TO_TRIGGER_LOG:
                 log(f'About to process results for combo {combo.id} ({index + 1}/{total}) with {len(variant_set)} variants...')
+            combo_result = dict[str, VariantDefinition]()
             try:
-                _build_definitions_from_variant_set(graph, combo, variant_set, result)
+                _build_definitions_from_variant_set(graph, combo, variant_set, combo_result)
             except GraphError:
                 log_error(f'Error while computing all results for generator combo {combo} with ID {combo.id}')
                 raise
+            if checkpoint is not None:
+                checkpoint.store([combo.id], combo_result)
+            emit(position, combo_result)
+            position += 1
+            combo_costs[combo.id] = _combo_cost(start, measured, variant_set)
             progress_current += results_progress_multiplier
             if len(variant_set) > _VARIANTS_TO_TRIGGER_LOG or index % _VARIANTS_TO_TRIGGER_LOG == 0 or index == total - 1:
                 log(f'{index + 1}/{total} combos processed (just processed combo {combo.id})')
                 progress(progress_current, progress_total)
-    return result
+    JOIN_STATISTICS.merge(worker_join_statistics)
+    log(f'Variant set joins: {JOIN_STATISTICS}')
+    if parallel_capacity_seconds > 0:
+        efficiency = parallel_busy_seconds / parallel_capacity_seconds
+        log(f'Graph phase parallel efficiency: {efficiency:.1%}')
+        metadata('graph_parallel_efficiency', round(efficiency, 3))
 
 
 # ---------------------------------------------------------------------------
@@ -256,7 +422,7 @@ def get_default_zone_location_for_card(card: Card) -> ZoneLocation:
     return ZoneLocation.BATTLEFIELD
 
 
-def merge_used_faces(initial_states: Sequence[Ingredient]) -> int | None:
+def merge_used_faces(initial_states: Sequence[Ingredient | IngredientStateRow]) -> int | None:
     '''Merges the used faces of the ingredients contributing a card to a variant: a specified face is
     kept only when every contributor that specifies one agrees on the same number (blanks are ignored).'''
     faces = {getattr(state, 'used_face', None) for state in initial_states}
@@ -275,7 +441,7 @@ def update_state_with_default(data: Data, destination: Ingredient) -> None:
     destination.must_be_commander = False
 
 
-def update_state(destination: Ingredient, initial_states: Sequence[Ingredient]) -> None:
+def update_state(destination: Ingredient, initial_states: Sequence[Ingredient | IngredientStateRow]) -> None:
     zone_locations = initial_states[0].zone_locations
     for initial_state in initial_states[1:]:
         zone_locations = ''.join(
@@ -408,8 +574,8 @@ def _restore_variant(
         easy_prerequisites_list: list[tuple[str, int | None]] = [(c.easy_prerequisites, c.id) for c in needed_combos if c.easy_prerequisites]
         notable_prerequisites_list: list[tuple[str, int | None]] = [(c.notable_prerequisites, c.id) for c in needed_combos if c.notable_prerequisites]
 
-        card_initial_states = defaultdict[int, list[Ingredient]](list)
-        template_initial_states = defaultdict[int, list[Ingredient]](list)
+        card_initial_states = defaultdict[int, list[IngredientStateRow]](list)
+        template_initial_states = defaultdict[int, list[IngredientStateRow]](list)
         for feature_of_card in needed_feature_of_cards:
             card_initial_states[feature_of_card.card_id].append(feature_of_card)
             if feature_of_card.mana_needed:
@@ -438,8 +604,8 @@ def _restore_variant(
 
         card_zone_locations_overrides = defaultdict[int, defaultdict[str, int]](lambda: defaultdict(int))
         template_zone_locations_overrides = defaultdict[int, defaultdict[str, int]](lambda: defaultdict(int))
-        card_features_for_override = defaultdict[int, set[FeatureNeededInCombo]](set)
-        template_features_for_override = defaultdict[int, set[FeatureNeededInCombo]](set)
+        card_features_for_override = defaultdict[int, set[FeatureNeededInComboRow]](set)
+        template_features_for_override = defaultdict[int, set[FeatureNeededInComboRow]](set)
         for combo in needed_combos:
             # Applying zone locations overrides
             for feature_in_combo in data.combo_to_needed_features[combo.id]:
@@ -470,7 +636,7 @@ def _restore_variant(
                 update_state_with_default(data, template_in_variant)
         combo_positions = {c.id: i for i, c in enumerate(needed_combos)}
 
-        def feature_override_key(feature: FeatureNeededInCombo) -> tuple[int, int, int]:
+        def feature_override_key(feature: FeatureNeededInComboRow) -> tuple[int, int, int]:
             return (combo_positions.get(feature.combo_id, len(combo_positions)), feature.order, feature.id)
 
         for used_card in ordered_uses:
@@ -739,6 +905,7 @@ def _perform_bulk_saves(
     produces_bulk_update_fields = ['quantity']
     progress(6, step_count)
     log('Perform bulk updates...')
+    writer = bulk_writer()
     with transaction.atomic():
         # delete
         if of_bulk_delete:
@@ -748,17 +915,27 @@ def _perform_bulk_saves(
         if produces_bulk_delete:
             FeatureProducedByVariant.objects.filter(id__in=produces_bulk_delete).delete()
         # update
-        Variant.objects.bulk_update(variant_bulk_update, fields=variant_bulk_update_fields, batch_size=DEFAULT_BATCH_SIZE, skip_pre_save=True)
-        CardInVariant.objects.bulk_update(cardinvariant_bulk_update, fields=cardinvariant_bulk_update_fields, batch_size=DEFAULT_BATCH_SIZE)
-        TemplateInVariant.objects.bulk_update(templateinvariant_bulk_update, fields=templateinvariant_bulk_update_fields, batch_size=DEFAULT_BATCH_SIZE)
-        FeatureProducedByVariant.objects.bulk_update(produces_bulk_update, fields=produces_bulk_update_fields, batch_size=DEFAULT_BATCH_SIZE)
+        writer.update(Variant.objects, variant_bulk_update, fields=variant_bulk_update_fields, skip_pre_save=True)
+        writer.update(CardInVariant.objects, cardinvariant_bulk_update, fields=cardinvariant_bulk_update_fields)
+        writer.update(TemplateInVariant.objects, templateinvariant_bulk_update, fields=templateinvariant_bulk_update_fields)
+        writer.update(FeatureProducedByVariant.objects, produces_bulk_update, fields=produces_bulk_update_fields)
         # create
-        Variant.objects.bulk_create(variant_bulk_create, batch_size=DEFAULT_BATCH_SIZE, skip_pre_save=True)
-        CardInVariant.objects.bulk_create(cardinvariant_bulk_create, batch_size=DEFAULT_BATCH_SIZE)
-        TemplateInVariant.objects.bulk_create(templateinvariant_bulk_create, batch_size=DEFAULT_BATCH_SIZE)
-        FeatureProducedByVariant.objects.bulk_create(produces_bulk_create, batch_size=DEFAULT_BATCH_SIZE)
-        VariantOfCombo.objects.bulk_create(of_bulk_create, batch_size=DEFAULT_BATCH_SIZE)
-        VariantIncludesCombo.objects.bulk_create(includes_bulk_create, batch_size=DEFAULT_BATCH_SIZE)
+        writer.create(Variant.objects, variant_bulk_create, skip_pre_save=True)
+        writer.create(CardInVariant.objects, cardinvariant_bulk_create)
+        writer.create(TemplateInVariant.objects, templateinvariant_bulk_create)
+        writer.create(FeatureProducedByVariant.objects, produces_bulk_create)
+        writer.create(VariantOfCombo.objects, of_bulk_create)
+        writer.create(VariantIncludesCombo.objects, includes_bulk_create)
+
+
+def _preserve_out_of_scope_combos(data: Data, plan: GenerationPlan, variants: dict[str, VariantDefinition]) -> None:
+    '''Preserves the relationships of the variants with generator combos outside of the regeneration scope.'''
+    if plan.scope is GenerationScope.FULL:
+        return
+    for id, variant_def in variants.items():
+        of_rows = data.variant_to_of_sets.get(id)
+        if of_rows:
+            variant_def.of_ids.update(of_row.combo_id for of_row in of_rows if of_row.combo_id not in plan.regenerated_combo_ids)
 
 
 def sync_variant_aliases(data: Data, added_variants_ids: set[str], deleted_variants_ids: set[str]) -> tuple[int, int]:
@@ -776,6 +953,241 @@ def sync_variant_aliases(data: Data, added_variants_ids: set[str], deleted_varia
     return added_count, deleted_count
 
 
+# ---------------------------------------------------------------------------
+# Pipelined mode: restoring and saving the variants in bounded batches
+# ---------------------------------------------------------------------------
+
+# Enables the pipelined generation, restoring and saving this many variants at a time, disabled when unset
+BATCH_SIZE_ENV_VAR = 'GENERATION_BATCH_SIZE'
+
+
+def resolve_batch_size() -> int | None:
+    '''Returns the batch size named by `GENERATION_BATCH_SIZE`, or None when the pipelined generation is disabled.'''
+    configured = os.environ.get(BATCH_SIZE_ENV_VAR, '').strip()
+    if not configured:
+        return None
+    try:
+        batch_size = int(configured)
+    except ValueError:
+        batch_size = 0
+    if batch_size < 1:
+        raise ValueError(f'{BATCH_SIZE_ENV_VAR} is set to {configured!r}, which is not a positive number of variants')
+    return batch_size
+
+
+class DefinitionSpool:
+    '''
+    Spools the variant definitions emitted by each chunk of combos to an anonymous temporary file as they
+    arrive, keeping in memory only the generator combos of each variant and the earliest chunk that found it.
+    '''
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._offsets = dict[int, int]()
+        self._first_positions = dict[str, int]()
+        self.of_ids = dict[str, set[int]]()
+
+    def __enter__(self) -> 'DefinitionSpool':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self.of_ids)
+
+    def add(self, position: int, definitions: dict[str, VariantDefinition]) -> None:
+        self._file.seek(0, os.SEEK_END)
+        self._offsets[position] = self._file.tell()
+        pickle.dump(definitions, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        for id, variant_definition in definitions.items():
+            of_ids = self.of_ids.get(id)
+            if of_ids is None:
+                self.of_ids[id] = variant_definition.of_ids
+                self._first_positions[id] = position
+            else:
+                of_ids.update(variant_definition.of_ids)
+                self._first_positions[id] = min(position, self._first_positions[id])
+
+    def definitions(self) -> Iterator[tuple[str, VariantDefinition]]:
+        '''
+        Reads the definitions back one chunk at a time, in chunk order and each variant once, the way
+        `get_variants_from_graph` would have merged them.
+        '''
+        for position in sorted(self._offsets):
+            self._file.seek(self._offsets[position])
+            definitions: dict[str, VariantDefinition] = pickle.load(self._file)
+            for id, variant_definition in definitions.items():
+                if self._first_positions[id] == position:
+                    variant_definition.of_ids = self.of_ids[id]
+                    yield id, variant_definition
+
+
+def _generate_variants_in_batches(
+    data: Data,
+    plan: GenerationPlan,
+    old_id_set: set[str],
+    to_restore: set[str],
+    job: str | None,
+    log: LogFunction,
+    log_error: LogFunction,
+    progress: ProgressFunction,
+    metadata: MetadataFunction,
+    workers: int,
+    combo_costs: dict[int, ComboCost],
+    fingerprints: Fingerprints,
+    batch_size: int,
+    checkpoint: GenerationCheckpoint | None,
+    profile: GenerationProfile,
+) -> set[str]:
+    '''
+    Computes, restores and saves the variants of the plan without ever holding all of them in memory:
+    the definitions wait on disk until the graph phase is done, then go through the restore and the save
+    phases a batch at a time, all the batches saved in a single transaction. Returns the ids of the variants.
+    '''
+    with DefinitionSpool() as spool:
+        with profile.phase('graph'):
+            emit_variants_from_graph(
+                data,
+                spool.add,
+                plan.combos_to_generate,
+                log,
+                log_error,
+                progress=lambda x, t: progress(12 + int(x / t * 70), 100),
+                workers=workers,
+                metadata=metadata,
+                combo_costs=combo_costs,
+                fingerprints=fingerprints,
+                checkpoint=checkpoint,
+            )
+        total = len(spool)
+        log(f'Processing and saving {total} variants in batches of {batch_size}...')
+        saved = 0
+        # the batches bound the memory, not the transaction: a failure in any of them rolls back the ones already saved
+        with transaction.atomic():
+            for batch in batched(spool.definitions(), batch_size):
+                variants = dict(batch)
+                with profile.phase('restore'):
+                    _preserve_out_of_scope_combos(data, plan, variants)
+                    variant_instances = data.fetch_variants(id for id in variants if id in old_id_set)
+                    to_bulk_update, to_bulk_create = restore_variants(
+                        data=data,
+                        variants=variants,
+                        variant_instances=variant_instances,
+                        to_restore=to_restore,
+                        job=job,
+                        workers=workers,
+                    )
+                with profile.phase('save'):
+                    _perform_bulk_saves(data, to_bulk_create, to_bulk_update)
+                saved += len(variants)
+                log(f'Saved {saved}/{total} variants.')
+                progress(82 + int(saved / total * 13), 100)
+        progress(95, 100)
+        return set(spool.of_ids.keys())
+
+
+# ---------------------------------------------------------------------------
+# Distributed graph phase: shards of combos computed by other tasks
+# ---------------------------------------------------------------------------
+
+# Enables the distributed graph phase, splitting the combos of a generation job into this many shards computed
+# by other tasks, disabled when unset. It also needs the checkpoint directory, shared by every worker.
+SHARDS_ENV_VAR = 'GENERATION_SHARDS'
+
+
+def resolve_shard_count() -> int | None:
+    '''Returns the shard count named by `GENERATION_SHARDS`, or None when the distributed graph phase is disabled.'''
+    configured = os.environ.get(SHARDS_ENV_VAR, '').strip()
+    if not configured:
+        return None
+    try:
+        shard_count = int(configured)
+    except ValueError:
+        shard_count = 0
+    if shard_count < 1:
+        raise ValueError(f'{SHARDS_ENV_VAR} is set to {configured!r}, which is not a positive number of shards')
+    return shard_count
+
+
+def compute_variants_shard(
+    key: str,
+    digest: str,
+    combo_ids: list[int],
+    log: LogFunction = lambda _: None,
+    log_error: LogFunction = lambda _: None,
+) -> dict[int, ComboCost]:
+    '''
+    Computes the variant definitions of a shard of the combos of a generation job, storing them in the checkpoint
+    of the given key for the plan with the given digest, in the directory of the shard. That directory is named after
+    the digest of the data this shard loaded and of its combos, so that the job only reads a shard computed from
+    the same data it has. Returns the measured cost of each combo.
+    '''
+    directory = resolve_checkpoint_directory()
+    if directory is None:
+        raise ValueError(f'{CHECKPOINT_DIR_ENV_VAR} has to name the directory the generation job shares with its shards')
+    workers = resolve_workers()
+    log(f'Variant generation started for a shard of {len(combo_ids)} combos of generation {key}.')
+    data = load_data(resolve_snapshot_directory(), log=log)
+    gc.collect()
+    gc.freeze()
+    try:
+        fingerprints = compute_fingerprints(data)
+        checkpoint = GenerationCheckpoint(directory, key, digest, shard=plan_digest(fingerprints, combo_ids))
+        combos = [data.id_to_combo[id] for id in combo_ids if id in data.id_to_combo]
+        combo_costs = dict[int, ComboCost]()
+        # the definitions only have to reach the checkpoint, which stores each chunk before emitting it
+        emit_variants_from_graph(
+            data,
+            lambda position, definitions: None,
+            combos,
+            log,
+            log_error,
+            workers=workers,
+            combo_costs=combo_costs,
+            fingerprints=fingerprints,
+            checkpoint=checkpoint,
+        )
+    finally:
+        gc.unfreeze()
+    log(f'Computed the variants of {len(combos)} combos of generation {key}.')
+    return combo_costs
+
+
+def _checkpoint_key(plan: GenerationPlan) -> str:
+    '''Names what a generation generates, which is the same for every job retrying it, unlike their ids.'''
+    if plan.scope is GenerationScope.SINGLE:
+        return f'{plan.scope.value}-{plan.combos_to_generate[0].id}'
+    return plan.scope.value
+
+
+def _distribute_graph_phase(
+    data: Data,
+    plan: GenerationPlan,
+    checkpoint: GenerationCheckpoint,
+    fingerprints: Fingerprints,
+    shard_count: int,
+    run_shards: ShardRunner,
+    combo_costs: dict[int, ComboCost],
+    log: LogFunction,
+    log_error: LogFunction,
+) -> None:
+    '''
+    Splits the combos of the plan into shards of about the same cost and has them computed by other tasks,
+    listing the shards in the checkpoint so that the graph phase that follows reads their chunks back. The
+    combos of a shard that failed, or that was computed from other data, are computed by that phase instead.
+    '''
+    combos = plan.combos_to_generate
+    shards = [[combo.id for combo in shard] for shard in split_evenly_by_cost(combos, _estimated_costs(combos, combo_costs), shard_count)]
+    checkpoint.shards = [plan_digest(fingerprints, combo_ids) for combo_ids in shards]
+    log(f'Distributing the graph phase of {len(combos)} combos across {len(shards)} shards...')
+    for combo_ids, costs in zip(shards, run_shards(checkpoint.key, checkpoint.digest, shards)):
+        if costs is None:
+            log_error(f'A shard of {len(combo_ids)} combos failed, so they are computed by this job instead')
+        else:
+            combo_costs.update(costs)
+
+
 # ---------------------------------------------------------------------------
 # Entry point: orchestrating the whole generation
 # ---------------------------------------------------------------------------
@@ -788,6 +1200,7 @@ def generate_variants(
     progress: ProgressFunction = lambda x, t: None,
     metadata: MetadataFunction = lambda key, value: None,
     incremental: bool = False,
+    run_shards: ShardRunner | None = None,
 ) -> tuple[int, int, int]:
     workers = resolve_workers()
     progress(0, 100)
@@ -795,15 +1208,19 @@ def generate_variants(
         log(f'Variant generation started for combo {combo}.')
     else:
         log('Variant generation started for all combos.')
+    profile = GenerationProfile(trace_memory=resolve_memory_tracing())
     log('Fetching data...')
-    data = Data()
+    with profile.phase('load'):
+        data = load_data(resolve_snapshot_directory(), log=log)
+    for table, count, size in data.memory_report():
+        log(f'Loaded {count} {table} rows, taking about {size / 2 ** 20:.1f} MiB.')
     progress(8, 100)
     # The loaded dataset is read-only reference data from here on: freezing it
     # exempts it from garbage collector scans for the rest of the generation
     gc.collect()
     gc.freeze()
     try:
-        return _generate_variants(data, combo, job, log, log_error, progress, metadata, incremental, workers)
+        return _generate_variants(data, combo, job, log, log_error, progress, metadata, incremental, workers, run_shards, profile)
     finally:
         gc.unfreeze()
 
@@ -818,7 +1235,11 @@ def _generate_variants(
     metadata: MetadataFunction,
     incremental: bool,
     workers: int,
+    run_shards: ShardRunner | None = None,
+    profile: GenerationProfile | None = None,
 ) -> tuple[int, int, int]:
+    if profile is None:
+        profile = GenerationProfile()
     log('Computing entity fingerprints...')
     current_fingerprints = compute_fingerprints(data)
     if combo is not None:
@@ -845,36 +1266,53 @@ def _generate_variants(
     old_id_set = set(data.id_to_variant.keys())
     progress(12, 100)
     log('Computing combos graph representation...')
-    variants = get_variants_from_graph(
-        data,
-        plan.combos_to_generate,
-        log,
-        log_error,
-        progress=lambda x, t: progress(12 + int(x / t * 70), 100),
-        workers=workers,
-    )
-    if plan.scope is not GenerationScope.FULL:
-        # Preserve the relationships with generator combos outside of the regeneration scope
-        for id, variant_def in variants.items():
-            of_rows = data.variant_to_of_sets.get(id)
-            if of_rows:
-                variant_def.of_ids.update(of_row.combo_id for of_row in of_rows if of_row.combo_id not in plan.regenerated_combo_ids)
-    log(f'Processing {len(variants)} variants...')
-    variant_instances = data.fetch_variants(id for id in variants if id in old_id_set)
-    to_bulk_update, to_bulk_create = restore_variants(
-        data=data,
-        variants=variants,
-        variant_instances=variant_instances,
-        to_restore=to_restore,
-        job=job,
-        workers=workers,
-    )
-    progress(85, 100)
-    log(f'Saving {len(variants)} variants...')
-    _perform_bulk_saves(data, to_bulk_create, to_bulk_update, log, progress=lambda x, t: progress(85 + int(x / t * 10), 100))
-    progress(95, 100)
-    log(f'Saved {len(variants)} variants.')
-    new_id_set = set(variants.keys())
+    combo_costs = load_combo_costs()
+    checkpoint_directory = resolve_checkpoint_directory()
+    checkpoint = None
+    if checkpoint_directory is not None and job is not None:
+        # a job generating the same plan again, like the retry of a failed one, resumes from the chunks the previous one completed
+        checkpoint = open_checkpoint(checkpoint_directory, _checkpoint_key(plan), plan_digest(current_fingerprints, (combo.id for combo in plan.combos_to_generate)))
+        shard_count = resolve_shard_count()
+        if shard_count is not None and run_shards is not None and plan.scope is not GenerationScope.SINGLE:
+            with profile.phase('graph'):
+                _distribute_graph_phase(data, plan, checkpoint, current_fingerprints, shard_count, run_shards, combo_costs, log, log_error)
+    batch_size = resolve_batch_size()
+    if batch_size is not None:
+        new_id_set = _generate_variants_in_batches(data, plan, old_id_set, to_restore, job, log, log_error, progress, metadata, workers, combo_costs, current_fingerprints, batch_size, checkpoint, profile)
+    else:
+        with profile.phase('graph'):
+            variants = get_variants_from_graph(
+                data,
+                plan.combos_to_generate,
+                log,
+                log_error,
+                progress=lambda x, t: progress(12 + int(x / t * 70), 100),
+                workers=workers,
+                metadata=metadata,
+                combo_costs=combo_costs,
+                fingerprints=current_fingerprints,
+                checkpoint=checkpoint,
+            )
+        with profile.phase('restore'):
+            _preserve_out_of_scope_combos(data, plan, variants)
+            log(f'Processing {len(variants)} variants...')
+            variant_instances = data.fetch_variants(id for id in variants if id in old_id_set)
+            to_bulk_update, to_bulk_create = restore_variants(
+                data=data,
+                variants=variants,
+                variant_instances=variant_instances,
+                to_restore=to_restore,
+                job=job,
+                workers=workers,
+            )
+        progress(85, 100)
+        log(f'Saving {len(variants)} variants...')
+        with profile.phase('save'):
+            _perform_bulk_saves(data, to_bulk_create, to_bulk_update, log, progress=lambda x, t: progress(85 + int(x / t * 10), 100))
+        progress(95, 100)
+        log(f'Saved {len(variants)} variants.')
+        new_id_set = set(variants.keys())
+        del variants, variant_instances, to_bulk_update, to_bulk_create
     added = new_id_set - old_id_set
     restored = new_id_set & to_restore
     log(f'Added {len(added)} new variants.')
@@ -894,17 +1332,26 @@ def _generate_variants(
         }
     else:
         to_delete = set[str]()
-    delete_query = Variant.objects.filter(id__in=to_delete)
-    _, deleted_counts = delete_query.delete()
-    progress(97, 100)
-    deleted_count = deleted_counts.get('spellbook.Variant', 0)
-    log(f'Deleted {deleted_count} variants.')
-    added_aliases, deleted_aliases = sync_variant_aliases(data, added, to_delete)
+    with profile.phase('cleanup'):
+        delete_query = Variant.objects.filter(id__in=to_delete)
+        _, deleted_counts = delete_query.delete()
+        progress(97, 100)
+        deleted_count = deleted_counts.get('spellbook.Variant', 0)
+        log(f'Deleted {deleted_count} variants.')
+        added_aliases, deleted_aliases = sync_variant_aliases(data, added, to_delete)
     log(f'Added {added_aliases} new aliases, deleted {deleted_aliases} aliases.')
+    # the variants and their ingredients were bulk saved and deleted, sending no signals to the caches of the web processes
+    DataVersion.bump(DataVersion.VARIANTS, DataVersion.CATALOG)
     if plan.scope is not GenerationScope.SINGLE:
         # Only a full or incremental generation leaves the database in a state
         # that is consistent with the computed fingerprints
         store_fingerprints(current_fingerprints)
+        store_combo_costs(combo_costs, (combo.id for combo in data.generator_combos))
+    if checkpoint is not None:
+        checkpoint.clear()
+    metadata('profile', profile.phases_report())
+    if job is not None:
+        store_generation_profile(job, profile.report(combo_costs, (combo.id for combo in plan.combos_to_generate)))
     progress(100, 100)
     log('Done.')
     return len(added), len(restored), deleted_count
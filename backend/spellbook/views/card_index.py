@@ -0,0 +1,76 @@
+from array import array
+from bisect import bisect_left
+from typing import Iterable
+from spellbook.models import Card, DataVersion
+from .process_cache import PackedStrings, VersionedValue
+
+
+class CardIndex:
+    '''
+    The lookups a decklist needs over the whole card table, held in sorted arrays instead of dictionaries of rows:
+    card ids by lowercase name, then the color identity and commander eligibility of each card id.
+    A card is found by its full name first, then by the name of one of its faces when no card has that full name.
+    '''
+
+    def __init__(self, cards: Iterable[tuple[int, str, str, bool]]):
+        rows = sorted(cards)
+        self.ids = array('q', (id for id, _, _, _ in rows))
+        self.identities = tuple(sorted({identity for _, _, identity, _ in rows}))
+        identity_index = {identity: index for index, identity in enumerate(self.identities)}
+        self.identity_indices = array('B', (identity_index[identity] for _, _, identity, _ in rows))
+        self.commanders = bytes(is_commander for _, _, _, is_commander in rows)
+        names = dict[str, int]()
+        for id, name, _, _ in rows:
+            faces = name.split(' // ')
+            if len(faces) > 1:
+                for face in faces:
+                    names.setdefault(face.lower(), id)
+        for id, name, _, _ in rows:
+            names[name.lower()] = id
+        sorted_names = sorted(names)
+        self.names = PackedStrings(sorted_names)
+        self.name_ids = array('q', (names[name] for name in sorted_names))
+
+    def _position(self, card_id: int) -> int | None:
+        position = bisect_left(self.ids, card_id)
+        if position < len(self.ids) and self.ids[position] == card_id:
+            return position
+        return None
+
+    def __contains__(self, card_id: int) -> bool:
+        return self._position(card_id) is not None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def card_id(self, name: str) -> int | None:
+        '''The id of the card with this lowercase name, or with a face of this name.'''
+        position = bisect_left(self.names, name)
+        if position < len(self.names) and self.names[position] == name:
+            return self.name_ids[position]
+        return None
+
+    def identity(self, card_id: int) -> str | None:
+        position = self._position(card_id)
+        return None if position is None else self.identities[self.identity_indices[position]]
+
+    def is_commander(self, card_id: int) -> bool:
+        position = self._position(card_id)
+        return position is not None and bool(self.commanders[position])
+
+
+def _load_card_index() -> CardIndex:
+    return CardIndex(
+        (id, name, identity, Card(name=name, type_line=type_line, oracle_text=oracle_text, mana_value=mana_value, legal_commander=legal_commander).is_commander)
+        for id, name, identity, type_line, oracle_text, mana_value, legal_commander in Card.objects.values_list(
+            'id', 'name', 'identity', 'type_line', 'oracle_text', 'mana_value', 'legal_commander',
+        ).order_by()
+    )
+
+
+_card_index = VersionedValue(DataVersion.CARDS, _load_card_index)
+
+
+def card_index() -> CardIndex:
+    '''The card index of this process, rebuilt when the stamp of the cards changed since it was built.'''
+    return _card_index.get()
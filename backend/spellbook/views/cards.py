@@ -3,9 +3,10 @@ from django_filters.rest_framework import DjangoFilterBackend
 from spellbook.models import Card
 from spellbook.serializers import CardDetailSerializer
 from .filters import NameAutocompleteQueryFilter, OrderingFilterWithNullsLast
+from .conditional_get import ConditionalGetMixin
 
 
-class CardViewSet(viewsets.ReadOnlyModelViewSet):
+class CardViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = CardDetailSerializer.prefetch_related(Card.objects.all())
     serializer_class = CardDetailSerializer
     ordering_fields = ['variant_count', 'name']
@@ -0,0 +1,83 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+from django.core.exceptions import ValidationError
+from django.http import HttpResponseBase, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework.request import Request
+from spellbook.models import DataVersion
+
+
+class ConditionalGetMixin:
+    '''
+    Answers the GET requests of a read-only viewset with 304 Not Modified when the client already holds the response,
+    checking only the `catalog` stamp of `DataVersion` and, for a detail route, the `updated` field of the row.
+    The strong ETag of a response hashes the stamp, the path, the query parameters, the format and
+    `etag_parameters`, which is what else tells a response apart, like whose permissions filtered it.
+    Last-Modified is when the stamp was replaced, or when the row was updated if that came later.
+    The stamp read is kept in `catalog_version`, for the view to key its own caches with.
+    '''
+    catalog_version: UUID | None = None
+
+    def etag_parameters(self, request: Request) -> Any:
+        return None
+
+    def list(self, request: Request, *args, **kwargs):
+        return self.conditional(request, None, lambda: self.list_response(request, *args, **kwargs))
+
+    def retrieve(self, request: Request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field  # type: ignore
+        try:
+            updated = self.get_queryset().filter(**{self.lookup_field: kwargs[lookup_url_kwarg]}).values_list('updated', flat=True).first()  # type: ignore
+        except (TypeError, ValueError, ValidationError):
+            updated = None
+        if updated is None:
+            # a missing row gets its 404 from the usual lookup
+            return self.retrieve_response(request, *args, **kwargs)
+        return self.conditional(request, updated, lambda: self.retrieve_response(request, *args, **kwargs))
+
+    def list_response(self, request: Request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)  # type: ignore
+
+    def retrieve_response(self, request: Request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)  # type: ignore
+
+    def conditional(self, request: Request, updated: datetime | None, respond) -> HttpResponseBase:
+        stamp = DataVersion.stamp(DataVersion.CATALOG)
+        times = [updated] if updated is not None else []
+        if stamp is not None:
+            self.catalog_version = stamp[0]
+            times.append(stamp[1])
+        last_modified = max(times, default=None)
+        etag = self.etag(request, updated)
+        if self.not_modified(request, etag, last_modified):
+            response = HttpResponseNotModified()
+        else:
+            response = respond()
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def etag(self, request: Request, updated: datetime | None) -> str:
+        parts = [
+            str(self.catalog_version),
+            updated.isoformat() if updated is not None else None,
+            request.path,
+            sorted(request.query_params.lists()),
+            request.accepted_renderer.format,
+            self.etag_parameters(request),
+        ]
+        return '"' + hashlib.sha256(json.dumps(parts).encode()).hexdigest() + '"'
+
+    def not_modified(self, request: Request, etag: str, last_modified: datetime | None) -> bool:
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            etags = parse_etags(if_none_match)
+            return '*' in etags or any(tag.removeprefix('W/') == etag for tag in etags)
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since'))
+        return if_modified_since is not None and last_modified is not None and int(last_modified.timestamp()) <= if_modified_since
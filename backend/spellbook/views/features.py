@@ -3,6 +3,7 @@ from django_filters.rest_framework import DjangoFilterBackend, FilterSet, Multip
 from spellbook.models import Feature
 from spellbook.serializers import FeatureSerializer
 from .filters import NameAndDescriptionAutocompleteQueryFilter
+from .conditional_get import ConditionalGetMixin
 
 
 class FeatureFilterSet(FilterSet):
@@ -17,7 +18,7 @@ class FeatureFilterSet(FilterSet):
         fields = ['cards']
 
 
-class FeatureViewSet(viewsets.ReadOnlyModelViewSet):
+class FeatureViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = FeatureSerializer.prefetch_related(Feature.objects.exclude(status=Feature.Status.HIDDEN_UTILITY))
     serializer_class = FeatureSerializer
     filter_backends = [DjangoFilterBackend, NameAndDescriptionAutocompleteQueryFilter]
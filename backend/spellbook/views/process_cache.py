@@ -0,0 +1,49 @@
+import threading
+from array import array
+from typing import Callable, Generic, TypeVar
+from uuid import UUID
+from spellbook.models import DataVersion
+
+T = TypeVar('T')
+
+
+class PackedStrings:
+    '''Strings joined in one, seen as a sequence of them, so that each one costs no object of its own.'''
+
+    def __init__(self, strings: list[str]):
+        self.text = ''.join(strings)
+        self.offsets = array('I', [0])
+        for string in strings:
+            self.offsets.append(self.offsets[-1] + len(string))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self.text[self.offsets[index]:self.offsets[index + 1]]
+
+
+class VersionedValue(Generic[T]):
+    '''
+    A value this process derives from some kind of data and keeps in memory, loaded again when the stamp
+    of that data changed since it was loaded. The stamp is read before the data, so that a value is never kept
+    under a stamp newer than the data it was loaded from.
+    '''
+
+    def __init__(self, kind: str, load: Callable[[], T]):
+        self.kind = kind
+        self.load = load
+        self.current: tuple[UUID | None, T] | None = None
+        self.lock = threading.Lock()
+
+    def get(self) -> T:
+        version = DataVersion.current(self.kind)
+        current = self.current
+        if current is not None and current[0] == version:
+            return current[1]
+        with self.lock:
+            current = self.current
+            if current is None or current[0] != version:
+                current = (version, self.load())
+                self.current = current
+        return current[1]
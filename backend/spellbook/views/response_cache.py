@@ -0,0 +1,51 @@
+import hashlib
+import json
+from typing import Any
+from uuid import UUID
+from django.core.cache import BaseCache, caches
+
+RESPONSE_CACHE_ALIAS = 'responses'
+
+
+class ResponseCache:
+    '''
+    What an endpoint computed for some request parameters, kept in a cache of the Django cache framework under the
+    catalog version it was computed for. Entries are never invalidated one by one: the version is part of their key,
+    so bumping it leaves all of them unreachable, for the cache backend to evict as they age.
+    Hits and misses are counted in the same cache, so that the processes sharing a backend share the counters too.
+    '''
+
+    def __init__(self, name: str, alias: str = RESPONSE_CACHE_ALIAS):
+        self.name = name
+        self.alias = alias
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[self.alias]
+
+    def key(self, parameters: dict[str, Any], version: UUID | None) -> str:
+        '''The key of the entry for these parameters, at this catalog version.'''
+        digest = hashlib.sha256(json.dumps(parameters, sort_keys=True).encode()).hexdigest()
+        return f'{self.name}:{version}:{digest}'
+
+    def get(self, key: str) -> Any | None:
+        value = self.cache.get(key)
+        self._count('hits' if value is not None else 'misses')
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.cache.set(key, value)
+
+    def _count(self, counter: str) -> None:
+        key = f'{self.name}:{counter}'
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, 1, timeout=None)
+
+    def stats(self) -> dict[str, int]:
+        '''The hits and misses counted since the counters were last evicted.'''
+        return {counter: self.cache.get(f'{self.name}:{counter}', 0) for counter in ('hits', 'misses')}
+
+
+variants_list_cache = ResponseCache('variants-list')
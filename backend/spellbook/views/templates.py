@@ -3,9 +3,10 @@ from django_filters.rest_framework import DjangoFilterBackend
 from spellbook.models import Template
 from spellbook.serializers import TemplateSerializer
 from .filters import NameAndScryfallAutocompleteQueryFilter
+from .conditional_get import ConditionalGetMixin
 
 
-class TemplateViewSet(viewsets.ReadOnlyModelViewSet):
+class TemplateViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = TemplateSerializer.prefetch_related(Template.objects.all())
     serializer_class = TemplateSerializer
     filter_backends = [DjangoFilterBackend, NameAndScryfallAutocompleteQueryFilter]
@@ -4,17 +4,19 @@ from functools import cached_property
 from typing import Iterable, Sequence
 from common.serializers import CardInDeck as RawCardInDeck
 from common.abstractions import Deck as RawDeck
-from django.db.models import Case, F, Sum, When
-from django.db.models.functions import Coalesce, Greatest
+from django.db.models import Case, Sum, When
+from django.db.models.functions import Coalesce
 from django.template import loader
 from djangorestframework_camel_case.render import CamelCaseBrowsableAPIRenderer
 from rest_framework import parsers
 from rest_framework.views import APIView
 from rest_framework.request import Request
 from common.serializers import DeckSerializer as RawDeckSerializer
-from spellbook.models import Card, Template, TemplateInVariant, Variant, merge_color_identities
+from spellbook.models import Template, merge_color_identities
 from spellbook.variants.multiset import Multiset, FrozenMultiset
 from website.views import PlainTextDeckListParser
+from .card_index import CardIndex, card_index
+from .variant_matcher import variant_matcher
 
 
 def quantity_in_deck(ingredient: str, deck: Iterable[tuple[int, int]]) -> Case:
@@ -62,8 +64,7 @@ class Deck:
         return FrozenMultiset[int]({template_id: quantity for template_id, quantity in template_id_list})
 
 
-def deck_from_raw(raw_deck: RawDeck, cards_id_dict: dict[str, int], identity_dict: dict[int, str]) -> Deck:
-    valid_card_ids: set[int] = set(cards_id_dict.values())
+def deck_from_raw(raw_deck: RawDeck, cards: CardIndex) -> Deck:
     main = Multiset[int]()
     commanders = Multiset[int]()
 
@@ -72,18 +73,19 @@ def deck_from_raw(raw_deck: RawDeck, cards_id_dict: dict[str, int], identity_dic
         quantity = raw_card.quantity
         if not card or quantity < 1:
             return
-        if card in cards_id_dict:
-            card_set.add(cards_id_dict[card], quantity)
+        card_id = cards.card_id(card)
+        if card_id is not None:
+            card_set.add(card_id, quantity)
         elif card.isdigit():
             card_id = int(card)
-            if card_id in valid_card_ids:
+            if card_id in cards:
                 card_set.add(card_id, quantity)
     for card in raw_deck.main:
         next_card(card, main)
     for commander in raw_deck.commanders:
         next_card(commander, commanders)
-    cards = main.union(commanders)
-    identity = merge_color_identities(identity_dict[id] for id in cards.distinct_elements() if id in identity_dict)
+    deck_cards = main.union(commanders)
+    identity = merge_color_identities(cards.identity(id) or '' for id in deck_cards.distinct_elements())
     return Deck(main=FrozenMultiset(main), commanders=FrozenMultiset(commanders), identity=identity)
 
 
@@ -118,63 +120,17 @@ class DecklistAPIView(APIView):
         serializer = RawDeckSerializer(data=data)
         serializer.is_valid(raise_exception=True)
         raw_deck: RawDeck = serializer.save()  # type: ignore
-        cards_data = list[tuple[str, int, str]](Card.objects.values_list('name', 'id', 'identity'))
-        cards_data_dict: dict[str, int] = {name.lower(): id for name, id, _ in cards_data}
-        cards_identity_dict: dict[int, str] = {id: identity for _, id, identity in cards_data}
-        del cards_data
-        deck = deck_from_raw(raw_deck, cards_data_dict, cards_identity_dict)
+        deck = deck_from_raw(raw_deck, card_index())
         return deck
 
 
 def find_variants(deck: Deck, missing=1) -> Sequence[str]:
     '''The ids of the variants the deck is short of at most `missing` copies of an ingredient.
 
-    The card side counts from Variant, not from CardInVariant, so that a variant asking for templates
-    alone is still reached; the template side goes unnarrowed, so that too many missing templates stays
-    distinct from none at all. A list, because as a subquery PostgreSQL re-runs it once per worker.'''
-    missing_cards = dict[str, int](
-        Variant.objects
-        .values_list('pk')
-        .order_by()
-        .annotate(
-            missing_count=Coalesce(
-                Sum(
-                    Greatest(
-                        F('cardinvariant__quantity') - quantity_in_deck('cardinvariant__card_id', deck.cards.items()),
-                        0,
-                    ),
-                ),
-                0,
-            ),
-        )
-        .filter(
-            missing_count__lte=missing,
-        )
-        .values_list('pk', 'missing_count')
-    )
+    The in-memory matcher of this process narrows the variants by the cards first, so that the templates
+    of the deck are only looked up when some variant is within reach.'''
+    matcher = variant_matcher()
+    missing_cards = matcher.missing_cards(deck.cards, missing)
     if not missing_cards:
         return []
-
-    missing_templates = dict[str, int](
-        TemplateInVariant.objects
-        .values_list('variant_id')
-        .order_by()
-        .annotate(
-            missing_count=Coalesce(
-                Sum(
-                    Greatest(
-                        F('quantity') - quantity_in_deck('template_id', deck.templates.items()),
-                        0,
-                    ),
-                ),
-                0,
-            ),
-        )
-        .values_list('variant_id', 'missing_count')
-    )
-
-    return [
-        variant_id
-        for variant_id, missing_count in missing_cards.items()
-        if missing_count + missing_templates.get(variant_id, 0) <= missing
-    ]
+    return matcher.find(missing_cards, deck.templates, missing)
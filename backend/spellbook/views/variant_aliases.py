@@ -1,8 +1,9 @@
 from rest_framework import viewsets
 from spellbook.models import VariantAlias
 from spellbook.serializers import VariantAliasSerializer
+from .conditional_get import ConditionalGetMixin
 
 
-class VariantAliasViewSet(viewsets.ReadOnlyModelViewSet):
+class VariantAliasViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = VariantAlias.objects.all()
     serializer_class = VariantAliasSerializer
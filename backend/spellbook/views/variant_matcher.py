@@ -0,0 +1,108 @@
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import groupby
+from typing import Iterable
+from spellbook.models import CardInVariant, DataVersion, TemplateInVariant, Variant
+from spellbook.variants.multiset import FrozenMultiset
+from .process_cache import PackedStrings, VersionedValue
+
+
+class VariantMatcher:
+    '''
+    Finds the variants a deck is short of at most a few copies of an ingredient, without scanning every variant.
+    Variants are numbered by position and the arrays below are indexed by it.
+    Each card has a postings list of the variants using it, with the quantity they need, so that the cards a variant misses
+    are its total card copies minus the copies the deck covers, counted over the postings of the deck cards alone.
+    The variants no deck card reaches miss all of their cards, so only the ones needing few enough of them can match:
+    they are kept sorted by their total card copies. The templates of the few candidates are then checked one by one.
+    '''
+
+    def __init__(
+        self,
+        variant_ids: Iterable[str],
+        cards: Iterable[tuple[str, int, int]],
+        templates: Iterable[tuple[str, int, int]],
+    ):
+        ids = sorted(variant_ids)
+        self.variant_ids = PackedStrings(ids)
+        position_of = {id: position for position, id in enumerate(ids)}
+        del ids
+        card_totals = array('I', [0]) * len(position_of)
+        card_rows = sorted((card_id, position_of[variant_id], quantity) for variant_id, card_id, quantity in cards if variant_id in position_of)
+        self.card_ids = array('q')
+        self.card_offsets = array('I', [0])
+        self.card_postings = array('I')
+        self.card_quantities = array('H')
+        for card_id, postings in groupby(card_rows, key=lambda row: row[0]):
+            for _, position, quantity in postings:
+                self.card_postings.append(position)
+                self.card_quantities.append(quantity)
+                card_totals[position] += quantity
+            self.card_ids.append(card_id)
+            self.card_offsets.append(len(self.card_postings))
+        del card_rows
+        self.card_totals = card_totals
+        self.by_card_total = array('I', sorted(range(len(card_totals)), key=card_totals.__getitem__))
+        self.sorted_card_totals = array('I', (card_totals[position] for position in self.by_card_total))
+        template_rows = sorted((position_of[variant_id], template_id, quantity) for variant_id, template_id, quantity in templates if variant_id in position_of)
+        template_offsets = array('I', [0]) * (len(position_of) + 1)
+        for position, _, _ in template_rows:
+            template_offsets[position + 1] += 1
+        for position in range(len(position_of)):
+            template_offsets[position + 1] += template_offsets[position]
+        self.template_offsets = template_offsets
+        self.template_ids = array('q', (template_id for _, template_id, _ in template_rows))
+        self.template_quantities = array('H', (quantity for _, _, quantity in template_rows))
+
+    def __len__(self) -> int:
+        return len(self.variant_ids)
+
+    def _postings(self, card_id: int) -> range:
+        position = bisect_right(self.card_ids, card_id) - 1
+        if position < 0 or self.card_ids[position] != card_id:
+            return range(0)
+        return range(self.card_offsets[position], self.card_offsets[position + 1])
+
+    def missing_cards(self, cards: FrozenMultiset[int], missing: int) -> dict[int, int]:
+        '''The positions of the variants the deck cards leave short of at most `missing` card copies, with how many.'''
+        covered = defaultdict[int, int](int)
+        for card_id, quantity in cards.items():
+            for posting in self._postings(card_id):
+                covered[self.card_postings[posting]] += min(self.card_quantities[posting], quantity)
+        result = {
+            position: missing_count
+            for position, copies in covered.items()
+            if (missing_count := self.card_totals[position] - copies) <= missing
+        }
+        for index in range(bisect_right(self.sorted_card_totals, missing)):
+            position = self.by_card_total[index]
+            if position not in covered:
+                result[position] = self.card_totals[position]
+        return result
+
+    def find(self, missing_cards: dict[int, int], templates: FrozenMultiset[int], missing: int) -> list[str]:
+        '''The ids of the variants among the candidates whose missing cards and templates add up to at most `missing` copies.'''
+        result = list[str]()
+        for position, missing_count in missing_cards.items():
+            for index in range(self.template_offsets[position], self.template_offsets[position + 1]):
+                missing_count += max(self.template_quantities[index] - templates[self.template_ids[index]], 0)
+            if missing_count <= missing:
+                result.append(self.variant_ids[position])
+        return result
+
+
+def _load_variant_matcher() -> VariantMatcher:
+    return VariantMatcher(
+        variant_ids=Variant.objects.values_list('id', flat=True).order_by(),
+        cards=CardInVariant.objects.values_list('variant_id', 'card_id', 'quantity').order_by(),
+        templates=TemplateInVariant.objects.values_list('variant_id', 'template_id', 'quantity').order_by(),
+    )
+
+
+_variant_matcher = VersionedValue(DataVersion.VARIANTS, _load_variant_matcher)
+
+
+def variant_matcher() -> VariantMatcher:
+    '''The variant matcher of this process, rebuilt when the stamp of the variants changed since it was built.'''
+    return _variant_matcher.get()
@@ -13,6 +13,8 @@ from spellbook.models.utils import has_random_in_order_by, remove_duplicates_in_
 from spellbook.models.variant import DEFAULT_VIEW_ORDERING
 from spellbook.serializers import VariantSerializer
 from .filters import SpellbookQueryFilter, OrderingFilterWithNullsLast
+from .response_cache import variants_list_cache
+from .conditional_get import ConditionalGetMixin
 
 
 class VariantGroupedByComboFilter(filters.BaseFilterBackend):
@@ -33,11 +35,13 @@ class VariantGroupedByComboFilter(filters.BaseFilterBackend):
         return request.query_params.get(self.query_param)  # type: ignore
 
     def filter_queryset(self, request: HttpRequest, queryset: QuerySet[Variant], view: 'VariantViewSet'):
-        group_by_params = self.get_current_value(request)
-        if group_by_params in ('true', 'True', '1', ''):
+        if self.is_grouped(request):
             return self.grouped_queryset(queryset, view, self.window_size_for(request, view))
         return queryset
 
+    def is_grouped(self, request: HttpRequest) -> bool:
+        return self.get_current_value(request) in ('true', 'True', '1', '')
+
     def window_size_for(self, request: HttpRequest, view: 'VariantViewSet') -> int | None:
         '''How many variants the window has to reach to hold the combos the page shows: one page of
         them, each taking as many variants as a combo has on average. Both aggregates read the one
@@ -105,12 +109,13 @@ class VariantGroupedByComboFilter(filters.BaseFilterBackend):
 
 class EditorOrOnlyPublicVariantsFilters(filters.BaseFilterBackend):
     def filter_queryset(self, request: HttpRequest, queryset: QuerySet[Variant], view):
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            user = request.user
-            if user.has_perm('spellbook.change_variant'):  # type: ignore
-                return queryset.filter(status__in=Variant.public_statuses() + Variant.preview_statuses())
+        if self.is_editor(request):
+            return queryset.filter(status__in=Variant.public_statuses() + Variant.preview_statuses())
         return queryset.filter(status__in=Variant.public_statuses())
 
+    def is_editor(self, request: HttpRequest) -> bool:
+        return hasattr(request, 'user') and request.user.is_authenticated and request.user.has_perm('spellbook.change_variant')  # type: ignore
+
 
 class VariantFilterSet(FilterSet):
     variant = CharFilter(field_name='of__variants', label='Filters for variants of the same combos that generated the given variant id.', distinct=True)
@@ -122,7 +127,7 @@ class VariantFilterSet(FilterSet):
         'q': serializers.ListSerializer(child=serializers.CharField(), required=False),
     })
 })
-class VariantViewSet(viewsets.ReadOnlyModelViewSet):
+class VariantViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Variant.serialized_objects
     widen_combo_window: 'Callable[[], QuerySet[Variant] | None] | None' = None
     filter_backends = [
@@ -147,6 +152,45 @@ class VariantViewSet(viewsets.ReadOnlyModelViewSet):
         '?'
     ]
 
+    def etag_parameters(self, request):
+        return EditorOrOnlyPublicVariantsFilters().is_editor(request)
+
+    def list_response(self, request, *args, **kwargs):
+        parameters = self.cache_parameters(request)
+        if parameters is None:
+            return super().list_response(request, *args, **kwargs)
+        key = variants_list_cache.key(parameters, self.catalog_version)
+        page = variants_list_cache.get(key)
+        if page is not None:
+            state, results = page
+            self.paginator.restore_page(request, state)  # type: ignore
+            response = self.get_paginated_response(results)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = super().list_response(request, *args, **kwargs)
+        variants_list_cache.set(key, (self.paginator.page_state(), list(response.data['results'])))  # type: ignore
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def cache_parameters(self, request) -> dict | None:
+        '''The parameters that decide a page of the list once normalized, or None for a page that must not be cached.'''
+        paginator = self.paginator
+        if paginator is None or paginator.get_limit(request) is None:
+            return None
+        ordering = [term.strip() for term in request.query_params.get(OrderingFilterWithNullsLast.ordering_param, '').split(',') if term.strip()]
+        if any(term.lstrip('-') == '?' for term in ordering):
+            return None
+        return {
+            'q': SpellbookQueryFilter().get_search_terms(request).strip(),
+            'ordering': ordering,
+            'group_by_combo': VariantGroupedByComboFilter().is_grouped(request),
+            'variant': request.query_params.get('variant'),
+            'limit': paginator.get_limit(request),
+            'offset': paginator.get_offset(request),
+            'count': paginator.get_count_query(request),  # type: ignore
+            'editor': EditorOrOnlyPublicVariantsFilters().is_editor(request),
+        }
+
     def paginate_queryset(self, queryset):
         page = super().paginate_queryset(queryset)
         if page is not None and self.widen_combo_window is not None and len(page) < self.paginator.limit:
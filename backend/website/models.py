@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.core.validators import RegexValidator
 
 
@@ -29,3 +31,11 @@ class WebsiteProperty(models.Model):
         verbose_name = 'Website Property'
         verbose_name_plural = 'Website Properties'
         ordering = ['key']
+
+
+@receiver(post_save, sender=WebsiteProperty, dispatch_uid='website_property_catalog_data_version')
+def bump_catalog_data_version(sender, instance: WebsiteProperty, **kwargs):
+    # the featured set codes decide the results of the is:featured searches
+    if instance.key in FEATURED_SET_CODES_PROPERTIES:
+        from spellbook.models import DataVersion
+        DataVersion.bump(DataVersion.CATALOG)
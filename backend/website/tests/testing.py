@@ -1,6 +1,7 @@
 import logging
 import random
 from django.test import TestCase, override_settings
+from django.core.cache import caches
 from django.core.management import call_command
 from common.stream import StreamToLogger
 
@@ -28,4 +29,7 @@ class BaseTestCase(TestCase):
     def setUp(self):
         super().setUp()
         random.seed(42)
+        # each test starts from empty caches, as it starts from the same database
+        for cache in caches.all():
+            cache.clear()
         logging.disable(logging.INFO)
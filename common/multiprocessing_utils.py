@@ -119,3 +119,60 @@ def split_into_chunks(items: list[T], workers: int) -> list[list[T]]:
         chunks.append(items[start:end])
         start = end
     return chunks
+
+
+def split_by_cost(items: list[T], costs: list[float], workers: int) -> list[list[T]]:
+    '''Splits the items into chunks of decreasing cost, costliest items first, for a pool to hand out
+    as its workers free up.
+
+    Each chunk takes about half of the remaining cost divided by the workers, so the first ones are
+    large and cheap to dispatch, while the small ones at the tail let idle workers take over from
+    busy ones instead of waiting for them. An item costlier than that goes alone in its chunk, which
+    starts the longest runs first, and chunks stop shrinking at a small fraction of the total so that
+    the tail does not dissolve into single cheap items.
+    '''
+    if not items or workers <= 0:
+        return []
+    assert len(items) == len(costs)
+    remaining = sum(max(cost, 0.0) for cost in costs)
+    if remaining <= 0:
+        return split_into_chunks(items, workers)
+    order = sorted(range(len(items)), key=lambda i: costs[i], reverse=True)
+    smallest = remaining / (workers * 16)
+    chunks: list[list[T]] = []
+    chunk: list[T] = []
+    chunk_cost = 0.0
+    target = max(remaining / (workers * 2), smallest)
+    for i in order:
+        cost = max(costs[i], 0.0)
+        chunk.append(items[i])
+        chunk_cost += cost
+        if chunk_cost >= target:
+            chunks.append(chunk)
+            remaining -= chunk_cost
+            chunk = []
+            chunk_cost = 0.0
+            target = max(remaining / (workers * 2), smallest)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def split_evenly_by_cost(items: list[T], costs: list[float], parts: int) -> list[list[T]]:
+    '''Splits the items into at most that many parts of about the same cost, for as many workers to
+    take one each, keeping the items of each part in their original order.
+
+    The costliest items are placed first, each in the part with the least cost so far, which leaves
+    the cheap ones to even the parts out at the end. Empty parts are dropped.
+    '''
+    if not items or parts <= 0:
+        return []
+    assert len(items) == len(costs)
+    order = sorted(range(len(items)), key=lambda i: costs[i], reverse=True)
+    totals = [0.0] * min(parts, len(items))
+    members: list[list[int]] = [[] for _ in totals]
+    for i in order:
+        part = min(range(len(totals)), key=totals.__getitem__)
+        members[part].append(i)
+        totals[part] += max(costs[i], 0.0)
+    return [[items[i] for i in sorted(indices)] for indices in members if indices]
@@ -4,7 +4,7 @@ import signal
 import time
 from unittest import TestCase
 from unittest.mock import patch
-from multiprocessing_utils import WORKER_IGNORED_SIGNALS, WORKER_LETHAL_SIGNALS, WORKERS_ENV_VAR, fork_pool, parallelism_is_available, resolve_workers, fork_is_available, split_into_chunks
+from multiprocessing_utils import WORKER_IGNORED_SIGNALS, WORKER_LETHAL_SIGNALS, WORKERS_ENV_VAR, fork_pool, parallelism_is_available, resolve_workers, fork_is_available, split_into_chunks, split_by_cost
 
 
 def worker_signal_handlers(signals: tuple[signal.Signals, ...]) -> list[object]:
@@ -137,3 +137,32 @@ class TestMultiprocessingUtils(TestCase):
                     self.assertEqual([item for chunk in chunks for item in chunk], items)
                     self.assertLessEqual(len(chunks), workers * 4)
                     self.assertLessEqual(max(map(len, chunks)) - min(map(len, chunks)), 1)
+
+    def test_split_by_cost_of_empty_list(self):
+        self.assertEqual(split_by_cost([], [], 4), [])
+
+    def test_split_by_cost_keeps_every_item_once(self):
+        for workers in (1, 2, 3, 8):
+            for size in (1, 5, 16, 100):
+                with self.subTest(workers=workers, size=size):
+                    items = list(range(size))
+                    costs = [float((i * 7919) % 13 + 1) for i in items]
+                    chunks = split_by_cost(items, costs, workers)
+                    self.assertCountEqual([item for chunk in chunks for item in chunk], items)
+
+    def test_split_by_cost_starts_with_the_costliest_items(self):
+        items = ['cheap', 'costly', 'medium', 'cheaper']
+        chunks = split_by_cost(items, [1.0, 100.0, 10.0, 0.5], 2)
+        self.assertEqual(chunks[0], ['costly'])
+        self.assertEqual([item for chunk in chunks for item in chunk], ['costly', 'medium', 'cheap', 'cheaper'])
+
+    def test_split_by_cost_shrinks_the_chunks_towards_the_end(self):
+        costs = [1.0] * 200
+        chunks = split_by_cost(list(range(200)), costs, 4)
+        sizes = [len(chunk) for chunk in chunks]
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+        self.assertGreater(sizes[0], sizes[-1])
+        self.assertGreater(len(chunks), 4)
+
+    def test_split_by_cost_without_costs_splits_evenly(self):
+        self.assertEqual(split_by_cost([1, 2, 3, 4], [0.0] * 4, 2), split_into_chunks([1, 2, 3, 4], 2))